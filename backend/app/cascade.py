@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .local_model import LEVEL_RANKS, level_rank
+
+logger = logging.getLogger(__name__)
+
+CASCADE_SOURCE = "cascade"
+
+# Bu anahtar kelime gruplarından biri geçen satırlar her durumda LLM'e gider
+HIGH_RISK_GROUPS = ("fallback:critical", "severity:critical")
+# Kural katmanının anomali işareti; yerel model normal derse katmanlar çelişir
+RULE_ANOMALY_GROUP = "fallback:anomaly"
+
+
+class Triage(NamedTuple):
+    """Bir satır için ucuz katmanların kararı"""
+    escalate: bool
+    reason: str  # high_risk, uncertain, no_model, confident
+    score: Optional[float]  # yerel model skoru (yoksa None)
+    priority: float  # LLM bütçesi yetmezse önce yüksek öncelikliler gönderilir
+    rule_anomaly: bool  # anahtar kelime kuralları anomali diyor mu
+
+
+class LLMBudget:
+    """Analiz başına LLM harcaması: istek sayısı ve istek süresi sınırı (0 = sınırsız)"""
+
+    def __init__(self, max_calls: int = 0, max_seconds: float = 0):
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.calls = 0
+        self.seconds = 0.0
+        self.skipped_lines = 0  # bütçe bittiği için LLM'e gönderilemeyen satırlar
+
+    def remaining_calls(self) -> Optional[int]:
+        """Kalan istek sayısı; sınır yoksa None"""
+        if self.exhausted():
+            return 0
+        return max(0, self.max_calls - self.calls) if self.max_calls else None
+
+    def exhausted(self) -> bool:
+        return bool((self.max_calls and self.calls >= self.max_calls)
+                    or (self.max_seconds and self.seconds >= self.max_seconds))
+
+    def deadline(self) -> Optional[float]:
+        """Süre sınırı varsa, kalan süreye göre monotonic bitiş anı"""
+        return time.monotonic() + max(0.0, self.max_seconds - self.seconds) if self.max_seconds else None
+
+    def charge(self, calls: int, seconds: float):
+        self.calls += calls
+        self.seconds += seconds
+
+    def summary(self) -> Dict:
+        return {
+            "llm_calls": self.calls,
+            "llm_seconds": round(self.seconds, 2),
+            "max_calls": self.max_calls or None,
+            "max_seconds": self.max_seconds or None,
+            "skipped_lines": self.skipped_lines,
+        }
+
+
+class CascadeController:
+    """LLM'in önündeki ucuz katmanlar: kurallar, analiz içi istatistik ve yerel model
+
+    Her satır önce ucuz katmanlarla skorlanır. Yerel model skoru eşiğin ``band``
+    kadar altında olan, kuralların anomali demediği ve analizde seyrek olmayan
+    şablonlara ait satırlar normal; eşiğin ``band`` kadar üstündekiler anomali
+    sayılır. Aradaki belirsizlik bandındaki, katmanların çeliştiği ya da yüksek
+    riskli anahtar kelime içeren satırlar LLM'e yükseltilir. Yerel model eğitilmemişse
+    yüksek riskli olmayan tüm satırlar da yükseltilir (eski davranış). Model, LLM
+    kararlarından en az ``min_training_samples`` satırla eğitilene kadar eğitilmemiş sayılır.
+    """
+
+    def __init__(self, band: float = 0.05, rare_template_lines: int = 3, max_calls: int = 0,
+                 max_seconds: float = 0, enabled: bool = True, type_calls: Optional[Dict[str, int]] = None,
+                 min_training_samples: int = 2000):
+        self.band = max(0.0, band)
+        self.rare_template_lines = max(0, rare_template_lines)
+        self.max_calls = max(0, max_calls)
+        self.max_seconds = max(0.0, max_seconds)
+        self.enabled = enabled
+        self.min_training_samples = max(1, min_training_samples)
+        # Örneklenmeden analiz edilen fast/detailed türlerinin istek sınırı (0 = sınırsız)
+        self.type_calls = {name: max(0, calls) for name, calls in (type_calls or {}).items()}
+
+    def budget(self, analysis_type: Optional[str] = None) -> LLMBudget:
+        """Analiz bütçesi; ``analysis_type``'ın istek sınırı varsa genel sınırla küçük olanı geçerlidir"""
+        limits = [limit for limit in (self.max_calls, self.type_calls.get(analysis_type, 0)) if limit]
+        return LLMBudget(min(limits) if limits else 0, self.max_seconds)
+
+    def triage(self, lines: Sequence[str], keyword_hits: Sequence[FrozenSet[str]], template_sizes: Sequence[int],
+               scores: Optional[np.ndarray], threshold: float) -> List[Triage]:
+        """Satır başına yükseltme kararı (``scores``: yerel model skorları, model yoksa None)"""
+        decisions = []
+        for idx, hits in enumerate(keyword_hits):
+            score = float(scores[idx]) if scores is not None else None
+            rule_anomaly = RULE_ANOMALY_GROUP in hits
+            if any(group in hits for group in HIGH_RISK_GROUPS):
+                decisions.append(Triage(True, "high_risk", score, 2.0, rule_anomaly))
+            elif score is None:
+                decisions.append(Triage(True, "no_model", None, 0.5, rule_anomaly))
+            else:
+                margin = score - threshold
+                # Kurallar ya da analiz içi seyreklik anomaliye işaret ediyorsa model "normal" dese de emin olunamaz
+                suspicious = rule_anomaly or (
+                    template_sizes[idx] <= self.rare_template_lines
+                    and level_rank(lines[idx]) >= LEVEL_RANKS["WARNING"]
+                )
+                if margin >= self.band or (margin <= -self.band and not suspicious):
+                    decisions.append(Triage(False, "confident", score, 0.0, rule_anomaly))
+                else:
+                    # Eşiğe yakın olanlar en belirsiz olanlardır
+                    decisions.append(Triage(True, "uncertain", score, 1.0 - min(abs(margin), 1.0), rule_anomaly))
+        return decisions
+
+    def verdict(self, line: str, decision: Triage, threshold: float) -> Optional[Dict]:
+        """Yerel model skorundan LLM'siz karar
+
+        Skor yoksa, satır yüksek riskliyse ya da model normal derken kurallar anomali
+        diyorsa None döner; bu satırlar anahtar kelime kurallarıyla karara bağlanır.
+        """
+        if decision.score is None or decision.reason == "high_risk":
+            return None
+        margin = decision.score - threshold
+        if margin < 0 and decision.rule_anomaly:
+            return None
+        confidence = round(min(0.95, 0.6 + abs(margin)), 2)
+        if margin >= 0:
+            level = level_rank(line)
+            return {
+                "is_anomaly": True,
+                "severity": "critical" if level >= LEVEL_RANKS["CRITICAL"] else "high" if level >= LEVEL_RANKS["ERROR"] else "medium",
+                "anomaly_type": "local_model",
+                "confidence": confidence,
+                "explanation": f"Yerel model: olağandışı satır (skor {decision.score:.2f}, eşik {threshold:.2f})",
+            }
+        return {
+            "is_anomaly": False,
+            "severity": "info",
+            "anomaly_type": "normal",
+            "confidence": confidence,
+            "explanation": f"Normal log (yerel model skoru {decision.score:.2f}, eşik {threshold:.2f})",
+        }
+
+
+cascade_controller = CascadeController(
+    band=float(os.getenv("LLM_CASCADE_BAND", "0.05")),
+    rare_template_lines=int(os.getenv("LLM_CASCADE_RARE_TEMPLATE_LINES", "3")),
+    max_calls=int(os.getenv("LLM_BUDGET_CALLS", "0")),
+    max_seconds=float(os.getenv("LLM_BUDGET_SECONDS", "0")),
+    enabled=os.getenv("LLM_CASCADE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    type_calls={
+        "fast": int(os.getenv("LLM_BUDGET_CALLS_FAST", "15")),
+        "detailed": int(os.getenv("LLM_BUDGET_CALLS_DETAILED", "75")),
+    },
+    min_training_samples=int(os.getenv("LLM_CASCADE_MIN_TRAINING_SAMPLES", "2000")),
+)
@@ -1,20 +1,75 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, Float
+from sqlalchemy import create_engine, event, inspect, text, Column, Index, Integer, String, DateTime, Text, Boolean, Float, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 from datetime import datetime
 
 # Database URL - Backend dizininden çalıştırılacak şekilde ayarlandı
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///../data/loggy_new.db")
 
+# SQLite üretim modu: WAL ile okuyucular yazıcıyı beklemez
+SQLITE_PRODUCTION_MODE = os.getenv("SQLITE_PRODUCTION_MODE", "true").lower() in ("1", "true", "yes")
+SQLITE_CACHE_SIZE_MB = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:")
+
+# Tek executemany çağrısında gönderilecek satır sayısı
+BULK_INSERT_CHUNK_SIZE = 5000
+
+engine_options = {}
+if IS_SQLITE and not IS_SQLITE_MEMORY:
+    engine_options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=30,
+    )
+
 # Create engine
 engine = create_engine(
     DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    **engine_options
+)
+
+def async_database_url(url: str) -> str:
+    """Senkron veritabanı URL'ini asyncio sürücüsüne çevir"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+# Endpoint'ler için asyncio motoru (aiosqlite); sorgular event loop'u bloklamaz
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    # aiosqlite varsayılan olarak NullPool kullanır; her sorguda yeni bağlantı/thread açılmasın
+    **(dict(engine_options, poolclass=AsyncAdaptedQueuePool) if engine_options else {})
 )
 
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Her yeni bağlantıda WAL ve performans ayarlarını uygula"""
+    cursor = dbapi_connection.cursor()
+    if not IS_SQLITE_MEMORY:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_MB * 1024}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+if IS_SQLITE and SQLITE_PRODUCTION_MODE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create Base class
 Base = declarative_base()
@@ -27,17 +82,30 @@ class LogFile(Base):
     filename = Column(String, index=True)
     file_size = Column(Integer)
     upload_date = Column(DateTime, default=datetime.utcnow)
-    status = Column(String, default="uploaded")  # uploaded, processing, completed, error
+    status = Column(String, default="uploaded")  # uploading, uploaded, processing, completed, error
     total_lines = Column(Integer, default=0)
     anomaly_count = Column(Integer, nullable=True)  # NULL = not analyzed, number = analyzed
     file_path = Column(String)
-    security_report_json = Column(Text, nullable=True)  # Güvenlik raporu JSON
+    security_report_json = Column(Text, nullable=True)  # Güvenlik raporu JSON (eski kayıtlar)
+    security_report_blob = Column(LargeBinary, nullable=True)  # Bölüm bölüm sıkıştırılmış güvenlik raporu
+    sha256 = Column(String(64), nullable=True, index=True)  # Yükleme sırasında hesaplanan içerik özeti
+    search_indexed = Column(Boolean, default=False)  # Satırlar FTS5 arama indeksine eklendi mi
+    analyzed_offset = Column(Integer, nullable=True)  # Son analizde okunan son tam satırın bittiği byte
+    analyzed_lines = Column(Integer, nullable=True)  # analyzed_offset'e kadar olan satır sayısı
+    prefix_fingerprint = Column(String(64), nullable=True)  # analyzed_offset'e kadarki ön ekin özeti
 
 class LogEntry(Base):
     __tablename__ = "log_entries"
+    __table_args__ = (
+        # Sonuç sayfalama: dosya + filtre + satır numarası üzerinden keyset taraması
+        Index("ix_log_entries_file_anomaly_severity_line", "log_file_id", "is_anomaly", "severity", "line_number"),
+        Index("ix_log_entries_file_severity_line", "log_file_id", "severity", "line_number"),
+        Index("ix_log_entries_file_line", "log_file_id", "line_number"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     log_file_id = Column(Integer, index=True)
+    analysis_id = Column(Integer, nullable=True, index=True)  # Satırı üreten AnalysisResult
     line_number = Column(Integer)
     timestamp = Column(DateTime, nullable=True)
     log_level = Column(String)
@@ -46,6 +114,11 @@ class LogEntry(Base):
     anomaly_score = Column(Float, default=0.0)
     anomaly_type = Column(String, nullable=True)
     severity = Column(String, default="info")  # info, warning, error, critical
+    confidence = Column(Float, nullable=True)
+    explanation = Column(Text, nullable=True)
+    verdict_source = Column(String, nullable=True)  # llm, cache, template, keyword, cascade, statistical
+    template_id = Column(Integer, nullable=True)
+    details_json = Column(Text, nullable=True)  # Şablon, MITRE tekniği ve aksiyon önerileri
 
 class AnalysisResult(Base):
     __tablename__ = "analysis_results"
@@ -60,7 +133,76 @@ class AnalysisResult(Base):
     anomaly_rate = Column(Float, default=0.0)  # Anomali oranı
     confidence_score = Column(Float, default=0.0)  # Güven skoru
     processing_time = Column(Float)
-    results_json = Column(Text)  # JSON formatında sonuçlar
+    results_json = Column(Text)  # JSON formatında sonuçlar (eski kayıtlar)
+    results_blob = Column(LargeBinary, nullable=True)  # Sıkıştırılmış msgpack sonuçlar (eski kayıtlar; yeni sonuçlar log_entries'te)
+    base_analysis_id = Column(Integer, nullable=True)  # Artımlı analizde üzerine eklenen önceki analiz
+    first_line = Column(Integer, default=1)  # Bu analizde işlenen ilk satır (artımlıda yalnızca yeni satırlar)
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    log_file_id = Column(Integer, index=True)
+    analysis_type = Column(String, default="fast")
+    incremental = Column(Boolean, default=False)  # Yalnızca son analizden sonra eklenen satırları analiz et
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    progress = Column(Float, default=0.0)  # Tamamlanma yüzdesi (0-100)
+    processed_lines = Column(Integer, default=0)  # Okunan kaynak satır sayısı
+    total_lines = Column(Integer, default=0)
+    lines_per_second = Column(Float, default=0.0)
+    eta_seconds = Column(Float, nullable=True)
+    analysis_id = Column(Integer, nullable=True)  # Tamamlanınca oluşan AnalysisResult
+    error_message = Column(Text, nullable=True)
+
+class TailCheckpoint(Base):
+    """İzlenen dizinlerdeki bir dosyanın kalıcı takip kaydı (inode ile tanımlanır)"""
+    __tablename__ = "tail_checkpoints"
+    __table_args__ = (
+        Index("ix_tail_checkpoints_device_inode", "device", "inode", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    device = Column(Integer)
+    inode = Column(Integer)
+    path = Column(String)  # Dosyanın son görüldüğü yol (döndürülünce değişir)
+    log_file_id = Column(Integer, index=True)
+    size = Column(Integer, default=0)  # Son görülen boyut
+    rotated = Column(Boolean, default=False)  # Döndürüldü; kalan satırlar analiz edilince takip biter
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class LLMVerdictCache(Base):
+    __tablename__ = "llm_verdict_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256(normalize(satır) + model + prompt sürümü)
+    model_name = Column(String)
+    prompt_version = Column(String)
+    verdict_json = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_access = Column(DateTime, default=datetime.utcnow, index=True)  # LRU tahliyesi için
+    hit_count = Column(Integer, default=0)
+
+def bulk_insert(db, model, rows, chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> int:
+    """Satırları ORM nesnesi oluşturmadan Core INSERT + executemany ile parça parça ekle
+    
+    ``rows`` sözlük üreten herhangi bir iterable olabilir. Commit çağırana aittir,
+    böylece ekleme çağıranın transaction'ına dahil olur.
+    """
+    table = model.__table__
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.execute(table.insert(), chunk)
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(table.insert(), chunk)
+        inserted += len(chunk)
+    return inserted
 
 # Dependency to get database session
 def get_db():
@@ -70,6 +212,32 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
+
+def add_missing_columns():
+    """Mevcut tablolara modelde olup veritabanında olmayan kolonları ekle (basit migration)"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")) 
+
+def add_missing_indexes():
+    """Mevcut tablolara sonradan tanımlanan indeksleri ekle"""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
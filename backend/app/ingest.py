@@ -0,0 +1,303 @@
+import hashlib
+import mmap
+import os
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Satır başlangıç offset'lerinin tutulduğu yan dosyanın uzantısı (little-endian uint64 dizisi)
+LINE_INDEX_SUFFIX = ".idx"
+CHUNK_SIZE = 1024 * 1024
+# Artımlı analizde ön ek kontrolü için baştan ve sondan özetlenen byte sayısı
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+NEWLINE = ord("\n")
+
+
+class UploadTooLargeError(Exception):
+    """Yüklenen dosya izin verilen boyutu aştı"""
+
+
+def line_index_path(file_path: str) -> str:
+    return file_path + LINE_INDEX_SUFFIX
+
+
+class LineIndexWriter:
+    """Parça parça gelen veriden satır başlangıç offset'lerini indeks dosyasına yaz"""
+
+    def __init__(self, index_out: BinaryIO):
+        self.index_out = index_out
+        self.total_bytes = 0
+        self.newline_count = 0
+        self.last_byte = None
+
+    def feed(self, chunk: bytes):
+        if self.total_bytes == 0:
+            # İlk satır her zaman 0. byte'ta başlar
+            np.zeros(1, dtype="<u8").tofile(self.index_out)
+
+        # Her '\n' sonrası yeni bir satırın başlangıcıdır
+        newline_positions = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == NEWLINE)
+        self.newline_count += len(newline_positions)
+        (newline_positions.astype("<u8") + (self.total_bytes + 1)).tofile(self.index_out)
+        self.total_bytes += len(chunk)
+        self.last_byte = chunk[-1]
+
+    def finish(self) -> int:
+        """İndeksi tamamla ve satır sayısını döndür"""
+        if self.total_bytes and self.last_byte == NEWLINE:
+            # Dosya '\n' ile bitiyorsa son offset boş bir satırı gösterir, at
+            self.index_out.truncate(self.index_out.tell() - 8)
+        return self.newline_count + (1 if self.total_bytes and self.last_byte != NEWLINE else 0)
+
+
+class IngestWriter:
+    """Parça parça gelen veriyi diske yaz; aynı geçişte satır say, SHA-256 hesapla ve satır offset'lerini kaydet
+
+    Veri ham byte olarak işlenir, bellek kullanımı dosya boyutundan bağımsızdır.
+    Satır başlangıç offset'leri ``dest_path + ".idx"`` dosyasına uint64 olarak
+    yazılır. Yazım benzersiz adlı ``.part`` dosyalarına yapılır ve ``finish`` ile
+    yerine taşınır; aynı adla önceden yüklenmiş dosya yükleme bitene kadar
+    değişmez. ``max_bytes`` aşılırsa ``feed`` ``UploadTooLargeError`` fırlatır;
+    hata durumunda çağıran ``abort`` ile yalnızca yarım ``.part`` dosyalarını siler. ``sinks`` aynı
+    parçaları alan ek tüketicilerdir (``feed``/``finish``/``abort``; ör. arama indeksi).
+    """
+
+    def __init__(self, dest_path: str, max_bytes: int, sinks: Sequence = ()):
+        self.dest_path = dest_path
+        self.index_path = line_index_path(dest_path)
+        self.part_path = f"{dest_path}.{uuid.uuid4().hex}.part"
+        self.part_index_path = line_index_path(self.part_path)
+        self.max_bytes = max_bytes
+        self.sha256 = hashlib.sha256()
+        self.total_bytes = 0
+        self.out = open(self.part_path, "wb")
+        self.index_out = open(self.part_index_path, "wb")
+        self.index_writer = LineIndexWriter(self.index_out)
+        self.sinks = list(sinks)
+
+    def feed(self, chunk: bytes):
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        if self.total_bytes > self.max_bytes:
+            raise UploadTooLargeError(f"Dosya boyutu {self.max_bytes} byte sınırını aşıyor")
+        self.out.write(chunk)
+        self.sha256.update(chunk)
+        self.index_writer.feed(chunk)
+        for sink in self.sinks:
+            sink.feed(chunk)
+
+    def finish(self) -> Dict:
+        line_count = self.index_writer.finish()
+        self.out.close()
+        self.index_out.close()
+        os.replace(self.part_path, self.dest_path)
+        os.replace(self.part_index_path, self.index_path)
+        for sink in self.sinks:
+            sink.finish()
+        return {
+            "bytes": self.total_bytes,
+            "line_count": line_count,
+            "sha256": self.sha256.hexdigest(),
+            "index_path": self.index_path,
+        }
+
+    def abort(self):
+        """Dosyaları kapat ve yarım ``.part`` dosyalarını sil"""
+        self.out.close()
+        self.index_out.close()
+        for sink in self.sinks:
+            sink.abort()
+        for path in (self.part_path, self.part_index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def ingest_stream(source: BinaryIO, dest_path: str, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Dosya benzeri kaynağı ``IngestWriter`` ile tek geçişte diske yaz"""
+    writer = IngestWriter(dest_path, max_bytes)
+    try:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            writer.feed(chunk)
+        return writer.finish()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def build_line_index(file_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """İndeksi olmayan (eski) bir dosya için satır offset indeksini oluştur, satır sayısını döndür
+
+    İndeks önce geçici dosyaya yazılır ve tamamlanınca yerine taşınır; yarım
+    kalan bir indeks okuyuculara hiçbir zaman görünmez.
+    """
+    index_path = line_index_path(file_path)
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(file_path, "rb") as source, open(tmp_path, "wb") as index_out:
+            index_writer = LineIndexWriter(index_out)
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                index_writer.feed(chunk)
+            line_count = index_writer.finish()
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return line_count
+
+
+def line_index_matches(file_path: str, file_size: int) -> bool:
+    """Satır offset indeksi var ve ``file_size`` byte'lık dosyanın güncel hali için mi"""
+    index_path = line_index_path(file_path)
+    if not os.path.exists(index_path):
+        return False
+    index_size = os.path.getsize(index_path)
+    if index_size % 8:
+        return False
+    if index_size == 0:
+        return file_size == 0
+    # Son satır dosyanın içinde başlamalı ve dosya indeksten sonra değişmemiş olmalı
+    last_offset = int(np.memmap(index_path, dtype="<u8", mode="r", offset=index_size - 8, shape=(1,))[0])
+    return last_offset < file_size and os.path.getmtime(index_path) >= os.path.getmtime(file_path)
+
+
+def indexed_newline_count(file_path: str, end_offset: int) -> Optional[int]:
+    """[0, end_offset) aralığındaki satır sonu sayısını indeksten bul; indeks geçerli değilse None
+
+    ``end_offset`` bir satırın başlangıcı (ör. ``last_line_end`` sonucu) olmalıdır;
+    sayı, offset dizisinde ikili aramayla dosya okunmadan bulunur.
+    """
+    if not line_index_matches(file_path, os.path.getsize(file_path)):
+        return None
+    index_path = line_index_path(file_path)
+    if end_offset == 0 or os.path.getsize(index_path) == 0:
+        return 0
+    offsets = np.memmap(index_path, dtype="<u8", mode="r")
+    # end_offset'ten önce başlayan satırların her biri '\n' ile biter
+    return int(np.searchsorted(offsets, np.uint64(end_offset), side="left"))
+
+
+def count_newlines(file_path: str, start_offset: int, end_offset: int, chunk_size: int = CHUNK_SIZE) -> int:
+    """[start_offset, end_offset) aralığındaki satır sonu sayısı"""
+    count = 0
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        remaining = end_offset - start_offset
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            count += chunk.count(b"\n")
+    return count
+
+
+def last_line_end(file_path: str, size: int, chunk_size: int = 64 * 1024) -> int:
+    """``size``'dan önceki son tam satırın bittiği offset (yarım kalan son satır hariç)"""
+    with open(file_path, "rb") as f:
+        position = size
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                return start + newline + 1
+            position = start
+    return 0
+
+
+def lines_before(file_path: str, offset: int, line_count: int, chunk_size: int = 64 * 1024) -> Tuple[int, int]:
+    """``offset``'ten (satır başı) geriye en fazla ``line_count`` satır git; (başlangıç offset'i, satır sayısı) döndür
+
+    Yalnızca geriye doğru okunan byte'lar taranır; dosyanın başına ulaşılırsa daha az satır döner.
+    """
+    found = 0
+    with open(file_path, "rb") as f:
+        position = offset
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            chunk = f.read(position - start)
+            # offset'teki satırın başındaki '\n' önceki satırın sonudur, sayılmaz
+            end = len(chunk) - 1 if position == offset else len(chunk)
+            newline = chunk.rfind(b"\n", 0, end)
+            while newline != -1:
+                found += 1
+                if found == line_count:
+                    return start + newline + 1, found
+                newline = chunk.rfind(b"\n", 0, newline)
+            position = start
+    return 0, found + (1 if offset > 0 and found < line_count else 0)
+
+
+def prefix_fingerprint(file_path: str, offset: int, sample_size: int = FINGERPRINT_SAMPLE_SIZE) -> str:
+    """Dosyanın ilk ``offset`` byte'ının özeti (baştan ve sondan örneklenmiş)
+
+    Ön ekin tamamı yerine ilk ve son ``sample_size`` byte'ı özetlenir; böylece
+    kontrol dosya boyutundan bağımsızdır. Log döndürme (rotation), kesme ya da
+    yeniden yazma ilk satırları veya analiz edilen son satırları değiştirir.
+    """
+    digest = hashlib.sha256(str(offset).encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(min(sample_size, offset)))
+        tail_start = max(0, offset - sample_size)
+        f.seek(tail_start)
+        digest.update(f.read(offset - tail_start))
+    return digest.hexdigest()
+
+
+class LineIndex:
+    """Satır offset indeksi üzerinden log dosyasına rastgele erişim
+
+    Hem indeks hem log dosyası mmap ile açılır; [start, end) aralığındaki satırlar
+    dosyanın başından taranmadan, tek bir dilimle okunur. İndeks yoksa ya da
+    dosyayla uyuşmuyorsa (ör. dosya sonradan değişti) yeniden oluşturulur.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        self.file_size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.file_size else b""
+        self.offsets = self._load_offsets()
+
+    def _load_offsets(self) -> np.ndarray:
+        index_path = line_index_path(self.file_path)
+        if not line_index_matches(self.file_path, self.file_size):
+            build_line_index(self.file_path)
+        if os.path.getsize(index_path) == 0:
+            return np.zeros(0, dtype="<u8")
+        return np.memmap(index_path, dtype="<u8", mode="r")
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets)
+
+    def read_lines(self, start: int, end: Optional[int] = None) -> List[str]:
+        """0 tabanlı [start, end) aralığındaki satırları döndür (satır sonu karakterleri olmadan)"""
+        end = self.line_count if end is None else min(end, self.line_count)
+        start = max(start, 0)
+        if start >= end:
+            return []
+        begin = int(self.offsets[start])
+        stop = int(self.offsets[end]) if end < self.line_count else self.file_size
+        text = self._data[begin:stop].decode("utf-8", errors="ignore")
+        return [line.rstrip("\r") for line in text.split("\n")[:end - start]]
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+        # np.memmap dosyayı referansı bırakılınca kapatır
+        self.offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,629 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime
+from itertools import chain
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .database import SessionLocal, AnalysisJob, AnalysisResult, LogFile
+from .ingest import count_newlines, indexed_newline_count, last_line_end, lines_before, prefix_fingerprint
+from .ml_model import anomaly_detector
+from .pipeline import LogRecord, batched, read_log_range
+from .log_parser import LogParser
+from .report_store import encode_report, load_report
+from .results_store import ResultSpool, replace_entries, insert_entries, drop_entries_from, anomaly_results
+from .search_index import search_index
+from .statistical_detector import MAX_FINDINGS, STATISTICAL_ANALYSIS, statistical_detector
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# İlerlemenin veritabanına yazılma aralığı (saniye)
+PROGRESS_FLUSH_INTERVAL = 1.0
+# Olay akışında bağlantıyı canlı tutmak için boş yorum gönderme aralığı (saniye)
+STREAM_KEEPALIVE_INTERVAL = 15.0
+# Sonradan bağlanan izleyicilere ilk olayda gönderilen en fazla anomali (en son bulunanlar);
+# tamamı iş bitince log_entries üzerinden sayfalanır
+STREAM_SNAPSHOT_FINDINGS = int(os.getenv("JOB_STREAM_SNAPSHOT_FINDINGS", "500"))
+# Analiz sonrası yerel model eğitimine tek seferde verilen satır sayısı
+TRAINING_CHUNK_LINES = 100000
+# Yalnızca LLM'den gelen (doğrudan, önbellekten ya da şablondan yayılan) kararlar eğitime girer;
+# yerel modelin kendi (cascade) ve anahtar kelime kararları geri besleme döngüsü oluşturur
+TRAINING_VERDICT_SOURCES = frozenset({"llm", "cache", "template"})
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Server-Sent Events biçiminde tek bir olay"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class JobProgress:
+    """Çalışan bir işin okuma ve LLM batch ilerlemesini izler
+
+    Okuma konumu dosya okuyan thread'de, batch sayaçları event loop'ta
+    güncellenir. Sampling uygulanan analizlerde okuma ve LLM aşamaları (istatistiksel
+    analizde iki okuma geçişi) ardışık çalıştığı için ilerleme iki yarıya bölünür; pencereli analizde ikisi iç içe
+    ilerlediğinden okunan oran, o ana kadarki batch tamamlanma oranıyla çarpılır.
+    """
+
+    def __init__(self, total_lines: int, sampled: bool, first_line: int = 1):
+        self.total_lines = max(total_lines, 1)
+        self.sampled = sampled
+        self.first_line = first_line
+        self.position = 0
+        self.batches_done = 0
+        self.batches_total = 0
+        self.anomaly_count = 0
+        self.critical_count = 0
+        # Sonradan bağlanan izleyiciler için son bulunan anomaliler (bellek sınırlı)
+        self.findings: Deque[Dict] = deque(maxlen=STREAM_SNAPSHOT_FINDINGS)
+        self.started = time.monotonic()
+
+    def track(self, records: Iterable[LogRecord]) -> Iterator[LogRecord]:
+        """Kayıt akışından geçerken okunan dosya konumunu güncelle"""
+        for record in records:
+            self.position = record[0] - self.first_line + 1
+            yield record
+
+    def on_batch(self, done: int, total: int):
+        self.batches_done = done
+        self.batches_total = total
+
+    def add_findings(self, findings: List[Dict]):
+        self.findings.extend(findings)
+        self.anomaly_count += len(findings)
+        self.critical_count += sum(1 for finding in findings if finding.get("severity") == "critical")
+
+    def percent(self) -> float:
+        read_ratio = min(self.position / self.total_lines, 1.0)
+        batch_ratio = self.batches_done / self.batches_total if self.batches_total else 0.0
+        if self.sampled:
+            ratio = 0.5 * read_ratio + 0.5 * batch_ratio
+        else:
+            ratio = read_ratio * (batch_ratio if self.batches_total else 0.0)
+        # %100 yalnızca sonuçlar kaydedildiğinde gösterilir
+        return round(min(ratio * 100, 99.0), 2)
+
+    def snapshot(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        percent = self.percent()
+        return {
+            "progress": percent,
+            "processed_lines": self.position,
+            "lines_per_second": round(self.position / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_seconds": round(elapsed * (100 - percent) / percent, 1) if percent > 0 else None,
+            "batches_done": self.batches_done,
+            "batches_total": self.batches_total,
+            "anomaly_count": self.anomaly_count,
+            "critical_count": self.critical_count,
+        }
+
+
+def save_analysis(db, log_file: LogFile, analysis_result: Dict) -> AnalysisResult:
+    """Analiz sonucunu, satır sonuçlarını ve güvenlik raporunu kaydet
+
+    Tüm yazımlar çağıranın transaction'ında yapılır, commit çağırana aittir;
+    böylece bir analiz tek bir commit ile ya tamamen ya da hiç görünür.
+    """
+    log_file.anomaly_count = analysis_result["anomaly_count"]
+
+    analysis_record = AnalysisResult(
+        log_file_id=log_file.id,
+        total_lines=analysis_result["total_lines"],
+        anomaly_count=analysis_result["anomaly_count"],
+        critical_count=analysis_result["critical_count"],
+        anomaly_rate=analysis_result["anomaly_rate"],
+        confidence_score=analysis_result.get("confidence_score", 0.0)
+    )
+    db.add(analysis_record)
+    db.flush()  # Satırlar için analysis_id gerekli
+
+    # Satır sonuçları filtrelenip sayfalanabilmesi için log_entries tablosuna yazılır
+    replace_entries(db, log_file.id, analysis_record.id, analysis_result["results"])
+
+    # Güvenlik raporunu da dosyaya kaydet
+    if "security_report" in analysis_result:
+        log_file.security_report_blob = encode_report(analysis_result["security_report"])
+        log_file.security_report_json = None
+
+    return analysis_record
+
+
+def save_incremental_analysis(db, log_file: LogFile, base: AnalysisResult, analysis_result: Dict,
+                              first_line: int) -> AnalysisResult:
+    """Yeni satırların analizini önceki analizle birleştirip kaydet
+
+    Önceki satırlar yeniden okunmaz: sayılar önceki analizin özetine eklenir,
+    log_entries'e yalnızca yeni satırlar yazılır ve güvenlik raporu önceki
+    anomaliler ile yeni sonuçlardan yeniden oluşturulur. Önceki analizde yarım
+    kalan son satır yeniden analiz edildiyse eski sonucu düşülür. Commit çağırana aittir.
+    """
+    results = analysis_result["results"]
+    dropped = drop_entries_from(db, log_file.id, first_line)
+    dropped_severities = [severity for is_anomaly, severity in dropped if is_anomaly]
+
+    previous_lines = (base.total_lines or 0) - len(dropped)
+    total_lines = previous_lines + analysis_result["total_lines"]
+    anomaly_count = (base.anomaly_count or 0) - len(dropped_severities) + analysis_result["anomaly_count"]
+    critical_count = (base.critical_count or 0) - dropped_severities.count("critical") + analysis_result["critical_count"]
+    confidence_score = round(
+        ((base.confidence_score or 0.0) * previous_lines
+         + analysis_result.get("confidence_score", 0.0) * analysis_result["total_lines"]) / total_lines, 1
+    ) if total_lines else 0.0
+
+    log_file.anomaly_count = anomaly_count
+    analysis_record = AnalysisResult(
+        log_file_id=log_file.id,
+        total_lines=total_lines,
+        anomaly_count=anomaly_count,
+        critical_count=critical_count,
+        anomaly_rate=anomaly_count / total_lines if total_lines else 0,
+        confidence_score=confidence_score,
+        base_analysis_id=base.id,
+        first_line=first_line
+    )
+    db.add(analysis_record)
+    db.flush()
+
+    insert_entries(db, log_file.id, analysis_record.id, results)
+
+    # Rapor yalnızca anomalilere bakar; önceki satırların tamamı yerine anomalileri yeterli
+    anomalies = anomaly_results(db, log_file.id, before_line=first_line)
+    anomalies.extend(result for result in results if result.get("is_anomaly"))
+    try:
+        report = anomaly_detector.generate_security_report(anomalies, total_logs=total_lines)
+        if "rate_anomalies" in analysis_result.get("security_report", {}):
+            # Hız bulguları satırlardan yeniden üretilemez; önceki rapordakilerle birleştirilir
+            previous = (load_report(db, log_file, ["rate_anomalies"]) or {}).get("rate_anomalies", [])
+            findings = previous + analysis_result["security_report"]["rate_anomalies"]
+            report["rate_anomalies"] = sorted(findings, key=lambda finding: -abs(finding["z_score"]))[:MAX_FINDINGS]
+        if "llm_usage" in analysis_result.get("security_report", {}):
+            # LLM kullanımı yalnızca bu (artımlı) analizin harcamasını gösterir
+            report["llm_usage"] = analysis_result["security_report"]["llm_usage"]
+        log_file.security_report_blob = encode_report(report)
+        log_file.security_report_json = None
+    except Exception as e:
+        logger.error(f"Artımlı güvenlik raporu oluşturulamadı: {str(e)}")
+
+    return analysis_record
+
+
+def train_from_results(results: Iterable[Dict], chunk_size: int = TRAINING_CHUNK_LINES):
+    """LLM kararlı analiz sonuçlarını parça parça yerel modelin eğitim geçmişine ekle (anomaliler hariç)"""
+    labelled = (result for result in results if result.get("verdict_source") in TRAINING_VERDICT_SOURCES)
+    for chunk in batched(labelled, chunk_size):
+        anomaly_detector.train_model([result.get("log_content", "") for result in chunk],
+                                     [1 if result.get("is_anomaly") else 0 for result in chunk])
+
+
+def resumable_offset(log_file: LogFile, size: int) -> int:
+    """Dosya son analizden sonra yalnızca büyüdüyse son analiz edilen offset, değilse 0"""
+    offset = log_file.analyzed_offset
+    if not offset or log_file.analyzed_lines is None or size < offset:
+        return 0
+    return offset if prefix_fingerprint(log_file.file_path, offset) == log_file.prefix_fingerprint else 0
+
+
+def plan_analysis_range(log_file: LogFile, incremental: bool) -> Dict:
+    """Analiz edilecek byte aralığını belirle
+
+    Artımlı modda dosya son analizden bu yana yalnızca büyümüşse (ön ek özeti
+    aynıysa) son analiz edilen offset'ten devam edilir; dosya kesilmiş, döndürülmüş
+    ya da hiç artımlı bilgisi yoksa tüm dosya analiz edilir. Son tam satırın bittiği
+    offset bir sonraki artımlı analizin başlangıcı olarak kaydedilir.
+    """
+    file_path = log_file.file_path
+    size = os.path.getsize(file_path)
+    start_offset, first_line = 0, 1
+    resume_offset = resumable_offset(log_file, size)
+
+    if incremental:
+        if not log_file.analyzed_offset or log_file.analyzed_lines is None:
+            logger.info(f"Dosya {log_file.id} için artımlı analiz bilgisi yok, tüm dosya analiz ediliyor")
+        elif not resume_offset:
+            logger.info(f"Dosya {log_file.id} son analizden sonra değişmiş (kesilmiş/döndürülmüş), tüm dosya analiz ediliyor")
+        else:
+            start_offset, first_line = resume_offset, log_file.analyzed_lines + 1
+
+    # Satır sayısı için dosya baştan sayılmaz: yüklemede yazılan offset indeksi ya da
+    # son analizin kaydettiği satır sayısı kullanılır, yalnızca sonrasındaki byte'lar sayılır
+    end_offset = last_line_end(file_path, size)
+    analyzed_lines = indexed_newline_count(file_path, end_offset) if start_offset == 0 else None
+    if analyzed_lines is None:
+        if resume_offset:
+            analyzed_lines = log_file.analyzed_lines + count_newlines(file_path, resume_offset, end_offset)
+        else:
+            analyzed_lines = count_newlines(file_path, 0, end_offset)
+    return {
+        "incremental": start_offset > 0,
+        "start_offset": start_offset,
+        "first_line": first_line,
+        "size": size,
+        "end_offset": end_offset,
+        "analyzed_lines": analyzed_lines,
+        "file_lines": analyzed_lines + (1 if end_offset < size else 0),
+        "fingerprint": prefix_fingerprint(file_path, end_offset),
+    }
+
+
+class AnalysisJobManager:
+    """Kalıcı analiz iş kuyruğu ve sabit boyutlu worker havuzu
+
+    İşler ``analysis_jobs`` tablosunda tutulur; süreç yeniden başladığında
+    bekleyen ve yarıda kalan işler yeniden kuyruğa alınır. Aynı anda en fazla
+    ``worker_count`` analiz çalışır, her çalışan iş ilerlemesini düzenli
+    aralıklarla veritabanına yazar. Çalışan işlerin anomali ve ilerleme olayları
+    abone kuyruklarına anında iletilir.
+    """
+
+    def __init__(self, worker_count: int = 1):
+        self.worker_count = max(1, worker_count)
+        self.queue: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.workers: List[asyncio.Task] = []
+        self.running: Dict[int, JobProgress] = {}
+        self.subscribers: Dict[int, List[asyncio.Queue]] = {}
+
+    async def start(self):
+        """Yarıda kalan işleri kuyruğa geri al ve worker'ları başlat"""
+        self.queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        for job_id in await asyncio.to_thread(self._recover_jobs):
+            self.queue.put_nowait(job_id)
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"Analiz iş kuyruğu başlatıldı: {self.worker_count} worker")
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def _recover_jobs(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            jobs = db.query(AnalysisJob).filter(
+                AnalysisJob.status.in_(ACTIVE_JOB_STATES)
+            ).order_by(AnalysisJob.id.asc()).all()
+            for job in jobs:
+                if job.status == JOB_RUNNING:
+                    logger.info(f"Yarıda kalan analiz işi yeniden kuyruğa alındı: {job.id}")
+                job.status = JOB_QUEUED
+                job.started_at = None
+                job.progress = 0.0
+                job.processed_lines = 0
+                job.eta_seconds = None
+            db.commit()
+            return [job.id for job in jobs]
+        finally:
+            db.close()
+
+    def enqueue(self, db, log_file: LogFile, analysis_type: str, incremental: bool = False) -> Tuple[AnalysisJob, bool]:
+        """Dosya için analiz işi oluştur; (iş, yeni mi) döndür
+
+        Dosyanın bekleyen ya da çalışan bir işi varsa yeni iş açılmaz, o iş döndürülür;
+        türü ya da artımlı ayarı istenenden farklı olabilir, karar çağırana aittir.
+        """
+        existing = db.query(AnalysisJob).filter(
+            AnalysisJob.log_file_id == log_file.id,
+            AnalysisJob.status.in_(ACTIVE_JOB_STATES)
+        ).first()
+        if existing:
+            return existing, False
+
+        job = AnalysisJob(
+            log_file_id=log_file.id,
+            analysis_type=analysis_type,
+            incremental=incremental,
+            status=JOB_QUEUED,
+            total_lines=log_file.total_lines or 0,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        # Dizin izleme servisi iş açmayı thread'den yapar; kuyruk event loop'a aittir
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, job.id)
+        return job, True
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: analiz işi {job_id} beklenmeyen hata: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def _save_progress(self, job_id: int, snapshot: Dict):
+        db = SessionLocal()
+        try:
+            # İş bu arada tamamlandıysa geç kalan ilerleme yazımı sonucu ezmesin
+            db.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == JOB_RUNNING
+            ).update(snapshot, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _flush_progress(self, job_id: int, progress: JobProgress):
+        while True:
+            await asyncio.sleep(PROGRESS_FLUSH_INTERVAL)
+            await asyncio.to_thread(self._save_progress, job_id, progress.snapshot())
+
+    def publish(self, job_id: int, event: str, data: Dict):
+        for queue in self.subscribers.get(job_id, []):
+            queue.put_nowait((event, data))
+
+    def _read_status(self, job_id: int) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            return self.job_status(db, job) if job else None
+        finally:
+            db.close()
+
+    async def stream_events(self, job_id: int):
+        """İşin olaylarını SSE olarak üret: önce anlık durum, ardından canlı olaylar
+
+        Çalışan bir işe sonradan bağlanan izleyici, ilk olayda o ana kadar bulunan
+        anomalilerin en son ``STREAM_SNAPSHOT_FINDINGS`` tanesini alır; kalanların sayısı
+        ``anomalies_omitted``'tır ve iş bitince sonuç uç noktasından sayfalanır. Akış iş tamamlanınca ya da başarısız olunca kapanır.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        # Durum okunmadan önce abone olunur, arada yayınlanan olaylar kaçmaz
+        self.subscribers.setdefault(job_id, []).append(queue)
+        try:
+            status = await asyncio.to_thread(self._read_status, job_id)
+            if status is None:
+                return
+            if status["state"] in (JOB_COMPLETED, JOB_FAILED):
+                yield format_sse(status["state"], status)
+                return
+
+            progress = self.running.get(job_id)
+            anomalies = list(progress.findings) if progress else []
+            yield format_sse("snapshot", dict(
+                status, anomalies=anomalies,
+                anomalies_omitted=progress.anomaly_count - len(anomalies) if progress else 0
+            ))
+
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Başka bir süreçte biten işler için durumu veritabanından kontrol et
+                    status = await asyncio.to_thread(self._read_status, job_id)
+                    if status is None:
+                        return
+                    if status["state"] in (JOB_COMPLETED, JOB_FAILED):
+                        yield format_sse(status["state"], status)
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield format_sse(event, data)
+                if event in (JOB_COMPLETED, JOB_FAILED):
+                    return
+        finally:
+            queues = self.subscribers.get(job_id, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self.subscribers.pop(job_id, None)
+
+    def _complete_job(self, db, job: AnalysisJob, log_file: LogFile, analysis_result: Optional[Dict], snapshot: Dict,
+                      plan: Dict, base: Optional[AnalysisResult]):
+        """Analiz sonucunu ve iş durumunu tek commit ile kaydet
+
+        Artımlı analizde yeni satır yoksa (``analysis_result`` None) önceki analiz geçerli kalır.
+        """
+        if analysis_result is None:
+            analysis_record = base
+        elif base is not None:
+            analysis_record = save_incremental_analysis(db, log_file, base, analysis_result, plan["first_line"])
+        else:
+            analysis_record = save_analysis(db, log_file, analysis_result)
+
+        log_file.file_size = plan["size"]
+        log_file.total_lines = plan["file_lines"]
+        log_file.analyzed_offset = plan["end_offset"]
+        log_file.analyzed_lines = plan["analyzed_lines"]
+        log_file.prefix_fingerprint = plan["fingerprint"]
+        job.status = JOB_COMPLETED
+        job.progress = 100.0
+        job.processed_lines = snapshot["processed_lines"]
+        job.lines_per_second = snapshot["lines_per_second"]
+        job.eta_seconds = 0.0
+        job.analysis_id = analysis_record.id
+        job.finished_at = datetime.utcnow()
+        log_file.status = "completed"
+        db.commit()
+
+    async def run_job(self, job_id: int):
+        """Tek bir analiz işini çalıştır ve sonucunu kaydet"""
+        db = SessionLocal()
+        flusher = None
+        spool = None
+        try:
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if job is None or job.status != JOB_QUEUED:
+                return
+            log_file = db.query(LogFile).filter(LogFile.id == job.log_file_id).first()
+            if log_file is None or not os.path.exists(log_file.file_path):
+                raise RuntimeError("Dosya bulunamadı")
+
+            plan = await asyncio.to_thread(plan_analysis_range, log_file, bool(job.incremental))
+            base = None
+            if plan["incremental"]:
+                base = db.query(AnalysisResult).filter(
+                    AnalysisResult.log_file_id == log_file.id
+                ).order_by(AnalysisResult.analysis_date.desc(), AnalysisResult.id.desc()).first()
+                if base is None:
+                    plan = await asyncio.to_thread(plan_analysis_range, log_file, False)
+
+            job.status = JOB_RUNNING
+            job.started_at = datetime.utcnow()
+            job.total_lines = plan["file_lines"] - plan["first_line"] + 1
+            log_file.status = "processing"
+            db.commit()
+
+            statistical = job.analysis_type == STATISTICAL_ANALYSIS
+            two_phase = statistical or anomaly_detector.sampling_plan(job.analysis_type) is not None
+            progress = JobProgress(job.total_lines, two_phase, first_line=plan["first_line"])
+            self.running[job_id] = progress
+            flusher = asyncio.create_task(self._flush_progress(job_id, progress))
+            self.publish(job_id, JOB_RUNNING, self.job_status(db, job))
+
+            def on_batch(done: int, total: int):
+                progress.on_batch(done, total)
+                self.publish(job_id, "progress", progress.snapshot())
+
+            def on_findings(findings: List[Dict]):
+                progress.add_findings(findings)
+                self.publish(job_id, "anomalies", dict(progress.snapshot(), anomalies=findings))
+
+            # Biçim dosyanın başından tespit edilir; artımlı analizde CSV başlığı da oradan gelir
+            log_parser = await asyncio.to_thread(LogParser.for_file, log_file.file_path)
+            def read_records():
+                return read_log_range(log_file.file_path, plan["start_offset"], plan["size"], plan["first_line"])
+            records = progress.track(read_records())
+            if search_index.available and bool(log_file.search_indexed) == (base is not None):
+                # Arama indeksi analizin ilk okumasıyla aynı geçişte güncellenir: artımlı analizde
+                # yalnızca yeni satırlar, indekslenmemiş (ör. izlenen dizinden gelen) dosyada tamamı
+                records = search_index.writer(log_file.id, plan["first_line"]).tee(records)
+
+            if statistical:
+                report_from_line = None
+                if plan["incremental"]:
+                    # Taban çizgisi sıfırdan başlamasın: yeni satırlardan hemen önceki satırlar da okunur,
+                    # yalnızca sayımlara katılır
+                    history_offset, history_count = await asyncio.to_thread(
+                        lines_before, log_file.file_path, plan["start_offset"], statistical_detector.history_lines
+                    )
+                    history = read_log_range(log_file.file_path, history_offset, plan["start_offset"],
+                                             plan["first_line"] - history_count)
+                    records, report_from_line = chain(history, records), plan["first_line"]
+                # İkinci geçiş yalnızca işaretli satırları okur; ilerleme birinci geçişten izlenir
+                analysis_result = await anomaly_detector.predict_statistical(
+                    records,
+                    read_records,
+                    progress_callback=on_batch,
+                    findings_callback=on_findings,
+                    log_parser=log_parser,
+                    report_from_line=report_from_line
+                )
+            else:
+                # Satır sonuçları bellekte toplanmaz, pencere pencere geçici dosyaya yazılır
+                spool = ResultSpool()
+                analysis_result = await anomaly_detector.predict_stream(
+                    records,
+                    analysis_type=job.analysis_type,
+                    progress_callback=on_batch,
+                    findings_callback=on_findings,
+                    log_parser=log_parser,
+                    results_callback=spool.extend
+                )
+                if analysis_result["status"] == "success":
+                    analysis_result["results"] = spool
+            flusher.cancel()
+
+            if base is not None and progress.position == 0:
+                # Son analizden sonra eklenen (boş olmayan) satır yok
+                logger.info(f"Analiz işi {job_id}: dosyada yeni satır yok, önceki analiz geçerli")
+                analysis_result = None
+            elif analysis_result["status"] != "success":
+                raise RuntimeError(f"Analiz başarısız: {analysis_result.get('message', 'Bilinmeyen hata')}")
+
+            # Büyük toplu yazım event loop'u bloklamasın diye thread'de, tek transaction'da yapılır
+            await asyncio.to_thread(self._complete_job, db, job, log_file, analysis_result, progress.snapshot(), plan, base)
+            if search_index.available and base is not None and not log_file.search_indexed:
+                # Arama indeksinden önce eklenmiş dosyanın artımlı analizi: önceki satırlar hiç okunmadığından tamamı indekslenir
+                await asyncio.to_thread(search_index.index_file_safely, log_file.id, log_file.file_path)
+            logger.info(f"Analiz işi {job_id} tamamlandı: {log_file.anomaly_count} anomali"
+                        + (f" (artımlı, {plan['first_line']}. satırdan itibaren)" if base is not None else ""))
+            self.publish(job_id, JOB_COMPLETED, self.job_status(db, job))
+
+            if analysis_result is not None and not statistical:
+                # LLM kararı alan satırlar yerel modelin eğitim geçmişine eklenir (anomaliler hariç)
+                await asyncio.to_thread(train_from_results, analysis_result["results"])
+
+        except asyncio.CancelledError:
+            # Kapanışta yarıda kalan iş, bir sonraki başlangıçta yeniden kuyruğa alınır
+            raise
+        except Exception as e:
+            logger.error(f"Analiz işi {job_id} başarısız: {str(e)}")
+            db.rollback()
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update({
+                AnalysisJob.status: JOB_FAILED,
+                AnalysisJob.error_message: str(e),
+                AnalysisJob.finished_at: datetime.utcnow(),
+                AnalysisJob.eta_seconds: None,
+            }, synchronize_session=False)
+            job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            if job is not None:
+                db.query(LogFile).filter(LogFile.id == job.log_file_id).update(
+                    {LogFile.status: "error"}, synchronize_session=False
+                )
+            db.commit()
+            if job is not None:
+                db.refresh(job)
+                self.publish(job_id, JOB_FAILED, self.job_status(db, job))
+        finally:
+            if flusher is not None:
+                flusher.cancel()
+            if spool is not None:
+                spool.close()
+            self.running.pop(job_id, None)
+            db.close()
+
+    def job_status(self, db, job: AnalysisJob) -> Dict:
+        """İş durumunu API yanıtı olarak döndür"""
+        status = {
+            "job_id": job.id,
+            "file_id": job.log_file_id,
+            "analysis_type": job.analysis_type,
+            "incremental": bool(job.incremental),
+            "state": job.status,
+            "progress": job.progress or 0.0,
+            "processed_lines": job.processed_lines or 0,
+            "total_lines": job.total_lines or 0,
+            "lines_per_second": job.lines_per_second or 0.0,
+            "eta_seconds": job.eta_seconds,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "analysis_id": job.analysis_id,
+            "error": job.error_message,
+        }
+
+        # Bu süreçte çalışan işler için veritabanına henüz yazılmamış güncel ilerleme
+        if job.status == JOB_RUNNING and job.id in self.running:
+            status.update(self.running[job.id].snapshot())
+
+        if job.status == JOB_COMPLETED and job.analysis_id:
+            analysis = db.query(AnalysisResult).filter(AnalysisResult.id == job.analysis_id).first()
+            if analysis:
+                status["summary"] = {
+                    "total_lines": analysis.total_lines,
+                    "anomaly_count": analysis.anomaly_count,
+                    "critical_count": analysis.critical_count,
+                    "anomaly_rate": round(analysis.anomaly_rate * 100, 2) if analysis.anomaly_rate is not None and not math.isnan(analysis.anomaly_rate) else None,
+                    "confidence_score": analysis.confidence_score or 0.0,
+                    "first_line": analysis.first_line or 1,
+                    "base_analysis_id": analysis.base_analysis_id,
+                }
+        return status
+
+
+job_manager = AnalysisJobManager(worker_count=int(os.getenv("ANALYSIS_WORKERS", "1")))
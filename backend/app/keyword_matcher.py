@@ -0,0 +1,50 @@
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+import ahocorasick
+
+
+class KeywordMatcher:
+    """Bir kez derlenen, tek geçişte tüm anahtar kelime gruplarını bulan eşleştirici
+
+    Gruplar ``{grup_adı: [anahtar kelimeler]}`` şeklinde verilir. Tüm anahtar
+    kelimeler tek bir Aho-Corasick otomatına derlenir; metin üzerinde tek
+    geçişte (örtüşenler dahil) tüm eşleşmeler bulunur ve eşleşen anahtar
+    kelimelerin grupları döndürülür. Eşleşme büyük/küçük harfe duyarsızdır.
+    Aynı metin birden fazla fonksiyonda tarandığı için sonuçlar LRU önbellekte
+    tutulur.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]], cache_size: int = 65536):
+        keyword_groups: Dict[str, Set[str]] = {}
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword.lower(), set()).add(group)
+
+        self._automaton = ahocorasick.Automaton()
+        for keyword, keyword_group_set in keyword_groups.items():
+            self._automaton.add_word(keyword, frozenset(keyword_group_set))
+        self._automaton.make_automaton()
+        self._scan_cached = lru_cache(maxsize=cache_size)(self.scan)
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Tek bir metni önbelleğe almadan tara (yalnızca bir kez taranan satırlar için)"""
+        found: Set[str] = set()
+        for _, keyword_groups in self._automaton.iter(text.lower()):
+            found |= keyword_groups
+        return frozenset(found)
+
+    def match(self, *texts: Optional[str]) -> Set[str]:
+        """Metinlerde geçen anahtar kelimelerin grup adlarını döndür"""
+        found: Set[str] = set()
+        for text in texts:
+            if text:
+                found |= self._scan_cached(text)
+        return found
+
+    def first_group(self, hits: Set[str], candidates: Iterable[str]) -> Optional[str]:
+        """Verilen sıradaki ilk eşleşen grubu döndür"""
+        for group in candidates:
+            if group in hits:
+                return group
+        return None
@@ -0,0 +1,286 @@
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import IsolationForest
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from .log_parser import LEVEL_ALIASES
+from .statistical_detector import template_keys
+from .template_miner import mask_variables
+
+logger = logging.getLogger(__name__)
+
+# Özellik çıkarımı değişirse artırılır; farklı sürümle kaydedilmiş modeller yüklenmez
+FEATURE_VERSION = 1
+MODEL_PREFIX = "local_model"
+MANIFEST_NAME = f"{MODEL_PREFIX}.json"
+# Kelime 1-2 gram sıklık tablosunun boyutu (hash'lenmiş; çakışma olasılığı düşük tutulur)
+HASH_FEATURES = 2 ** 18
+# Modelin eğitildiği, anahtarlardan örneklenen satır sayısı
+TRAINING_ROWS = 4096
+# Anahtar başına hesaplanmış skorların önbelleği (model yeniden eğitilince temizlenir)
+SCORE_CACHE_SIZE = 100000
+
+LEVEL_PATTERN = re.compile(r"\b(trace|debug|info|notice|warn|warning|err|error|crit|critical|fatal|alert|emerg)\b",
+                           re.IGNORECASE)
+LEVEL_RANKS = {"DEBUG": 0, "INFO": 1, "WARNING": 2, "ERROR": 3, "CRITICAL": 4}
+
+
+def level_rank(text: str) -> int:
+    match = LEVEL_PATTERN.search(text)
+    return LEVEL_RANKS[LEVEL_ALIASES[match.group(1).lower()]] if match else LEVEL_RANKS["INFO"]
+
+
+class LocalAnomalyModel:
+    """Ollama gerektirmeyen, geçmiş loglarla artımlı eğitilen Isolation Forest modeli
+
+    Özellikler satır başına değil şablon anahtarı (rakamları maskelenmiş satır başı)
+    başına çıkarılır: maskelenmiş anahtarın hash'lenmiş kelime 1-2 gramlarının geçmişteki
+    sıklıkları, seviye ve token sayısı. Eğitim geçmişi anahtar -> sayım olarak
+    sınırlı boyutta tutulur; yeni anahtarların oranı
+    ``refit_ratio``'yu aşınca model geçmişin tamamıyla yeniden kurulur ve
+    ``model_dir`` altına sürüm numarasıyla kaydedilir. Skorlama toplu ve
+    vektörel yapılır; aynı anahtar için skor önbellekten gelir.
+    """
+
+    def __init__(self, model_dir: str, n_estimators: int = 100, max_history: int = 20000, refit_ratio: float = 0.1,
+                 keep_versions: int = 5, contamination: float = 0.01, enabled: bool = True):
+        self.model_dir = model_dir
+        self.n_estimators = max(10, n_estimators)
+        self.max_history = max(100, max_history)
+        self.refit_ratio = refit_ratio
+        self.keep_versions = max(1, keep_versions)
+        self.contamination = min(max(contamination, 0.0001), 0.5)
+        self.enabled = enabled
+        self.vectorizer = HashingVectorizer(n_features=HASH_FEATURES, ngram_range=(1, 2), alternate_sign=False,
+                                            binary=True, norm=None, token_pattern=r"<\w+>|\b\w\w+\b")
+        self.ngram_counts = np.zeros(HASH_FEATURES, dtype=np.float64)
+        self.estimator: Optional[IsolationForest] = None
+        self.version = 0
+        self.trained_at: Optional[str] = None
+        self.history: Dict[str, int] = {}  # anahtar -> sayım
+        self.fitted_keys = 0
+        self.pending_keys = 0  # son eğitimden sonra geçmişe giren yeni anahtarlar
+        self.labeled_samples = 0  # etiketle (LLM kararıyla) geçmişe alınan satırlar
+        self.score_cache: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def trained(self) -> bool:
+        return self.estimator is not None
+
+    def ngrams(self, texts: List[str]) -> sparse.csr_matrix:
+        """Maskelenmiş metinlerin hash'lenmiş, ikili kelime 1-2 gram matrisi"""
+        return self.vectorizer.transform([mask_variables(text) for text in texts])
+
+    def features(self, keys: List[str]) -> np.ndarray:
+        """Şablon anahtarı başına yoğun özellikler
+
+        Geçmişteki n-gram sıklıklarına göre görülmemiş n-gram oranı, ortalama ve en
+        düşük log sıklık; seviye ve token sayısı.
+        """
+        matrix = self.ngrams(keys)
+        sizes = np.diff(matrix.indptr)
+        rows = np.repeat(np.arange(len(keys)), sizes)
+        frequencies = np.log1p(self.ngram_counts[matrix.indices])
+        present = np.maximum(sizes, 1)
+        unseen = np.bincount(rows, weights=frequencies == 0, minlength=len(keys)) / present
+        mean = np.bincount(rows, weights=frequencies, minlength=len(keys)) / present
+        lowest = np.zeros(len(keys))
+        if len(frequencies):
+            starts = matrix.indptr[:-1][sizes > 0]
+            lowest[sizes > 0] = np.minimum.reduceat(frequencies, starts)
+        return np.column_stack([
+            unseen,
+            mean,
+            lowest,
+            [level_rank(key) for key in keys],
+            np.minimum(sizes, 200) / 10,
+        ])
+
+    def learn(self, lines: List[str], labels: Optional[List[int]] = None) -> Dict:
+        """Satırları eğitim geçmişine ekle; yeterince yeni şablon geldiyse modeli yeniden eğit
+
+        ``labels`` verilirse 1 (anomali) etiketli satırlar geçmişe alınmaz.
+        """
+        if labels is not None:
+            lines = [line for line, label in zip(lines, labels) if not label]
+        if not lines:
+            return {"refit": False, "version": self.version, "training_samples": 0}
+        if labels is not None:
+            self.labeled_samples += len(lines)
+
+        codes, uniques = pd.factorize(template_keys(lines))
+        counts = np.bincount(codes)
+        with self.lock:
+            for index, key in enumerate(uniques):
+                key = str(key)
+                if key not in self.history:
+                    self.pending_keys += 1
+                self.history[key] = self.history.get(key, 0) + int(counts[index])
+            if len(self.history) > self.max_history:
+                # Bellek sınırı: en seyrek görülen anahtarlar geçmişten düşer
+                kept = sorted(self.history.items(), key=lambda item: -item[1])[:self.max_history]
+                self.history = dict(kept)
+            refit = self.estimator is None or self.pending_keys > self.refit_ratio * max(self.fitted_keys, 1)
+        if refit:
+            self.fit()
+        return {"refit": refit, "version": self.version, "training_samples": len(lines)}
+
+    def fit(self):
+        """Modeli eğitim geçmişinin tamamıyla yeniden kur"""
+        with self.lock:
+            keys = list(self.history)
+            counts = np.array([self.history[key] for key in keys], dtype=np.float64)
+            # N-gram sıklıkları geçmişteki anahtar sayımlarıyla ağırlıklandırılır
+            self.ngram_counts = np.asarray(self.ngrams(keys).T @ counts).ravel()
+            matrix = self.features(keys)
+        # Eğitim satırları anahtarlardan görülme sayısı oranında örneklenir (satır dağılımı korunur)
+        rows = np.random.default_rng(0).choice(len(keys), size=TRAINING_ROWS, p=counts / counts.sum())
+        estimator = IsolationForest(n_estimators=self.n_estimators, contamination=self.contamination, random_state=0)
+        estimator.fit(matrix[rows])
+        with self.lock:
+            self.estimator = estimator
+            self.fitted_keys = len(keys)
+            self.pending_keys = 0
+            self.version += 1
+            self.trained_at = datetime.utcnow().isoformat()
+            self.score_cache.clear()
+        logger.info(f"Yerel anomali modeli eğitildi: sürüm {self.version}, {len(keys)} şablon anahtarı")
+
+    def score(self, lines: List[str]) -> Optional[np.ndarray]:
+        """Satır başına anomali skoru (0-1, yüksek = anormal); model yoksa None"""
+        estimator = self.estimator
+        if estimator is None or not lines:
+            return None if estimator is None else np.zeros(0)
+        codes, uniques = pd.factorize(template_keys(lines))
+        uniques = [str(key) for key in uniques]
+
+        scores = np.empty(len(uniques), dtype=np.float64)
+        missing = []
+        for index, key in enumerate(uniques):
+            cached = self.score_cache.get(key)
+            if cached is None:
+                missing.append(index)
+            else:
+                scores[index] = cached
+        if missing:
+            with self.lock:
+                matrix = self.features([uniques[index] for index in missing])
+            computed = -estimator.score_samples(matrix)
+            scores[missing] = computed
+            if estimator is self.estimator:
+                for index, value in zip(missing, computed):
+                    self.score_cache[uniques[index]] = float(value)
+                while len(self.score_cache) > SCORE_CACHE_SIZE:
+                    self.score_cache.popitem(last=False)
+        return scores[codes]
+
+    def threshold(self) -> float:
+        """Bu skorun üstündekiler modelce anormal sayılır (eğitim satırlarının ``contamination`` kadarı)"""
+        return -self.estimator.offset_ if self.estimator is not None else 1.0
+
+    def save(self) -> bool:
+        """Modeli sürüm numaralı dosyaya kaydet ve manifest'i güncelle; eski sürümler silinir"""
+        if self.estimator is None:
+            return False
+        os.makedirs(self.model_dir, exist_ok=True)
+        filename = f"{MODEL_PREFIX}_v{self.version:05d}.joblib"
+        with self.lock:
+            state = {
+                "feature_version": FEATURE_VERSION,
+                "version": self.version,
+                "trained_at": self.trained_at,
+                "estimator": self.estimator,
+                "history": dict(self.history),
+                "ngram_counts": self.ngram_counts,
+                "fitted_keys": self.fitted_keys,
+                "labeled_samples": self.labeled_samples,
+            }
+        path = os.path.join(self.model_dir, filename)
+        joblib.dump(state, path + ".tmp", compress=3)
+        os.replace(path + ".tmp", path)
+
+        manifest = {"current": filename, "version": self.version, "trained_at": self.trained_at,
+                    "feature_version": FEATURE_VERSION, "training_keys": self.fitted_keys}
+        manifest_path = os.path.join(self.model_dir, MANIFEST_NAME)
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        for old in self.versions()[:-self.keep_versions]:
+            os.remove(os.path.join(self.model_dir, old))
+        return True
+
+    def versions(self) -> List[str]:
+        return sorted(os.path.basename(path) for path in glob.glob(os.path.join(self.model_dir, f"{MODEL_PREFIX}_v*.joblib")))
+
+    def load(self) -> bool:
+        """Manifest'teki (yoksa en yeni) sürümü yükle; uyumsuz ya da bozuk dosyada False döner"""
+        manifest_path = os.path.join(self.model_dir, MANIFEST_NAME)
+        try:
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    filename = json.load(f)["current"]
+            else:
+                versions = self.versions()
+                if not versions:
+                    return False
+                filename = versions[-1]
+            state = joblib.load(os.path.join(self.model_dir, filename))
+        except Exception as e:
+            logger.warning(f"Yerel anomali modeli yüklenemedi: {str(e)}")
+            return False
+        if state.get("feature_version") != FEATURE_VERSION:
+            logger.warning(f"Yerel model {filename} farklı özellik sürümüyle kaydedilmiş, yeniden eğitilecek")
+            return False
+        with self.lock:
+            self.estimator = state["estimator"]
+            self.version = state["version"]
+            self.trained_at = state["trained_at"]
+            self.history = state["history"]
+            self.ngram_counts = state["ngram_counts"]
+            self.fitted_keys = state["fitted_keys"]
+            # Eski sürümler etiketsiz satırlarla eğitilmiş olabilir; sayı yoksa sıfırdan başlanır
+            self.labeled_samples = state.get("labeled_samples", 0)
+            self.pending_keys = 0
+            self.score_cache.clear()
+        logger.info(f"Yerel anomali modeli yüklendi: sürüm {self.version} ({filename})")
+        return True
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "trained": self.trained,
+            "version": self.version,
+            "trained_at": self.trained_at,
+            "training_keys": self.fitted_keys,
+            "history_keys": len(self.history),
+            "pending_keys": self.pending_keys,
+            "labeled_samples": self.labeled_samples,
+            "threshold": round(self.threshold(), 4) if self.trained else None,
+            "model_dir": self.model_dir,
+            "saved_versions": self.versions() if os.path.isdir(self.model_dir) else [],
+        }
+
+
+local_model = LocalAnomalyModel(
+    model_dir=os.getenv("LOCAL_MODEL_DIR", os.path.join(os.getcwd(), "models")),
+    n_estimators=int(os.getenv("LOCAL_MODEL_ESTIMATORS", "100")),
+    max_history=int(os.getenv("LOCAL_MODEL_MAX_HISTORY", "20000")),
+    refit_ratio=float(os.getenv("LOCAL_MODEL_REFIT_RATIO", "0.1")),
+    keep_versions=int(os.getenv("LOCAL_MODEL_KEEP_VERSIONS", "5")),
+    contamination=float(os.getenv("LOCAL_MODEL_CONTAMINATION", "0.01")),
+    enabled=os.getenv("LOCAL_MODEL_ENABLED", "true").lower() in ("1", "true", "yes"),
+)
@@ -0,0 +1,336 @@
+import csv
+import logging
+import os
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from .pipeline import LogRecord, read_log_lines
+from .timestamp_parser import TimestampParser
+
+logger = logging.getLogger(__name__)
+
+# Biçim tespiti için dosyanın başından okunan satır sayısı
+DETECTION_SAMPLE_SIZE = 200
+# Bir biçimin seçilmesi için örnekte eşleşmesi gereken satır oranı
+DETECTION_MIN_RATIO = 0.6
+# Kapanmayan tırnak bütün dosyayı tek satıra çevirmesin diye CSV satırı başına en fazla fiziksel satır
+MAX_CSV_ROW_LINES = 200
+# Satır başına tutulacak en fazla key=value alanı (nadir anahtarlar kolon patlamasına yol açmasın)
+MAX_KV_FIELDS = 32
+
+CORE_COLUMNS = ("timestamp", "log_level", "host", "program", "message")
+
+ISO_TIMESTAMP = r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+SYSLOG_TIMESTAMP = r"[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}"
+# Zaman damgası satır başında olan biçimler; bunlarda damga tam ayrıştırma yapılmadan okunabilir
+LEADING_TIMESTAMP_FORMATS = ("sshd", "syslog", "kv", "timestamped", "plain")
+LEADING_TIMESTAMP = rf"^({SYSLOG_TIMESTAMP}|{ISO_TIMESTAMP})"
+LEVEL_TOKENS = (r"TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|ERR|CRITICAL|CRIT|FATAL|ALERT|EMERG|SEVERE|"
+                r"trace|debug|info|notice|warn|warning|error|err|critical|crit|fatal|alert|emerg")
+
+# Satır tabanlı biçimler; her satır önce dosyanın biçimiyle, eşleşmezse sırayla diğerleriyle denenir
+LINE_FORMATS: Dict[str, re.Pattern] = {
+    "sshd": re.compile(
+        rf"^(?P<timestamp>{SYSLOG_TIMESTAMP}|{ISO_TIMESTAMP}) (?:(?P<host>\S+) )?(?P<program>sshd)\[(?P<pid>\d+)\]: "
+        r"(?P<message>.*)$"
+    ),
+    "syslog": re.compile(
+        rf"^(?P<timestamp>{SYSLOG_TIMESTAMP}|{ISO_TIMESTAMP}) (?P<host>[^\s:]+) (?P<program>[^\s:\[]+)"
+        rf"(?:\[(?P<pid>\d+)\])?: (?:(?P<log_level>{LEVEL_TOKENS}): )?(?P<message>.*)$"
+    ),
+    "access": re.compile(
+        r'^(?P<src_ip>[\da-fA-F.:]+) \S+ (?P<user>\S+) \[(?P<timestamp>[^\]]+)\] '
+        r'"(?P<method>[A-Z]+) (?P<path>\S+)(?: (?P<protocol>[^"]*))?" (?P<status>\d{3})(?:\.0)? (?P<bytes>\d+|-) ?'
+        r'(?P<message>.*)$'
+    ),
+    "kv": re.compile(
+        rf"^(?P<timestamp>{ISO_TIMESTAMP})\s+(?:\[?(?P<log_level>{LEVEL_TOKENS})\]?:?\s+)?(?P<message>.*=.*)$"
+    ),
+    "timestamped": re.compile(
+        rf"^(?P<timestamp>{ISO_TIMESTAMP})\s+(?:\[?(?P<log_level>{LEVEL_TOKENS})\]?:?\s+)?(?P<message>.*)$"
+    ),
+}
+
+KV_PATTERN = r'(?<![\w.-])(?P<key>[A-Za-z_][\w.-]*)=(?P<value>"[^"]*"|[^\s;,"]+)'
+SSHD_AUTH_PATTERN = (r"(?P<auth_result>Accepted|Failed) (?P<auth_method>\S+) for (?:invalid user )?(?P<user>\S+) "
+                     r"from (?P<src_ip>\S+) port (?P<src_port>\d+)")
+
+# Farklı kaynaklardaki seviye adlarının ortak karşılıkları
+LEVEL_ALIASES = {
+    "trace": "DEBUG", "debug": "DEBUG",
+    "info": "INFO", "information": "INFO", "informational": "INFO", "notice": "INFO", "successaudit": "INFO",
+    "warn": "WARNING", "warning": "WARNING", "failureaudit": "WARNING",
+    "err": "ERROR", "error": "ERROR", "severe": "ERROR",
+    "crit": "CRITICAL", "critical": "CRITICAL", "fatal": "CRITICAL", "alert": "CRITICAL",
+    "emerg": "CRITICAL", "emergency": "CRITICAL", "panic": "CRITICAL",
+}
+
+# CSV kolon adlarının (küçük harf, yalnızca harf/rakam) çekirdek alanlara eşlemesi
+CSV_COLUMN_ROLES = {
+    "timestamp": ("timegenerated", "timestamp", "time", "datetime", "date", "eventtime", "timecreated", "ts"),
+    "log_level": ("entrytype", "level", "loglevel", "levelname", "leveldisplayname", "severity"),
+    "message": ("message", "msg", "text", "description", "log", "event"),
+    "host": ("machinename", "host", "hostname", "computer", "computername"),
+    "program": ("source", "program", "app", "application", "providername", "process"),
+}
+
+
+def normalize_levels(levels: pd.Series) -> pd.Series:
+    """Seviye adlarını DEBUG/INFO/WARNING/ERROR/CRITICAL'a çevir; tanınmayanlar boş kalır"""
+    return levels.str.strip().str.lower().map(LEVEL_ALIASES)
+
+
+def coerce_field(values: pd.Series) -> pd.Series:
+    """Alan kolonunu mümkünse sayısal ya da mantıksal tipe çevir"""
+    present = values.dropna()
+    if present.empty:
+        return values
+    lowered = present.str.lower()
+    if lowered.isin(("true", "false")).all():
+        return values.str.lower().map({"true": True, "false": False})
+    numbers = pd.to_numeric(present, errors="coerce")
+    if numbers.notna().all():
+        numbers = pd.to_numeric(values, errors="coerce")
+        if (numbers.dropna() % 1 == 0).all():
+            return numbers.astype("Int64")
+        return numbers
+    return values
+
+
+def csv_column_roles(columns: List[str]) -> Dict[str, int]:
+    """CSV başlığındaki kolonları çekirdek alanlara eşle: alan -> kolon indeksi"""
+    normalized = [re.sub(r"[^a-z0-9]", "", column.lower()) for column in columns]
+    roles = {}
+    for role, names in CSV_COLUMN_ROLES.items():
+        for name in names:
+            if name in normalized and normalized.index(name) not in roles.values():
+                roles[role] = normalized.index(name)
+                break
+    return roles
+
+
+def sniff_csv_header(lines: List[str]) -> Optional[List[str]]:
+    """Örnek satırlar tutarlı bir virgüllü tablo gibiyse başlık kolonlarını döndür"""
+    if len(lines) < 2 or lines[0].count(",") < 2:
+        return None
+    header = next(csv.reader([lines[0]]))
+    rows = list(csv.reader(text for _, text in merge_csv_rows(enumerate(lines[1:], 2))))
+    matching = sum(1 for row in rows if len(row) == len(header))
+    if rows and matching / len(rows) >= DETECTION_MIN_RATIO and csv_column_roles(header):
+        return header
+    return None
+
+
+def merge_csv_rows(records: Iterable[LogRecord]) -> Iterator[LogRecord]:
+    """Tırnak içinde satır sonu içeren CSV kayıtlarını tek kayda birleştir
+
+    Kayıt, başladığı fiziksel satırın numarasını taşır; parçalar boşlukla birleşir
+    (LLM'e satır başına bir kayıt gider).
+    """
+    first_line = None
+    parts: List[str] = []
+    quotes = 0
+    for line_number, text in records:
+        if first_line is None:
+            first_line = line_number
+        parts.append(text)
+        quotes += text.count('"')
+        if quotes % 2 == 0 or len(parts) >= MAX_CSV_ROW_LINES:
+            yield first_line, " ".join(parts)
+            first_line, parts, quotes = None, [], 0
+    if parts:
+        yield first_line, " ".join(parts)
+
+
+class LogParser:
+    """Dosya biçimini bir kez tespit edip kayıtları kolonlu yapıya çeviren ayrıştırıcı
+
+    Desteklenen biçimler: CSV (başlığa göre kolon eşleme), syslog (RFC 3164 ve ISO
+    zaman damgalı), sshd, HTTP erişim logu ve key=value satırları; hiçbiri tutmazsa
+    satırlar düz metin kabul edilir. Ayrıştırma pencere başına pandas kolon
+    işlemleriyle yapılır ve her kayıt için zaman damgası, normalize seviye, host,
+    program, mesaj ve tiplenmiş alanlar (``bytes`` sayı, ``malicious`` bool gibi) üretir.
+    """
+
+    def __init__(self, log_format: str = "plain", csv_columns: Optional[List[str]] = None,
+                 timestamps: Optional[TimestampParser] = None):
+        self.format = log_format
+        self.timestamps = timestamps or TimestampParser()
+        self.csv_columns = csv_columns
+        self.csv_roles = csv_column_roles(csv_columns) if csv_columns else {}
+        # Dosyanın biçimi önce, diğer satır biçimleri yedek olarak denenir; key=value dosyalarında
+        # satır başı yine syslog/sshd olabileceğinden önce onlar denenir, alanlar her durumda çıkarılır
+        self.line_formats = sorted(LINE_FORMATS, key=lambda name: name != log_format or name == "kv")
+
+    @classmethod
+    def detect(cls, lines: List[str], filename: Optional[str] = None,
+               reference: Optional[datetime] = None) -> "LogParser":
+        """Örnek satırlardan log biçimini ve zaman damgası biçimini tespit et"""
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return cls()
+        header = sniff_csv_header(lines)
+        if header is None and filename and filename.lower().endswith(".csv"):
+            header = next(csv.reader([lines[0]]))
+        parser = cls("csv", header) if header is not None else cls(cls.detect_line_format(lines))
+        sample = [text for _, text in parser.records(enumerate(lines, 1))]
+        if sample:
+            timestamps = parser._frame(pd.Series(sample, dtype=object))["timestamp"]
+            parser.timestamps = TimestampParser.detect(timestamps, reference)
+        return parser
+
+    @staticmethod
+    def detect_line_format(lines: List[str]) -> str:
+        """Satır tabanlı biçimlerden örnekte en çok eşleşeni seç"""
+        sample = pd.Series(lines, dtype=object)
+        best, best_ratio = "plain", 0.0
+        for name, pattern in LINE_FORMATS.items():
+            ratio = sample.str.match(pattern).mean()
+            if name == "kv":
+                # key=value biçimi için satırların çoğunda en az iki alan olmalı
+                ratio = min(ratio, (sample.str.count(KV_PATTERN) >= 2).mean())
+            if ratio > best_ratio:
+                best, best_ratio = name, ratio
+        return best if best_ratio >= DETECTION_MIN_RATIO else "plain"
+
+    @classmethod
+    def for_file(cls, file_path: str) -> "LogParser":
+        """Dosyanın başından örnek alarak ayrıştırıcı oluştur (artımlı analizde CSV başlığı için de gerekli)"""
+        try:
+            lines = [line for _, line in islice(read_log_lines(file_path), DETECTION_SAMPLE_SIZE)]
+            # Yılsız zaman damgaları (syslog) dosyanın son değişiklik yılına göre tamamlanır
+            reference = datetime.fromtimestamp(os.path.getmtime(file_path))
+        except OSError:
+            lines, reference = [], None
+        parser = cls.detect(lines, os.path.basename(file_path), reference)
+        logger.info(f"Log biçimi tespit edildi: {parser.format}, zaman damgası: {parser.timestamps.format} "
+                    f"({os.path.basename(file_path)})")
+        return parser
+
+    def records(self, records: Iterable[LogRecord]) -> Iterator[LogRecord]:
+        """Analiz hattına girecek mantıksal kayıtlar: CSV'de çok satırlı kayıtlar birleşir, başlık atlanır"""
+        if self.format != "csv":
+            return iter(records)
+        return (record for record in merge_csv_rows(records) if record[0] != 1)
+
+    def parse(self, records: List[LogRecord]) -> pd.DataFrame:
+        """Kayıt penceresini kolonlu yapıya çevir
+
+        Dönen tablo kayıt sırasındadır; ``line_number``, çekirdek kolonlar ve
+        tiplenmiş alan kolonlarını içerir.
+        """
+        texts = pd.Series([text for _, text in records], dtype=object)
+        frame = self._frame(texts)
+
+        # Alanlar öncelik sırasıyla birleşir: biçimin kendi grupları, key=value çiftleri, sshd oturum alanları
+        fields: Dict[str, pd.Series] = {}
+        sources = (frame.drop(columns=list(CORE_COLUMNS)), self._extract_kv(frame["message"]),
+                   frame["message"].str.extract(SSHD_AUTH_PATTERN))
+        for source in sources:
+            for column in source.columns:
+                values = source[column]
+                fields[column] = fields[column].fillna(values) if column in fields else values
+
+        structured = pd.DataFrame({
+            "line_number": [line_number for line_number, _ in records],
+            "timestamp": self.timestamps.parse(frame["timestamp"]),
+            "log_level": normalize_levels(frame["log_level"]),
+            "host": frame["host"],
+            "program": frame["program"],
+            "message": frame["message"].fillna(texts),
+        })
+        for column, values in fields.items():
+            if values.notna().any():
+                structured[column] = coerce_field(values.replace("", None))
+        return structured
+
+    def timestamp_values(self, texts: pd.Series) -> pd.Series:
+        """Yalnızca zaman damgası kolonu; satır başındaki damga alan çıkarımı yapılmadan okunur"""
+        if self.format not in LEADING_TIMESTAMP_FORMATS:
+            return self.timestamps.parse(self._frame(texts)["timestamp"])
+        values = texts.str.extract(LEADING_TIMESTAMP, expand=False)
+        missing = values.isna()
+        if self.format != "plain" and missing.any():
+            # Damgası başta olmayan satırlar (ör. karışık dosyada erişim logu) tam yoldan geçer
+            values[missing] = self._frame(texts[missing])["timestamp"]
+        return self.timestamps.parse(values)
+
+    def _frame(self, texts: pd.Series) -> pd.DataFrame:
+        return self._parse_csv(texts) if self.format == "csv" else self._parse_lines(texts)
+
+    def _parse_lines(self, texts: pd.Series) -> pd.DataFrame:
+        frame = pd.DataFrame(index=texts.index, columns=list(CORE_COLUMNS), dtype=object)
+        remaining = texts
+        for name in self.line_formats:
+            if remaining.empty:
+                break
+            extracted = remaining.str.extract(LINE_FORMATS[name])
+            matched = extracted["message"].notna()
+            if matched.any():
+                extracted = extracted[matched]
+                for column in extracted.columns:
+                    if column not in frame.columns:
+                        frame[column] = None
+                frame.loc[extracted.index, extracted.columns] = extracted
+                remaining = remaining[~matched]
+        return frame
+
+    def _parse_csv(self, texts: pd.Series) -> pd.DataFrame:
+        width = len(self.csv_columns)
+        # Her kayıt tek mantıksal satır olduğundan csv.reader kayıt başına tam bir satır üretir
+        rows = [(row + [""] * width)[:width] for row in csv.reader(texts)]
+        table = pd.DataFrame(rows, index=texts.index, columns=range(width), dtype=object)
+        frame = pd.DataFrame(index=texts.index, columns=list(CORE_COLUMNS), dtype=object)
+        for role, column in self.csv_roles.items():
+            frame[role] = table[column].replace("", None)
+        for column, name in enumerate(self.csv_columns):
+            # İsimsiz kolonlar genellikle dışa aktarımın satır numarasıdır
+            if column not in self.csv_roles.values() and name.strip() and not name.startswith("Unnamed"):
+                frame[name] = table[column]
+        return frame
+
+    def _extract_kv(self, messages: pd.Series) -> pd.DataFrame:
+        candidates = messages.dropna()
+        candidates = candidates[candidates.str.contains("=", regex=False)]
+        if candidates.empty:
+            return pd.DataFrame(index=messages.index)
+        pairs = candidates.str.extractall(KV_PATTERN)
+        if pairs.empty:
+            return pd.DataFrame(index=messages.index)
+        pairs = pairs.droplevel("match")
+        pairs["value"] = pairs["value"].str.strip('"')
+        keys = pairs["key"].value_counts().index[:MAX_KV_FIELDS]
+        pairs = pairs[pairs["key"].isin(keys)]
+        # Aynı satırda tekrarlanan anahtarda son değer geçerli
+        pairs = pairs.reset_index().drop_duplicates(["index", "key"], keep="last")
+        return pairs.pivot(index="index", columns="key", values="value").reindex(messages.index)
+
+    def template_texts(self, structured: pd.DataFrame) -> List[str]:
+        """Şablon çıkarıcıya gidecek metinler: zaman damgası ve host olmadan seviye + program + mesaj"""
+        texts = structured["message"].astype(str)
+        program = structured["program"].fillna("")
+        texts = (program + " " + texts).where(program != "", texts)
+        level = structured["log_level"].fillna("")
+        return (level + " " + texts).where(level != "", texts).tolist()
+
+    @staticmethod
+    def row_details(structured: pd.DataFrame) -> List[Dict]:
+        """Her kayıt için sonuçlara eklenecek alanlar: zaman damgası (ISO), seviye ve tiplenmiş alanlar"""
+        # map() None'ları NaN'a çevirebildiği için liste üzerinden dönüştürülür
+        timestamps = [value.isoformat() if not pd.isna(value) else None for value in structured["timestamp"]]
+        levels = structured["log_level"].astype(object).where(structured["log_level"].notna(), None).tolist()
+        field_columns = [column for column in structured.columns
+                         if column not in ("line_number", "timestamp", "log_level", "message")]
+        fields = structured[field_columns].astype(object).where(structured[field_columns].notna(), None)
+        details = []
+        for timestamp, level, row in zip(timestamps, levels, fields.to_dict("records")):
+            row = {
+                key: value.item() if hasattr(value, "item") else value
+                for key, value in row.items() if value is not None
+            }
+            details.append({"timestamp": timestamp, "log_level": level, "fields": row})
+        return details
@@ -1,21 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 import os
-import shutil
 import math
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from .database import get_db, create_tables, LogFile, LogEntry, AnalysisResult
+from sqlalchemy import or_, select, func, text
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db, create_tables, async_engine, AsyncSessionLocal, LogFile, LogEntry, AnalysisResult, AnalysisJob
 from .ml_model import anomaly_detector
-import pandas as pd
+from .ingest import IngestWriter, UploadTooLargeError, LineIndex
+from .upload_stream import UploadFormatError, receive_upload
+from .jobs import job_manager
+from .search_index import search_index
+from .tailer import tail_daemon
+from .syslog_receiver import syslog_receiver
+from .results_store import has_entries, count_entries, page_entries
+from .report_store import REPORT_LIST_SECTIONS, parse_sections, has_report, load_report, load_results
 import json
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+# Yüklenebilecek en büyük dosya boyutu (MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_SIZE_MB", "4096")) * 1024 * 1024
+# Content-Length ön kontrolünde multipart zarfına (sınırlar, part başlıkları) bırakılan pay
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Satır aralığı endpoint'inin tek istekte döndürebileceği en fazla satır
+MAX_LINE_RANGE = int(os.getenv("MAX_LINE_RANGE", "1000"))
+
 # Create FastAPI app
 app = FastAPI(
     title="Akıllı Log Asistanı API",
@@ -41,6 +59,21 @@ if os.path.exists(static_dir):
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    search_index.create_table()
+    await job_manager.start()
+    if syslog_receiver.enabled:
+        # Alınan mesajlar host başına dosyalara yazılır ve izleme servisi üzerinden analiz edilir
+        await syslog_receiver.start()
+        tail_daemon.add_directory(syslog_receiver.spool_dir, "*.log")
+    await tail_daemon.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await syslog_receiver.stop()
+    await tail_daemon.stop()
+    await job_manager.stop()
+    await async_engine.dispose()
+    await anomaly_detector.client.aclose()
 
 @app.get("/")
 async def root():
@@ -52,12 +85,11 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Health check endpoint"""
     try:
         # Test database connection
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -69,6 +101,7 @@ async def health_check(db: Session = Depends(get_db)):
         "status": "healthy",
         "database": db_status,
         "llm": llm_status,
+        "llm_circuit": anomaly_detector.client.circuit_breaker.state,
         "model": "llama3.2"
     }
 
@@ -80,12 +113,24 @@ async def get_version():
         "build_date": "2025-07-26"
     }
 
+@app.get("/api/llm-cache/stats")
+async def get_llm_cache_stats():
+    """LLM karar önbelleği istatistikleri"""
+    if anomaly_detector.verdict_cache is None:
+        return {"status": "success", "enabled": False}
+    try:
+        # İstatistikler SQLite'tan sayılır, loop'u bloklamasın
+        stats = await run_in_threadpool(anomaly_detector.verdict_cache.stats)
+        return {"status": "success", "enabled": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Önbellek istatistik hatası: {str(e)}")
+
 @app.get("/api/db/test")
-async def test_database(db: Session = Depends(get_db)):
+async def test_database(db: AsyncSession = Depends(get_async_db)):
     """Test database connection and create sample data"""
     try:
         # Test basic connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         
         # Create a test log file entry
         test_log = LogFile(
@@ -96,10 +141,10 @@ async def test_database(db: Session = Depends(get_db)):
             file_path="/test/path"
         )
         db.add(test_log)
-        db.commit()
+        await db.commit()
         
         # Get the count of log files
-        log_count = db.query(LogFile).count()
+        log_count = (await db.execute(select(func.count(LogFile.id)))).scalar_one()
         
         return {
             "status": "success",
@@ -112,53 +157,83 @@ async def test_database(db: Session = Depends(get_db)):
             "message": f"Database error: {str(e)}"
         }
 
-@app.post("/api/upload")
-async def upload_log_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Upload log file for analysis"""
+@app.post("/api/upload", openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}
+}}}}})
+async def upload_log_file(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Upload log file for analysis
+    
+    Gövde ``request.stream()`` üzerinden geldikçe ayrıştırılır ve tek geçişte diske
+    yazılır; satır sayısı, SHA-256, satır offset'leri ve arama indeksi aynı anda
+    oluşturulur. Dosya önce geçici bir dosyaya toplanmaz, boyut sınırı yazım sırasında
+    uygulanır.
+    """
+    too_large = f"Dosya boyutu {MAX_UPLOAD_BYTES // (1024 * 1024)}MB'dan küçük olmalıdır"
     try:
-        # Validate file type
-        allowed_extensions = ['.csv', '.log', '.txt']
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        if file_extension not in allowed_extensions:
-            raise HTTPException(status_code=400, detail="Sadece .csv, .log ve .txt dosyaları desteklenir")
-        
-        # Validate file size (50MB limit)
-        if file.size > 50 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Dosya boyutu 50MB'dan küçük olmalıdır")
+        # Validate file size (varsayılan 4GB limit); Content-Length varsa gövde hiç okunmadan reddedilir
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise HTTPException(status_code=400, detail=too_large)
         
         # Create uploads directory if it doesn't exist
         upload_dir = os.path.join(os.getcwd(), "uploads")
         os.makedirs(upload_dir, exist_ok=True)
         
-        # Save file
-        file_path = os.path.join(upload_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Count lines in file
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            line_count = sum(1 for _ in f)
-        
-        # Create database entry
-        log_file = LogFile(
-            filename=file.filename,
-            file_size=file.size,
-            total_lines=line_count,
-            anomaly_count=None,  # NULL = not analyzed, will be updated after analysis
-            file_path=file_path
-        )
-        db.add(log_file)
-        db.commit()
-        db.refresh(log_file)
+        log_file = None
+        
+        async def open_writer(filename: str) -> IngestWriter:
+            nonlocal log_file
+            # Validate file type
+            allowed_extensions = ['.csv', '.log', '.txt']
+            file_extension = os.path.splitext(filename)[1].lower()
+            if file_extension not in allowed_extensions:
+                raise UploadFormatError("Sadece .csv, .log ve .txt dosyaları desteklenir")
+            file_path = os.path.join(upload_dir, os.path.basename(filename))
+            
+            # Kayıt gövde okunmadan oluşturulur; arama indeksi satırları dosya id'siyle aynı geçişte yazar
+            log_file = LogFile(
+                filename=filename,
+                file_size=0,
+                total_lines=0,
+                anomaly_count=None,  # NULL = not analyzed, will be updated after analysis
+                file_path=file_path,
+                status="uploading"
+            )
+            db.add(log_file)
+            await db.commit()
+            await db.refresh(log_file)
+            sinks = [search_index.writer(log_file.id)] if search_index.available else []
+            return IngestWriter(file_path, MAX_UPLOAD_BYTES, sinks)
+        
+        try:
+            filename, ingest_result = await receive_upload(request, "file", open_writer)
+        except Exception as e:
+            # Yarım yüklemenin kaydı silinir; dosyası ve indeks satırları writer tarafından silindi
+            if log_file is not None:
+                await db.delete(log_file)
+                await db.commit()
+            if isinstance(e, UploadTooLargeError):
+                raise HTTPException(status_code=400, detail=too_large)
+            if isinstance(e, UploadFormatError):
+                raise HTTPException(status_code=400, detail=str(e))
+            raise
+        line_count = ingest_result["line_count"]
+        
+        log_file.file_size = ingest_result["bytes"]
+        log_file.total_lines = line_count
+        log_file.sha256 = ingest_result["sha256"]
+        log_file.search_indexed = search_index.available
+        log_file.status = "uploaded"
+        await db.commit()
         
         return {
             "status": "success",
             "message": "Dosya başarıyla yüklendi",
             "file_id": log_file.id,
-            "filename": file.filename,
-            "file_size": file.size,
-            "total_lines": line_count
+            "filename": filename,
+            "file_size": ingest_result["bytes"],
+            "total_lines": line_count,
+            "sha256": ingest_result["sha256"]
         }
         
     except HTTPException:
@@ -167,10 +242,15 @@ async def upload_log_file(file: UploadFile = File(...), db: Session = Depends(ge
         raise HTTPException(status_code=500, detail=f"Dosya yükleme hatası: {str(e)}")
 
 @app.get("/api/files")
-async def get_uploaded_files(db: Session = Depends(get_db)):
+async def get_uploaded_files(db: AsyncSession = Depends(get_async_db)):
     """Yüklenen dosyaları listele"""
     try:
-        files = db.query(LogFile).order_by(LogFile.upload_date.desc()).all()
+        # Rapor kolonları listede kullanılmadığı için yüklenmez
+        files = (await db.execute(
+            select(LogFile)
+            .options(defer(LogFile.security_report_json), defer(LogFile.security_report_blob))
+            .order_by(LogFile.upload_date.desc())
+        )).scalars().all()
         return {
             "status": "success",
             "files": [
@@ -181,7 +261,8 @@ async def get_uploaded_files(db: Session = Depends(get_db)):
                     "total_lines": file.total_lines,
                     "anomaly_count": file.anomaly_count,
                     "created_at": file.upload_date.isoformat(),
-                    "is_analyzed": file.anomaly_count is not None
+                    "is_analyzed": file.anomaly_count is not None,
+                    "search_indexed": bool(file.search_indexed)
                 }
                 for file in files
             ]
@@ -189,73 +270,44 @@ async def get_uploaded_files(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dosya listesi hatası: {str(e)}")
 
-@app.post("/api/analyze/{file_id}")
-async def analyze_log_file(file_id: int, analysis_type: str = "fast", db: Session = Depends(get_db)):
-    """Log dosyasını analiz et"""
+@app.post("/api/analyze/{file_id}", status_code=202)
+async def analyze_log_file(file_id: int, analysis_type: str = "fast", incremental: bool = False,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Log dosyası için analiz işi kuyruğa al
+    
+    ``incremental=true`` ile yalnızca son analizden sonra dosyaya eklenen satırlar
+    analiz edilir ve sonuç önceki analizle birleştirilir. ``analysis_type=statistical``
+    LLM kullanmadan zaman/şablon sayımlarında ani artış ve hız değişimi arar.
+    """
     try:
         # Dosyayı bul
-        log_file = db.query(LogFile).filter(LogFile.id == file_id).first()
+        log_file = await db.get(LogFile, file_id)
         if not log_file:
             raise HTTPException(status_code=404, detail="Dosya bulunamadı")
         
-        # Dosyayı oku
         if not os.path.exists(log_file.file_path):
             raise HTTPException(status_code=404, detail="Dosya sistem üzerinde bulunamadı")
         
-        # Log satırlarını oku
-        log_lines = []
-        with open(log_file.file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            log_lines = [line.strip() for line in f.readlines() if line.strip()]
+        if log_file.status == "uploading":
+            raise HTTPException(status_code=409, detail="Dosya henüz yükleniyor")
         
-        if not log_lines:
+        if not log_file.total_lines:
             raise HTTPException(status_code=400, detail="Dosya boş veya okunamadı")
         
-        # İlk kez analiz ediyorsa, modeli eğit
-        if not anomaly_detector.is_trained:
-            training_result = anomaly_detector.train_model(log_lines[:1000])  # İlk 1000 satırla eğit
-            if training_result["status"] != "success":
-                raise HTTPException(status_code=500, detail=f"Model eğitimi başarısız: {training_result.get('message', 'Bilinmeyen hata')}")
-        
-        # Analiz yap (analiz türünü geç)
-        analysis_result = anomaly_detector.predict(log_lines, analysis_type=analysis_type)
-        
-        if analysis_result["status"] != "success":
-            raise HTTPException(status_code=500, detail=f"Analiz başarısız: {analysis_result.get('message', 'Bilinmeyen hata')}")
-        
-        # Veritabanını güncelle
-        log_file.anomaly_count = analysis_result["anomaly_count"]
-        db.commit()
-        
-        # Analiz sonuçlarını kaydet
-        analysis_record = AnalysisResult(
-            log_file_id=file_id,
-            total_lines=analysis_result["total_lines"],
-            anomaly_count=analysis_result["anomaly_count"],
-            critical_count=analysis_result["critical_count"],
-            anomaly_rate=analysis_result["anomaly_rate"],
-            confidence_score=analysis_result.get("confidence_score", 0.0),
-            results_json=json.dumps(analysis_result["results"], ensure_ascii=False)
-        )
-        db.add(analysis_record)
-        db.commit()
-        db.refresh(analysis_record)
-        
-        # Güvenlik raporunu da dosyaya kaydet
-        if "security_report" in analysis_result:
-            log_file.security_report_json = json.dumps(analysis_result["security_report"], ensure_ascii=False)
-            db.commit()
+        job, created = await db.run_sync(job_manager.enqueue, log_file, analysis_type, incremental)
+        if not created and (job.analysis_type != analysis_type or bool(job.incremental) != incremental):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Dosya için farklı ayarlarla bir analiz işi zaten var (iş {job.id}: {job.analysis_type}"
+                       f"{', artımlı' if job.incremental else ''}, durum {job.status})"
+            )
         
         return {
             "status": "success",
-            "message": "Analiz tamamlandı",
-            "analysis_id": analysis_record.id,
-            "summary": {
-                "total_lines": analysis_result["total_lines"],
-                "anomaly_count": analysis_result["anomaly_count"],
-                "critical_count": analysis_result["critical_count"],
-                "anomaly_rate": round(analysis_result["anomaly_rate"] * 100, 2) if analysis_result.get("anomaly_rate") is not None and not math.isnan(analysis_result["anomaly_rate"]) else None,
-                "confidence_score": analysis_result.get("confidence_score", 0.0)
-            }
+            "message": "Analiz kuyruğa alındı" if created else "Dosya için aynı analiz işi zaten kuyrukta",
+            "job_id": job.id,
+            "state": job.status,
+            "existing": not created
         }
         
     except HTTPException:
@@ -263,30 +315,104 @@ async def analyze_log_file(file_id: int, analysis_type: str = "fast", db: Sessio
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analiz hatası: {str(e)}")
 
+@app.get("/api/jobs")
+async def get_analysis_jobs(file_id: int = None, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+    """Analiz işlerini listele (en yeni önce)"""
+    try:
+        query = select(AnalysisJob)
+        if file_id is not None:
+            query = query.where(AnalysisJob.log_file_id == file_id)
+        jobs = (await db.execute(query.order_by(AnalysisJob.id.desc()).limit(min(max(limit, 1), 500)))).scalars().all()
+        return {
+            "status": "success",
+            "jobs": await db.run_sync(lambda session: [job_manager.job_status(session, job) for job in jobs])
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"İş listesi hatası: {str(e)}")
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_analysis_job(job_id: int):
+    """Analiz işinin anomali ve ilerleme olaylarını canlı olarak akıt (Server-Sent Events)"""
+    # Akış boyunca bağlantı tutulmasın diye oturum yalnızca kontrol için açılır
+    async with AsyncSessionLocal() as db:
+        job = await db.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analiz işi bulunamadı")
+    return StreamingResponse(
+        job_manager.stream_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs/{job_id}")
+async def get_analysis_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Analiz işinin durumu, ilerleme yüzdesi, hızı ve tahmini bitiş süresi"""
+    job = await db.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analiz işi bulunamadı")
+    return {"status": "success", **await db.run_sync(job_manager.job_status, job)}
+
+@app.get("/api/tail/status")
+async def get_tail_status():
+    """Dizin izleme servisinin durumu: izlenen dosyalar, bekleyen satırlar ve geri basınç sayaçları"""
+    return {"status": "success", **tail_daemon.status()}
+
+@app.get("/api/syslog/status")
+async def get_syslog_status():
+    """Syslog alıcısının sayaçları: alınan, yazılan ve tampon dolduğu için düşürülen mesajlar"""
+    return {"status": "success", **syslog_receiver.status()}
+
+@app.get("/api/model/status")
+async def get_local_model_status():
+    """Yerel anomali modelinin sürümü, eğitim geçmişi ve kayıtlı sürümleri"""
+    return {"status": "success", **anomaly_detector.local_model.status()}
+
 @app.get("/api/analysis/{file_id}/results")
-async def get_analysis_results(file_id: int, page: int = 1, page_size: int = 50, severity_filter: str = None, db: Session = Depends(get_db)):
-    """Dosya için analiz sonuçlarını getir"""
+async def get_analysis_results(file_id: int, page: int = 1, page_size: int = 50, severity_filter: str = None,
+                               cursor: int = None, db: AsyncSession = Depends(get_async_db)):
+    """Dosya için analiz sonuçlarını getir
+    
+    Sonraki sayfa için yanıttaki ``next_cursor`` değeri ``cursor`` olarak gönderilir.
+    """
     try:
-        # Dosya için en son analiz kaydını bul
-        analysis = db.query(AnalysisResult).filter(AnalysisResult.log_file_id == file_id).order_by(AnalysisResult.analysis_date.desc()).first()
+        # Dosya için en son analiz kaydını bul (JSON sonuçlar yalnızca gerekirse yüklenir)
+        analysis = (await db.execute(
+            select(AnalysisResult)
+            .options(defer(AnalysisResult.results_json), defer(AnalysisResult.results_blob))
+            .where(AnalysisResult.log_file_id == file_id)
+            .order_by(AnalysisResult.analysis_date.desc())
+            .limit(1)
+        )).scalars().first()
         if not analysis:
             raise HTTPException(status_code=404, detail="Bu dosya için analiz sonucu bulunamadı")
         
-        # JSON sonuçları parse et
-        results = json.loads(analysis.results_json)
-        
-        # Filtreleme
-        if severity_filter and severity_filter != "all":
-            if severity_filter == "anomalies":
-                results = [r for r in results if r["is_anomaly"]]
-            else:
-                results = [r for r in results if r["severity"] == severity_filter]
-        
-        # Sayfalama
-        total_results = len(results)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_results = results[start_idx:end_idx]
+        page_size = min(max(page_size, 1), 1000)
+        page = max(page, 1)
+        next_cursor = None
+        
+        if await has_entries(db, file_id):
+            # Filtreleme ve sayfalama SQL tarafında, indeks üzerinden yapılır
+            # Sayı kayıtlı satırlardan alınır: istatistiksel analizler yalnızca anomali satırlarını saklar
+            total_results = await count_entries(db, file_id, severity_filter, analysis_id=analysis.id)
+            paginated_results, next_cursor = await page_entries(
+                db, file_id, severity_filter, cursor=cursor, page_size=page_size, page=page, analysis_id=analysis.id
+            )
+        else:
+            # log_entries tablosundan önceki analizler: saklanan sonuçları çöz
+            results = await db.run_sync(lambda session: load_results(analysis))
+            
+            # Filtreleme
+            if severity_filter and severity_filter != "all":
+                if severity_filter == "anomalies":
+                    results = [r for r in results if r["is_anomaly"]]
+                else:
+                    results = [r for r in results if r["severity"] == severity_filter]
+            
+            # Sayfalama
+            total_results = len(results)
+            start_idx = (page - 1) * page_size
+            end_idx = start_idx + page_size
+            paginated_results = results[start_idx:end_idx]
         
         return {
             "status": "success",
@@ -296,6 +422,7 @@ async def get_analysis_results(file_id: int, page: int = 1, page_size: int = 50,
             "page": page,
             "page_size": page_size,
             "total_pages": (total_results + page_size - 1) // page_size,
+            "next_cursor": next_cursor,
             "summary": {
                 "total_lines": analysis.total_lines,
                 "anomaly_count": analysis.anomaly_count,
@@ -311,12 +438,25 @@ async def get_analysis_results(file_id: int, page: int = 1, page_size: int = 50,
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sonuç getirme hatası: {str(e)}")
 
+def read_preview_lines(file_path: str, lines: int):
+    """Dosyanın ilk ``lines`` satırını oku"""
+    preview_lines = []
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for i, line in enumerate(f):
+            if i >= lines:
+                break
+            preview_lines.append({
+                "line_number": i + 1,
+                "content": line.strip()
+            })
+    return preview_lines
+
 @app.get("/api/file/{file_id}/preview")
-async def preview_log_file(file_id: int, lines: int = 10, db: Session = Depends(get_db)):
+async def preview_log_file(file_id: int, lines: int = 10, db: AsyncSession = Depends(get_async_db)):
     """Log dosyasının ilk birkaç satırını önizle"""
     try:
         # Dosyayı bul
-        log_file = db.query(LogFile).filter(LogFile.id == file_id).first()
+        log_file = await db.get(LogFile, file_id)
         if not log_file:
             raise HTTPException(status_code=404, detail="Dosya bulunamadı")
         
@@ -324,15 +464,7 @@ async def preview_log_file(file_id: int, lines: int = 10, db: Session = Depends(
             raise HTTPException(status_code=404, detail="Dosya sistem üzerinde bulunamadı")
         
         # İlk N satırı oku
-        preview_lines = []
-        with open(log_file.file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for i, line in enumerate(f):
-                if i >= lines:
-                    break
-                preview_lines.append({
-                    "line_number": i + 1,
-                    "content": line.strip()
-                })
+        preview_lines = await run_in_threadpool(read_preview_lines, log_file.file_path, lines)
         
         return {
             "status": "success",
@@ -348,18 +480,110 @@ async def preview_log_file(file_id: int, lines: int = 10, db: Session = Depends(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Önizleme hatası: {str(e)}")
 
+def read_line_range(file_path: str, start: int, end: int):
+    """1 tabanlı [start, end) aralığını oku; (satırlar, dosyadaki toplam satır) döndür"""
+    with LineIndex(file_path) as index:
+        return index.read_lines(start - 1, end - 1), index.line_count
+
+@app.get("/api/file/{file_id}/lines")
+async def get_log_lines(file_id: int, start: int = 1, end: int = None, db: AsyncSession = Depends(get_async_db)):
+    """Log dosyasının [start, end) satır aralığını döndür
+    
+    Satır offset indeksi sayesinde aralık dosyanın başından taranmadan okunur;
+    ``end`` verilmezse ``start``'tan itibaren 100 satır döner.
+    """
+    try:
+        if start < 1:
+            raise HTTPException(status_code=400, detail="start 1 veya daha büyük olmalıdır")
+        if end is None:
+            end = start + 100
+        if end <= start:
+            raise HTTPException(status_code=400, detail="end, start'tan büyük olmalıdır")
+        if end - start > MAX_LINE_RANGE:
+            raise HTTPException(status_code=400, detail=f"Tek istekte en fazla {MAX_LINE_RANGE} satır okunabilir")
+        
+        log_file = await db.get(LogFile, file_id)
+        if not log_file:
+            raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+        
+        if not os.path.exists(log_file.file_path):
+            raise HTTPException(status_code=404, detail="Dosya sistem üzerinde bulunamadı")
+        
+        # İndeksi olmayan eski dosyalarda ilk istek indeksi oluşturur, loop'u bloklamasın
+        lines, total_lines = await run_in_threadpool(read_line_range, log_file.file_path, start, end)
+        
+        return {
+            "status": "success",
+            "file_id": file_id,
+            "total_lines": total_lines,
+            "start": start,
+            "end": start + len(lines),
+            "lines": [
+                {"line_number": start + i, "content": line}
+                for i, line in enumerate(lines)
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Satır okuma hatası: {str(e)}")
+
+@app.get("/api/search")
+async def search_logs(q: str, file_id: int = None, cursor: int = None, page_size: int = 50,
+                      db: AsyncSession = Depends(get_async_db)):
+    """Yüklenen loglarda tam metin arama
+    
+    ``"Authentication failed"`` ifade, ``auth*`` önek araması yapar; birden fazla
+    terim AND ile birleşir. Eşleşmeler ``<mark>`` ile vurgulanır, sonraki sayfa için
+    yanıttaki ``next_cursor`` gönderilir.
+    """
+    if not search_index.available:
+        raise HTTPException(status_code=503, detail="Arama indeksi kullanılamıyor (SQLite FTS5 gerekli)")
+    page_size = max(1, min(page_size, 500))
+    try:
+        result = await search_index.search(db, q, file_id=file_id, cursor=cursor, page_size=page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Arama hatası: {str(e)}")
+    return {"status": "success", "query": q, **result}
+
+@app.post("/api/file/{file_id}/search-index")
+async def reindex_log_file(file_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Dosyayı arama indeksine (yeniden) ekle; indeksi olmayan eski dosyalar için"""
+    if not search_index.available:
+        raise HTTPException(status_code=503, detail="Arama indeksi kullanılamıyor (SQLite FTS5 gerekli)")
+    log_file = await db.get(LogFile, file_id)
+    if not log_file:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    if not os.path.exists(log_file.file_path):
+        raise HTTPException(status_code=404, detail="Dosya sistem üzerinde bulunamadı")
+    try:
+        indexed_lines = await run_in_threadpool(search_index.index_file, file_id, log_file.file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"İndeksleme hatası: {str(e)}")
+    return {"status": "success", "file_id": file_id, "indexed_lines": indexed_lines}
+
 @app.get("/api/reports")
-async def get_reports(db: Session = Depends(get_db)):
-    """Güvenlik raporlarını listele"""
+async def get_reports(sections: str = None, db: AsyncSession = Depends(get_async_db)):
+    """Güvenlik raporlarını listele
+    
+    Varsayılan olarak ayrıntılı bulgular hariç bölümler döner; ``sections``
+    ile virgülle ayrılmış bölüm listesi ya da ``all`` verilebilir.
+    """
     try:
-        files = db.query(LogFile).filter(
-            LogFile.security_report_json.isnot(None)
-        ).order_by(LogFile.upload_date.desc()).all()
+        wanted = parse_sections(sections, REPORT_LIST_SECTIONS)
+        files = (await db.execute(
+            select(LogFile).where(
+                or_(LogFile.security_report_blob.isnot(None), LogFile.security_report_json.isnot(None))
+            ).order_by(LogFile.upload_date.desc())
+        )).scalars().all()
         
         reports = []
         for file in files:
             try:
-                security_report = json.loads(file.security_report_json) if file.security_report_json else None
+                security_report = await db.run_sync(load_report, file, wanted)
                 reports.append({
                     "id": file.id,
                     "filename": file.filename,
@@ -377,17 +601,17 @@ async def get_reports(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Rapor listesi hatası: {str(e)}")
 
 @app.get("/api/reports/{report_id}")
-async def get_report_detail(report_id: int, db: Session = Depends(get_db)):
-    """Rapor detayını getir"""
+async def get_report_detail(report_id: int, sections: str = None, db: AsyncSession = Depends(get_async_db)):
+    """Rapor detayını getir (``sections`` ile yalnızca istenen bölümler)"""
     try:
-        file = db.query(LogFile).filter(LogFile.id == report_id).first()
+        file = await db.get(LogFile, report_id)
         if not file:
             raise HTTPException(status_code=404, detail="Rapor bulunamadı")
         
-        if not file.security_report_json:
+        if not has_report(file):
             raise HTTPException(status_code=404, detail="Bu dosya için güvenlik raporu yok")
         
-        security_report = json.loads(file.security_report_json)
+        security_report = await db.run_sync(load_report, file, parse_sections(sections))
         
         return {
             "status": "success",
@@ -398,28 +622,36 @@ async def get_report_detail(report_id: int, db: Session = Depends(get_db)):
                 "security_report": security_report
             }
         }
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Rapor parse hatası")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rapor detay hatası: {str(e)}")
 
 @app.get("/api/reports/{report_id}/download")
-async def download_report(report_id: int, db: Session = Depends(get_db)):
+async def download_report(report_id: int, db: AsyncSession = Depends(get_async_db)):
     """Raporu JSON olarak indir"""
     try:
-        file = db.query(LogFile).filter(LogFile.id == report_id).first()
-        if not file or not file.security_report_json:
+        file = await db.get(LogFile, report_id)
+        if not file or not has_report(file):
             raise HTTPException(status_code=404, detail="Rapor bulunamadı")
         
         from fastapi.responses import Response
         
+        content = file.security_report_json
+        if content is None:
+            content = json.dumps(await db.run_sync(load_report, file), ensure_ascii=False)
+        
         return Response(
-            content=file.security_report_json,
+            content=content,
             media_type="application/json",
             headers={
                 "Content-Disposition": f"attachment; filename=security_report_{report_id}.json"
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Rapor indirme hatası: {str(e)}")
 
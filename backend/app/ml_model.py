@@ -1,15 +1,140 @@
+import asyncio
 import requests
 import json
 import re
 import os
-from typing import List, Dict, Optional
+import time
+from itertools import chain, islice
+from typing import List, Dict, FrozenSet, Optional, Callable, Iterable
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from .ollama_client import OllamaClient
+from .prompt_packer import PromptPacker
+from .template_miner import TemplateMiner
+from .verdict_cache import VerdictCache, VERDICT_FIELDS
+from .keyword_matcher import KeywordMatcher
+from .pipeline import LogRecord, batched, records_from_lines
+from .log_parser import LogParser, DETECTION_SAMPLE_SIZE
+from .statistical_detector import STATISTICAL_ANALYSIS, statistical_detector
+from .local_model import local_model
+from .stratified_sampler import stratified_sample
+from .cascade import CASCADE_SOURCE, LLMBudget, Triage, cascade_controller
+
+# Prompt metni değiştiğinde artırılmalı; LLM karar önbelleği bu sürüme göre ayrışır
+PROMPT_VERSION = "2"
+
+# MITRE ATT&CK teknik mapping'i (sıra önemli: ilk eşleşen teknik seçilir)
+MITRE_TECHNIQUES = {
+    "T1110": {  # Brute Force
+        "name": "Brute Force",
+        "tactic": "Credential Access",
+        "patterns": ["failed login", "authentication failed", "invalid password", "login attempt", "brute force"]
+    },
+    "T1190": {  # Exploit Public-Facing Application
+        "name": "Exploit Public-Facing Application", 
+        "tactic": "Initial Access",
+        "patterns": ["sql injection", "xss", "code injection", "exploit", "vulnerability"]
+    },
+    "T1083": {  # File and Directory Discovery
+        "name": "File and Directory Discovery",
+        "tactic": "Discovery", 
+        "patterns": ["directory traversal", "file access", "path disclosure", "directory listing"]
+    },
+    "T1005": {  # Data from Local System
+        "name": "Data from Local System",
+        "tactic": "Collection",
+        "patterns": ["data exfil", "sensitive data", "file download", "data extraction"]
+    },
+    "T1498": {  # Network Denial of Service
+        "name": "Network Denial of Service",
+        "tactic": "Impact",
+        "patterns": ["ddos", "dos attack", "flood", "overload", "exhausted"]
+    },
+    "T1055": {  # Process Injection
+        "name": "Process Injection",
+        "tactic": "Defense Evasion",
+        "patterns": ["malware", "trojan", "virus", "suspicious process", "injection"]
+    },
+    "T1078": {  # Valid Accounts
+        "name": "Valid Accounts", 
+        "tactic": "Persistence",
+        "patterns": ["privilege escalation", "unauthorized access", "admin access", "elevated privileges"]
+    },
+    "T1046": {  # Network Service Scanning
+        "name": "Network Service Scanning",
+        "tactic": "Discovery",
+        "patterns": ["port scan", "network scan", "service discovery", "reconnaissance"]
+    }
+}
+
+# Güvenlik raporu için anomali kategorileri (sıra önemli: ilk eşleşen kategori seçilir)
+ATTACK_CATEGORIES = {
+    "authentication": ["login", "auth", "password", "token", "credential"],
+    "network": ["connection", "timeout", "network", "dns", "port"],
+    "system": ["memory", "disk", "cpu", "process", "service"],
+    "database": ["sql", "database", "query", "connection"],
+    "access_control": ["permission", "denied", "unauthorized", "forbidden"],
+    "data_breach": ["breach", "leak", "exposure", "sensitive"],
+    "malware": ["virus", "malware", "trojan", "suspicious"],
+    "dos_attacks": ["flood", "overload", "exhausted", "limit"]
+}
+
+# Tüm anahtar kelime kuralları tek bir eşleştiricide derlenir; grup adları "alan:değer" biçimindedir
+KEYWORD_GROUPS = {
+    # smart_sample_logs
+    "sample:priority": ["error", "critical", "fatal", "exception", "fail", "timeout", "crash"],
+    "sample:warning": ["warning", "warn", "alert"],
+    # fallback_parsing
+    "fallback:anomaly": ["error", "critical", "fail", "exception", "timeout"],
+    "fallback:critical": ["critical", "fatal"],
+    "fallback:error": ["error", "exception"],
+    # calculate_enhanced_severity
+    "severity:critical": ["critical", "breach", "compromise", "malware", "exfiltration", "injection"],
+    "severity:high": ["failed", "denied", "attack", "intrusion", "unauthorized", "exploit"],
+    "severity:medium": ["warning", "error", "timeout", "blocked"],
+    "severity:frequency": ["multiple", "repeated", "frequent", "burst"],
+    "severity:system": ["database", "server", "admin", "root", "system"],
+    # calculate_confidence_score
+    "confidence:error": ["error", "failed", "denied", "blocked"],
+    "confidence:attack": ["attack", "malware", "intrusion", "breach"],
+    "confidence:severe": ["critical", "severe", "high"],
+}
+KEYWORD_GROUPS.update({f"mitre:{tid}": info["patterns"] for tid, info in MITRE_TECHNIQUES.items()})
+KEYWORD_GROUPS.update({f"category:{name}": keywords for name, keywords in ATTACK_CATEGORIES.items()})
+
+MITRE_GROUPS = [f"mitre:{tid}" for tid in MITRE_TECHNIQUES]
+# Şablon kararı yalnızca bu gruplardan aynı anahtar kelimeleri taşıyan satırlara yayılır; değişken
+# sanılıp jokerlenen "Failed"/"Accepted" gibi kelimeler aynı şablondaki satırları ayırır
+FANOUT_SIGNAL_GROUPS = frozenset({"sample:priority", "sample:warning", "severity:critical", "severity:high",
+                                  "severity:medium"})
+CATEGORY_GROUPS = [f"category:{name}" for name in ATTACK_CATEGORIES]
+SEVERITY_ORDER = ("low", "medium", "high", "critical")
+
+keyword_matcher = KeywordMatcher(KEYWORD_GROUPS)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ReportAggregate:
+    """Güvenlik raporu ve güven skoru için sonuçlardan akış halinde toplanan değerler
+
+    Satır sonuçlarının tamamı tutulmaz: severity sayıları, güven skoru toplamı ve
+    kategori başına anomaliler eklenir. ``finding_fields`` verilirse anomalilerin
+    yalnızca bu alanları saklanır (kayıtlı raporda bulgular satır numarasıyla tutulur).
+    """
+    
+    def __init__(self, finding_fields: Optional[tuple] = None):
+        self.finding_fields = finding_fields
+        self.categorized: Dict[str, List[Dict]] = {category: [] for category in ATTACK_CATEGORIES}
+        self.severity_count = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+        self.total_anomalies = 0
+        self.confidence_sum = 0.0
+        self.result_count = 0
+    
+    def confidence_score(self) -> float:
+        return round(self.confidence_sum / self.result_count, 1) if self.result_count else 0.0
+
 class LLMLogAnomalyDetector:
     """LLM tabanlı log anomali tespit sistemi - Ollama kullanır"""
     
@@ -17,7 +142,34 @@ class LLMLogAnomalyDetector:
         self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         self.model_name = "llama3.2"
         self.is_ready = False
-        self.is_trained = True  # LLM için her zaman True (eğitim gerektirmez)
+        # LLM eğitim gerektirmez; yerel anomali modeli (Isolation Forest) models/ dizininden yüklenir
+        self.local_model = local_model
+        self.is_trained = self.load_model() if self.local_model.enabled else True
+        # Ucuz katmanlar (kurallar, istatistik, yerel model) hangi satırların LLM'e gideceğine karar verir
+        self.cascade = cascade_controller
+        # Model bağlam penceresi; prompt + yanıt bu sınıra sığmalı
+        self.num_ctx = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+        # Batch'ler sabit satır sayısına göre değil, log satırlarının token bütçesine göre oluşturulur
+        self.prompt_packer = PromptPacker(token_budget=int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "1500")))
+        # Her log şablonundan LLM'e gönderilecek temsilci satır sayısı
+        self.template_representatives = max(1, int(os.getenv("LLM_TEMPLATE_REPRESENTATIVES", "2")))
+        # Örneklenmeyen akışlar bu büyüklükteki pencerelerle işlenir (bellek sınırı)
+        self.window_size = 2000
+        # Analiz boyunca bellekte tutulan en fazla şablon sayısı (en uzun süredir görülmeyenler çıkarılır)
+        self.max_templates = max(1, int(os.getenv("LLM_MAX_TEMPLATES", "50000")))
+        # Daha önce görülen satırlar için LLM kararları SQLite'ta saklanır
+        self.verdict_cache = None
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true":
+            self.verdict_cache = VerdictCache(
+                self.model_name,
+                PROMPT_VERSION,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000")),
+                ttl=timedelta(days=int(os.getenv("LLM_CACHE_TTL_DAYS", "30")))
+            )
+        # Aynı anda Ollama'ya gönderilebilecek maksimum batch sayısı
+        self.max_concurrency = max(1, int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")))
+        # Keep-alive havuzlu, yeniden denemeli asenkron istemci
+        self.client = OllamaClient(self.ollama_url, max_connections=self.max_concurrency)
         
         # Ollama'nın çalışıp çalışmadığını kontrol et
         self.check_ollama_status()
@@ -60,14 +212,14 @@ class LLMLogAnomalyDetector:
             logger.error(f"Model indirme hatası: {str(e)}")
     
     def create_analysis_prompt(self, log_lines: List[str]) -> str:
-        """Log analizi için prompt oluştur"""
-        # İlk 10 satırı al (çok uzun olmasın)
-        sample_lines = log_lines[:10] if len(log_lines) > 10 else log_lines
+        """Log analizi için prompt oluştur (batch'teki tüm satırlar dahil)"""
+        # Çok uzun satırlar kısaltılır; batch boyutu PromptPacker tarafından sınırlanır
+        prompt_lines = [self.prompt_packer.truncate_line(line) for line in log_lines]
         
         prompt = f"""Log analiz uzmanı olarak aşağıdaki log satırlarını analiz et. Sadece JSON formatında yanıt ver:
 
 Log Satırları:
-{chr(10).join(f"{i+1}: {line}" for i, line in enumerate(sample_lines))}
+{chr(10).join(f"{i+1}: {line}" for i, line in enumerate(prompt_lines))}
 
 Yanıt formatı:
 {{
@@ -82,49 +234,41 @@ Yanıt formatı:
     }}
   ],
   "summary": {{
-    "total_lines": {len(sample_lines)},
+    "total_lines": {len(prompt_lines)},
     "anomaly_count": 1,
     "critical_count": 1
   }}
 }}
 
+Sadece anomali olan satırları "results" listesine ekle; listede olmayan satırlar normal kabul edilir.
 Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
 
         return prompt
     
-    def call_ollama(self, prompt: str) -> Dict:
-        """Ollama API çağrısı yap"""
+    async def call_ollama_async(self, prompt: str) -> Dict:
+        """Ollama API çağrısı yap (event loop'u bloklamaz)"""
         try:
             if not self.is_ready:
                 return {"status": "error", "message": "Ollama hazır değil"}
             
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
+            return await self.client.generate(
+                self.model_name,
+                prompt,
+                options={
                     "temperature": 0.1,  # Daha tutarlı sonuçlar için
                     "top_p": 0.9,
-                    "num_predict": 2000  # Maksimum token sayısı
+                    "num_predict": 2000,  # Maksimum token sayısı
+                    "num_ctx": self.num_ctx
                 }
-            }
-            
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload,
-                timeout=60  # Büyük dosyalar için timeout artırıldı
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {"status": "success", "response": result.get("response", "")}
-            else:
-                return {"status": "error", "message": f"API hatası: {response.status_code}"}
-                
         except Exception as e:
             logger.error(f"Ollama API çağrısı hatası: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    def call_ollama(self, prompt: str) -> Dict:
+        """Ollama API çağrısı yap (senkron kullanım için)"""
+        return self.client.run_sync(lambda: self.call_ollama_async(prompt))
+    
     def parse_llm_response(self, response_text: str) -> Dict:
         """LLM yanıtını parse et"""
         try:
@@ -145,55 +289,70 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
             return self.fallback_parsing(response_text)
     
     def smart_sample_logs(self, log_lines: List[str], target_size: int = 300) -> List[str]:
-        """Akıllı log sampling - önemli logları koruyarak dosya boyutunu küçültür"""
-        if len(log_lines) <= target_size:
-            return log_lines
-        
-        # Öncelikli keywords (anomali olma ihtimali yüksek)
-        priority_keywords = ['ERROR', 'CRITICAL', 'FATAL', 'EXCEPTION', 'FAIL', 'TIMEOUT', 'CRASH']
-        warning_keywords = ['WARNING', 'WARN', 'ALERT']
-        
-        # Logları kategorize et
-        priority_logs = []
-        warning_logs = []
-        normal_logs = []
-        
-        for i, line in enumerate(log_lines):
-            line_upper = line.upper()
-            if any(keyword in line_upper for keyword in priority_keywords):
-                priority_logs.append((i, line))
-            elif any(keyword in line_upper for keyword in warning_keywords):
-                warning_logs.append((i, line))
-            else:
-                normal_logs.append((i, line))
-        
-        # Sampling stratejisi
-        selected_logs = []
-        
-        # 1. Tüm priority logları al (max 100)
-        selected_logs.extend(priority_logs[:100])
-        remaining = target_size - len(selected_logs)
-        
-        # 2. Warning loglarından yarısını al
-        if remaining > 0 and warning_logs:
-            warning_sample = min(remaining // 2, len(warning_logs))
-            selected_logs.extend(warning_logs[:warning_sample])
-            remaining -= warning_sample
-        
-        # 3. Normal loglardan eşit aralıklarla sample al
-        if remaining > 0 and normal_logs:
-            step = max(1, len(normal_logs) // remaining)
-            for i in range(0, len(normal_logs), step):
-                if len(selected_logs) >= target_size:
-                    break
-                selected_logs.append(normal_logs[i])
+        """Akıllı log sampling - önemli logları koruyarak dosya boyutunu küçültür (bkz. smart_sample_stream)"""
+        return [line for _, line in self.smart_sample_stream(records_from_lines(log_lines), target_size, target_size)]
+    
+    def local_model_ready(self) -> bool:
+        """Yerel model LLM kararlarından yeterince satırla eğitildi mi (etiketsiz eğitim sayılmaz)"""
+        return (self.local_model.enabled and self.local_model.trained
+                and self.local_model.labeled_samples >= self.cascade.min_training_samples)
+    
+    def cascade_active(self) -> bool:
+        """Ucuz katmanlar satırları ayıklayabiliyor mu (kademeli analiz açık ve yerel model hazır)"""
+        return self.cascade.enabled and self.local_model_ready()
+    
+    def sampling_plan(self, analysis_type: str) -> Optional[tuple]:
+        """Analiz türü için (sampling eşiği, hedef boyut) döndür; sampling yoksa None
         
-        # Orijinal sıralamayı koru
-        selected_logs.sort(key=lambda x: x[0])
+        Kademeli analiz kullanılabiliyorsa fast/detailed da örneklenmez: tüm satırlar
+        pencerelerle ucuz katmanlardan geçer, LLM harcamasını türün istek bütçesi sınırlar.
+        """
+        if self.cascade_active():
+            return None
+        if analysis_type == "fast":
+            return 500, 300
+        if analysis_type == "detailed":
+            return 2000, 1500
+        return None
+    
+    def smart_sample_stream(self, records: Iterable[LogRecord], threshold: int, target_size: int,
+                            log_parser: Optional[LogParser] = None) -> List[LogRecord]:
+        """Akışı tek geçişte, sınırlı bellekle katmanlı örnekle
         
-        # Sadece log metinlerini döndür
-        return [log for _, log in selected_logs]
-
+        Akış ``threshold`` kayıttan kısaysa tamamı döndürülür. Aksi halde satırlar
+        sınıf (öncelikli / warning / normal) ve şablon katmanlarının rezervuarlarında
+        örneklenir; seyrek şablonların tümü korunur, seçim dosyanın tamamına yayılır
+        ve en fazla ``target_size`` kayıt döner (bkz. ``StratifiedSampler``). ``log_parser``
+        verilirse katman içindeki seçim satırların zaman damgalarına göre zamana yayılır.
+        """
+        return stratified_sample(records, threshold, target_size, keyword_matcher.scan,
+                                 timestamps=log_parser.timestamp_values if log_parser is not None else None)
+    
+    def keyword_verdict(self, line: str) -> Dict:
+        """Anahtar kelime kurallarıyla tek satır için karar"""
+        hits = keyword_matcher.scan(line)
+        if "fallback:anomaly" not in hits:
+            return {
+                "is_anomaly": False,
+                "severity": "info",
+                "anomaly_type": "normal",
+                "confidence": 0.9,
+                "explanation": "Normal log"
+            }
+        if "fallback:critical" in hits:
+            severity, explanation = "critical", "Kritik hata tespit edildi"
+        elif "fallback:error" in hits:
+            severity, explanation = "high", "Hata tespit edildi"
+        else:
+            severity, explanation = "medium", "Potansiyel sorun tespit edildi"
+        return {
+            "is_anomaly": True,
+            "severity": severity,
+            "anomaly_type": "keyword_detection",
+            "confidence": 0.8,
+            "explanation": explanation
+        }
+    
     def fallback_parsing(self, text: str) -> Dict:
         """JSON parse edilemezse basit text parsing"""
         lines = text.split('\n')
@@ -204,37 +363,14 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
         # Her satırı kontrol et
         for i, line in enumerate(lines, 1):
             if line.strip():  # Boş satırları atla
-                is_anomaly = False
-                severity = "info"
-                explanation = "Normal log"
-                
-                line_lower = line.lower()
-                
-                # Anomali kontrolü
-                if any(word in line_lower for word in ['error', 'critical', 'fail', 'exception', 'timeout']):
-                    is_anomaly = True
+                result = self.keyword_verdict(line)
+                if result["is_anomaly"]:
                     anomaly_count += 1
-                    
-                    if 'critical' in line_lower or 'fatal' in line_lower:
-                        severity = "critical"
+                    if result["severity"] == "critical":
                         critical_count += 1
-                        explanation = "Kritik hata tespit edildi"
-                    elif 'error' in line_lower or 'exception' in line_lower:
-                        severity = "high"
-                        explanation = "Hata tespit edildi"
-                    else:
-                        severity = "medium"
-                        explanation = "Potansiyel sorun tespit edildi"
-                
-                results.append({
-                    "line_number": i,
-                    "is_anomaly": is_anomaly,
-                    "severity": severity,
-                    "anomaly_type": "keyword_detection" if is_anomaly else "normal",
-                    "confidence": 0.8 if is_anomaly else 0.9,
-                    "explanation": explanation,
-                    "log_content": line.strip()
-                })
+                result["line_number"] = i
+                result["log_content"] = line.strip()
+                results.append(result)
         
         return {
             "results": results,
@@ -245,201 +381,624 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
             }
         }
     
-    def predict(self, log_lines: List[str], analysis_type: str = "fast") -> Dict:
-        """Log satırları için anomali tahmini yap"""
-        try:
-            if not log_lines:
-                return {"status": "error", "message": "Log satırları boş"}
+    async def analyze_batch(self, batch: List[str], offset: int) -> Optional[List[Dict]]:
+        """Tek bir batch'i LLM ile analiz et, batch'teki her satır için bir sonuç döndür"""
+        # Prompt oluştur
+        prompt = self.create_analysis_prompt(batch)
+        
+        # LLM çağrısı
+        llm_response = await self.call_ollama_async(prompt)
+        
+        if llm_response["status"] == "error":
+            # LLM yanıt vermezse batch atlanmaz, anahtar kelime tabanlı analize düşülür
+            logger.error(f"Batch (satır {offset + 1}) LLM hatası: {llm_response['message']}, anahtar kelime analizi kullanılıyor")
+            parsed_result = self.fallback_parsing("\n".join(batch))
+            verdict_source = "keyword"
+        else:
+            # Yanıtı parse et
+            parsed_result = self.parse_llm_response(llm_response["response"])
+            verdict_source = "llm"
+        
+        # Batch içi satır indeksine göre sonuçlar (aynı satır için ilk sonuç geçerli)
+        line_results: Dict[int, Dict] = {}
+        for result in parsed_result.get("results", []):
+            if not isinstance(result, dict):
+                continue
+            try:
+                batch_line_idx = int(result.get("line_number", 1)) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= batch_line_idx < len(batch) and batch_line_idx not in line_results:
+                line_results[batch_line_idx] = result
+        
+        results = []
+        for batch_line_idx, line in enumerate(batch):
+            # LLM'in bildirmediği satırlar normal olarak işaretlenir, böylece her satır kapsanır
+            result = line_results.get(batch_line_idx) or {
+                "is_anomaly": False,
+                "severity": "info",
+                "anomaly_type": "normal",
+                "confidence": 0.9,
+                "explanation": "Normal log"
+            }
+            result["line_number"] = offset + batch_line_idx + 1
+            result["log_content"] = line
+            result["verdict_source"] = verdict_source
             
-            logger.info(f"LLM ile anomali analizi başlıyor... {len(log_lines)} satır")
+            results.append(result)
+        
+        return results
+    
+    def enrich_result(self, result: Dict) -> Dict:
+        """Anomali sonucuna MITRE tekniği, gelişmiş severity ve aksiyon önerileri ekle"""
+        if result.get("is_anomaly", False):
+            # MITRE teknik ekle
+            mitre_technique = self.get_mitre_technique(
+                result.get("log_content", ""), 
+                result.get("explanation", "")
+            )
+            result["mitre_technique"] = mitre_technique
+            
+            # Enhanced severity hesaplama
+            enhanced_severity = self.calculate_enhanced_severity(
+                result.get("log_content", ""),
+                result.get("explanation", ""),
+                mitre_technique
+            )
+            result["severity"] = enhanced_severity  # Override original severity
+            
+            # Aksiyon önerileri
+            actions = self.generate_action_recommendations(
+                mitre_technique, 
+                enhanced_severity,
+                result.get("log_content", "")
+            )
+            result["recommended_actions"] = actions
+        
+        return result
+    
+    def select_representatives(self, members: List[int]) -> List[int]:
+        """Şablon üyeleri arasından eşit aralıklı temsilci satırlar seç"""
+        count = min(self.template_representatives, len(members))
+        if count == 1:
+            return [members[0]]
+        step = (len(members) - 1) / (count - 1)
+        return sorted({members[round(k * step)] for k in range(count)})
+    
+    async def dispatch_batches(self, batches: List[tuple], progress_callback: Optional[Callable[[int, int], None]] = None,
+                               batch_callback: Optional[Callable[[int, List[Dict]], None]] = None,
+                               budget: Optional[LLMBudget] = None) -> List[List[Dict]]:
+        """Batch'leri eşzamanlı olarak LLM'e gönder, sonuçları batch sırasıyla döndür
+        
+        En fazla ``max_concurrency`` batch aynı anda işlenir. Her batch tamamlandığında
+        (varsa) ``batch_callback(batch indeksi, sonuçlar)`` çağrılır, ilerleme loglanır
+        ve ``progress_callback(tamamlanan, toplam)`` çağrılır. ``budget`` verilirse
+        istekler ve geçen süre bütçeden düşülür; süre bütçesi dolduktan sonra sırası
+        gelen batch'ler gönderilmez ve sonuçları boş kalır.
+        """
+        total_batches = len(batches)
+        ordered_results: List[List[Dict]] = [[] for _ in range(total_batches)]
+        if total_batches == 0:
+            return ordered_results
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        deadline = budget.deadline() if budget else None
+        started = time.monotonic()
+        
+        async def run(batch_idx: int, offset: int, batch: List[str]):
+            async with semaphore:
+                if deadline is not None and time.monotonic() >= deadline:
+                    budget.skipped_lines += len(batch)
+                    return batch_idx, None
+                if budget:
+                    budget.charge(1, 0.0)
+                try:
+                    return batch_idx, await self.analyze_batch(batch, offset)
+                except Exception as e:
+                    logger.error(f"Batch {batch_idx + 1} işleme hatası: {str(e)}")
+                    return batch_idx, None
+        
+        tasks = [run(batch_idx, offset, batch) for batch_idx, (offset, batch) in enumerate(batches)]
+        completed = 0
+        for next_done in asyncio.as_completed(tasks):
+            batch_idx, results = await next_done
+            if results is not None:
+                ordered_results[batch_idx] = results
+                if batch_callback:
+                    batch_callback(batch_idx, results)
             
-            # Analiz türüne göre sampling
-            if analysis_type == "fast" and len(log_lines) > 500:
-                logger.info(f"Hızlı analiz: Büyük dosya ({len(log_lines)} satır), akıllı sampling uygulanıyor")
-                log_lines = self.smart_sample_logs(log_lines, target_size=300)
-                logger.info(f"Sampling sonrası: {len(log_lines)} satır")
-            elif analysis_type == "detailed" and len(log_lines) > 2000:
-                logger.info(f"Detaylı analiz: Çok büyük dosya ({len(log_lines)} satır), sınırlı sampling uygulanıyor")
-                log_lines = self.smart_sample_logs(log_lines, target_size=1500)
-                logger.info(f"Sampling sonrası: {len(log_lines)} satır")
+            completed += 1
+            progress = (completed / total_batches) * 100
+            logger.info(f"Batch {batch_idx + 1}/{total_batches} tamamlandı ({completed}/{total_batches}, {progress:.1f}%)")
+            if progress_callback:
+                progress_callback(completed, total_batches)
+        
+        if budget:
+            budget.charge(0, time.monotonic() - started)
+        return ordered_results
+    
+    def predict(self, log_lines: List[str], analysis_type: str = "fast", progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Log satırları için anomali tahmini yap (senkron kullanım için)"""
+        return self.client.run_sync(
+            lambda: self.predict_async(log_lines, analysis_type=analysis_type, progress_callback=progress_callback)
+        )
+    
+    async def predict_async(self, log_lines: List[str], analysis_type: str = "fast", progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Bellekteki log satırları için anomali tahmini yap"""
+        return await self.predict_stream(records_from_lines(log_lines), analysis_type=analysis_type, progress_callback=progress_callback)
+    
+    def structure_window(self, log_parser: LogParser, window: List[LogRecord]):
+        """Pencereyi ayrıştır; şablon metinlerini ve satır başına yapısal alanları döndür"""
+        structured = log_parser.parse(window)
+        return log_parser.template_texts(structured), log_parser.row_details(structured)
+    
+    def triage_window(self, log_lines: List[str], line_clusters: List[int], miner: TemplateMiner):
+        """Pencerenin tüm satırlarını ucuz katmanlarla skorla; (kararlar, yerel model eşiği) döndür"""
+        scores = self.score_local(log_lines)
+        threshold = self.local_model.threshold()
+        hits = [keyword_matcher.scan(line) for line in log_lines]
+        sizes = [miner.clusters[cluster_id].size for cluster_id in line_clusters]
+        return self.cascade.triage(log_lines, hits, sizes, scores, threshold), threshold
+    
+    def cheap_verdict(self, line: str, decision: Optional[Triage], threshold: float) -> Dict:
+        """LLM'siz karar: yerel model skoru varsa kademeli karar, yoksa anahtar kelime kuralları"""
+        verdict = self.cascade.verdict(line, decision, threshold) if decision is not None else None
+        if verdict is not None:
+            return dict(verdict, verdict_source=CASCADE_SOURCE)
+        return dict(self.keyword_verdict(line), verdict_source="keyword")
+    
+    async def analyze_window(self, window: List[LogRecord], miner: TemplateMiner,
+                             template_verdicts: Dict[int, Dict[FrozenSet[str], Dict]],
+                             stats: Dict, progress_callback: Optional[Callable[[int, int], None]] = None,
+                             findings_callback: Optional[Callable[[List[Dict]], None]] = None,
+                             log_parser: Optional[LogParser] = None, budget: Optional[LLMBudget] = None) -> List[Dict]:
+        """Bir kayıt penceresini şablonlara ayırıp analiz et, satır sırasıyla zenginleştirilmiş sonuçları döndür
+        
+        ``miner`` ve ``template_verdicts`` pencereler arasında paylaşılır; önceki bir
+        pencerede kararı verilmiş şablonlar tekrar LLM'e gönderilmez. Kararlar şablon ve
+        satırın taşıdığı anahtar kelime sinyali (``FANOUT_SIGNAL_GROUPS``) başına tutulur. ``findings_callback``
+        verilirse anomaliler bulundukları anda (önbellekten gelenler hemen, LLM'in
+        bulduğu temsilciler batch tamamlanınca, şablondan yayılanlar pencere sonunda)
+        bildirilir; her anomali satırı yalnızca bir kez bildirilir. ``log_parser`` verilirse
+        pencere kolonlu yapıya çevrilir: şablonlar zaman damgası/host olmadan seviye +
+        program + mesaj üzerinden çıkarılır ve sonuçlara zaman damgası, seviye ve
+        tiplenmiş alanlar eklenir. Kademeli analiz açıksa temsilcilerden yalnızca ucuz
+        katmanların emin olamadığı ya da yüksek riskli bulduğu satırlar ``budget``
+        dahilinde LLM'e gider; kararı LLM'den gelmeyen şablonların satırları kendi
+        ucuz kararını alır.
+        """
+        log_lines = [line for _, line in window]
+        template_texts, details = log_lines, None
+        if log_parser is not None:
+            try:
+                template_texts, details = await asyncio.to_thread(self.structure_window, log_parser, window)
+            except Exception as e:
+                logger.warning(f"Pencere ayrıştırılamadı, ham satırlarla devam ediliyor: {str(e)}")
+        streamed = set()
+        
+        def emit_findings(indexed_verdicts):
+            findings = []
+            for idx, verdict in indexed_verdicts:
+                if idx in streamed or not verdict.get("is_anomaly", False):
+                    continue
+                streamed.add(idx)
+                cluster_id = line_clusters[idx]
+                finding = dict(verdict, line_number=window[idx][0], log_content=log_lines[idx],
+                               template_id=cluster_id, template=miner.clusters[cluster_id].template,
+                               **(details[idx] if details else {}))
+                findings.append(self.enrich_result(finding))
+            if findings:
+                findings_callback(findings)
+        
+        # Satırları şablon ve anahtar kelime sinyaline göre grupla; her yeni gruptan yalnızca birkaç temsilci LLM'e gider
+        line_clusters = [miner.add_log_message(text).cluster_id for text in template_texts]
+        line_signals = [keyword_matcher.scan(line) & FANOUT_SIGNAL_GROUPS for line in log_lines]
+        template_members: Dict[tuple, List[int]] = {}
+        for line_idx, group in enumerate(zip(line_clusters, line_signals)):
+            template_members.setdefault(group, []).append(line_idx)
+        
+        representative_idx = sorted(
+            idx
+            for (cluster_id, signal), members in template_members.items()
+            if signal not in template_verdicts.get(cluster_id, {})
+            for idx in self.select_representatives(members)
+        )
+        logger.info(
+            f"{len(log_lines)} satır {len(set(line_clusters))} şablonda {len(template_members)} gruba ayrıldı, "
+            f"{len(representative_idx)} temsilci satır seçildi"
+        )
+        
+        # Aynı normalize içeriğe sahip temsilciler tek sefer sorulur; önbellekte olanlar hiç sorulmaz
+        cache_keys = {idx: self.verdict_cache.make_key(log_lines[idx]) for idx in representative_idx} if self.verdict_cache else {}
+        cached = {}
+        if self.verdict_cache:
+            try:
+                cached = await asyncio.to_thread(self.verdict_cache.get_many, cache_keys.values())
+            except Exception as e:
+                logger.warning(f"LLM önbelleği okunamadı: {str(e)}")
+        
+        verdicts: Dict[int, Dict] = {}
+        llm_idx = []
+        pending_keys = set()
+        for idx in representative_idx:
+            key = cache_keys.get(idx)
+            if key in cached:
+                verdicts[idx] = dict(cached[key], verdict_source="cache")
+            elif key is None or key not in pending_keys:
+                llm_idx.append(idx)
+                if key is not None:
+                    pending_keys.add(key)
+        
+        # Ucuz katmanlar penceredeki her satırı skorlar; temsilcilerden yalnızca belirsiz ya da yüksek riskliler LLM'e gider
+        triage, threshold = None, 1.0
+        if self.cascade.enabled:
+            try:
+                triage, threshold = await asyncio.to_thread(self.triage_window, log_lines, line_clusters, miner)
+            except Exception as e:
+                logger.warning(f"Ucuz katman skorlaması başarısız, tüm temsilciler LLM'e gönderilecek: {str(e)}")
+        if triage is not None:
+            candidates = len(llm_idx)
+            # Bütçe sınırlıysa önce yüksek riskli, sonra eşiğe en yakın (en belirsiz) satırlar gönderilir
+            llm_idx = sorted((idx for idx in llm_idx if triage[idx].escalate), key=lambda idx: -triage[idx].priority)
+            logger.info(f"Kademeli analiz: {candidates} temsilciden {len(llm_idx)} tanesi LLM'e yükseltildi")
+        llm_lines = [log_lines[idx] for idx in llm_idx]
+        stats["cache_hits"] += len(verdicts)
+        if findings_callback:
+            emit_findings(sorted(verdicts.items()))
+        
+        # Batch işleme (token bütçesine göre paketlenmiş); istek bütçesini aşan batch'ler gönderilmez
+        batches = self.prompt_packer.pack(llm_lines)
+        remaining_calls = budget.remaining_calls() if budget else None
+        if remaining_calls is not None and len(batches) > remaining_calls:
+            budget.skipped_lines += sum(len(batch) for _, batch in batches[remaining_calls:])
+            batches = batches[:remaining_calls]
+        stats["llm_lines"] += sum(len(batch) for _, batch in batches)
+        logger.info(f"{len(verdicts)} temsilci önbellekten geldi, "
+                    f"{sum(len(batch) for _, batch in batches)} satır {len(batches)} LLM isteğine paketlendi")
+        batches_before = stats["batches_done"]
+        stats["batches_total"] += len(batches)
+        
+        def window_progress(completed: int, total: int):
+            stats["batches_done"] = batches_before + completed
+            if progress_callback:
+                progress_callback(stats["batches_done"], stats["batches_total"])
+        
+        def batch_findings(batch_idx: int, results: List[Dict]):
+            emit_findings((llm_idx[result["line_number"] - 1], result) for result in results)
+        
+        batch_results = await self.dispatch_batches(
+            batches,
+            progress_callback=window_progress,
+            batch_callback=batch_findings if findings_callback else None,
+            budget=budget
+        )
+        
+        # LLM kararlarını satır indeksine eşle, yeni kararları önbelleğe yaz
+        new_cache_entries = {}
+        for results in batch_results:
+            for result in results:
+                idx = llm_idx[result["line_number"] - 1]
+                verdicts[idx] = result
+                if result.get("verdict_source") == "llm" and idx in cache_keys:
+                    new_cache_entries[cache_keys[idx]] = result
+        if new_cache_entries:
+            try:
+                await asyncio.to_thread(self.verdict_cache.put_many, new_cache_entries)
+            except Exception as e:
+                logger.warning(f"LLM önbelleğine yazılamadı: {str(e)}")
+        
+        # Yeni şablonlar için karar yalnızca temsilciler uzlaşıyorsa yayılır: anomali bildiren en
+        # güvenilir temsilci, yoksa ilk temsilci. Çelişen temsilciler şablonun farklı olayları
+        # birleştirdiğini gösterir (ör. "Accepted password" / "Failed password"); o şablonun diğer
+        # satırları ucuz yoldan değerlendirilir ve sonraki pencerede temsilcileri yeniden sorulur
+        for (cluster_id, signal), members in template_members.items():
+            if signal in template_verdicts.get(cluster_id, {}):
+                continue
+            candidates = [verdicts[idx] for idx in members if idx in verdicts]
+            if not candidates:
+                continue
+            outcomes = {(bool(v.get("is_anomaly", False)), v.get("anomaly_type") if v.get("is_anomaly") else None)
+                        for v in candidates}
+            if len(outcomes) > 1:
+                stats["ambiguous_templates"] += 1
+                continue
+            anomalous = [v for v in candidates if v.get("is_anomaly", False)]
+            template_verdicts.setdefault(cluster_id, {})[signal] = (
+                max(anomalous, key=lambda v: v.get("confidence") or 0) if anomalous else candidates[0]
+            )
+        
+        # Kararları şablonun tüm satırlarına yay, satır sırasıyla birleştir
+        window_results = []
+        for line_idx, (line_number, line) in enumerate(window):
+            cluster_id = line_clusters[line_idx]
+            source = template_verdicts.get(cluster_id, {}).get(line_signals[line_idx])
+            if line_idx in verdicts:
+                result = verdicts[line_idx]
+            elif source is not None:
+                result = {field: source[field] for field in VERDICT_FIELDS if field in source}
+                # LLM hatası nedeniyle kurallardan gelen temsilci kararı yayıldığında kaynağı korunur
+                result["verdict_source"] = "template" if source.get("verdict_source") in ("llm", "cache") else source.get("verdict_source")
             else:
-                logger.info(f"Analiz türü: {analysis_type}, Sampling uygulanmıyor ({len(log_lines)} satır)")
+                # LLM'e yükseltilmeyen (ya da bütçe/hata nedeniyle yanıtı gelmeyen) şablonların satırları
+                result = self.cheap_verdict(line, triage[line_idx] if triage else None, threshold)
+                if result["verdict_source"] == CASCADE_SOURCE:
+                    stats["cascade_lines"] += 1
+            result["line_number"] = line_number
+            result["log_content"] = line
+            result["template_id"] = cluster_id
+            result["template"] = miner.clusters[cluster_id].template
+            if details:
+                result.update(details[line_idx])
+            window_results.append(self.enrich_result(result))
+        
+        if findings_callback:
+            # Şablondan yayılan anomaliler zaten zenginleştirildi, kalanlar olduğu gibi bildirilir
+            remaining = [
+                result for idx, result in enumerate(window_results)
+                if idx not in streamed and result.get("is_anomaly", False)
+            ]
+            if remaining:
+                findings_callback(remaining)
+        
+        return window_results
+    
+    async def predict_stream(self, records: Iterable[LogRecord], analysis_type: str = "fast", progress_callback: Optional[Callable[[int, int], None]] = None,
+                             findings_callback: Optional[Callable[[List[Dict]], None]] = None,
+                             log_parser: Optional[LogParser] = None,
+                             results_callback: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """(satır no, metin) akışı için anomali tahmini yap
+        
+        Hat aşamaları tembel çalışır: okuma -> sampling -> pencereleme -> şablon/önbellek ->
+        LLM -> zenginleştirme. Sampling tek geçişte sınırlı bellekle yapılır; sampling
+        uygulanmayan analizlerde akış ``window_size`` kayıtlık pencerelerle işlenir.
+        Dosya okuma ve sampling event loop'u bloklamamak için thread'de çalışır.
+        ``findings_callback`` ile anomaliler analiz bitmeden canlı olarak alınabilir.
+        ``log_parser`` verilmezse log biçimi akışın ilk kayıtlarından tespit edilir.
+        ``results_callback`` verilirse her pencerenin sonuçları ona (thread'de) verilir
+        ve dönüşte ``results`` yer almaz; bellekte yalnızca sayaçlar ve rapor toplamları
+        kalır. Şablon madencisi ``max_templates`` kümeyle sınırlıdır.
+        ``statistical`` analiz türü LLM'siz ``predict_statistical``'a yönlendirilir.
+        """
+        if analysis_type == STATISTICAL_ANALYSIS:
+            # İki geçişli analiz: bellekteki akış bir kez listeye alınır
+            records = list(records)
+            return await self.predict_statistical(records, lambda: records, progress_callback, findings_callback,
+                                                  log_parser)
+        try:
+            if log_parser is None:
+                records = iter(records)
+                head = await asyncio.to_thread(list, islice(records, DETECTION_SAMPLE_SIZE))
+                log_parser = LogParser.detect([line for _, line in head])
+                records = chain(head, records)
+            records = log_parser.records(records)
             
-            # Batch işleme (küçük batch size)
-            batch_size = 20
-            all_results = []
-            total_anomalies = 0
-            total_critical = 0
+            plan = self.sampling_plan(analysis_type)
+            if plan:
+                threshold, target_size = plan
+                sampled = await asyncio.to_thread(self.smart_sample_stream, records, threshold, target_size, log_parser)
+                logger.info(f"Analiz türü: {analysis_type}, sampling sonrası: {len(sampled)} satır")
+                windows = batched(sampled, max(self.window_size, target_size, threshold))
+            else:
+                logger.info(f"Analiz türü: {analysis_type}, sampling uygulanmıyor, {self.window_size} satırlık pencerelerle işleniyor")
+                windows = batched(records, self.window_size)
             
-            total_batches = (len(log_lines) + batch_size - 1) // batch_size
+            miner = TemplateMiner(max_clusters=self.max_templates)
+            template_verdicts: Dict[int, Dict[FrozenSet[str], Dict]] = {}  # şablon -> anahtar kelime sinyali -> karar
+            stats = {"cache_hits": 0, "llm_lines": 0, "cascade_lines": 0, "ambiguous_templates": 0,
+                     "batches_done": 0, "batches_total": 0}
+            # Örneklenmeyen fast/detailed analizlerde türün istek bütçesi geçerlidir
+            budget = self.cascade.budget(None if plan else analysis_type)
+            aggregate = ReportAggregate(finding_fields=("line_number",) if results_callback else None)
+            all_results = [] if results_callback is None else None
+            total_lines = 0
             
-            for batch_idx, i in enumerate(range(0, len(log_lines), batch_size)):
-                batch = log_lines[i:i + batch_size]
-                progress = ((batch_idx + 1) / total_batches) * 100
-                
-                logger.info(f"Batch {batch_idx + 1}/{total_batches} işleniyor... ({progress:.1f}%)")
-                
-                # Prompt oluştur
-                prompt = self.create_analysis_prompt(batch)
-                
-                # LLM çağrısı
-                llm_response = self.call_ollama(prompt)
-                
-                if llm_response["status"] == "error":
-                    logger.error(f"Batch {batch_idx + 1} LLM hatası: {llm_response['message']}")
-                    continue
-                
-                # Yanıtı parse et
-                parsed_result = self.parse_llm_response(llm_response["response"])
+            while True:
+                window = await asyncio.to_thread(next, windows, None)
+                if window is None:
+                    break
+                total_lines += len(window)
+                logger.info(f"LLM ile anomali analizi: {len(window)} satırlık pencere (toplam {total_lines})")
                 
-                # Batch sonuçlarını ekle
-                if "results" in parsed_result:
-                    for result in parsed_result["results"]:
-                        # Line number'ları düzelt (1-based to 0-based)
-                        batch_line_idx = result.get("line_number", 1) - 1
-                        global_line_number = i + batch_line_idx + 1
-                        
-                        result["line_number"] = global_line_number
-                        result["log_content"] = batch[batch_line_idx] if 0 <= batch_line_idx < len(batch) else ""
-                        
-                        if result.get("is_anomaly", False):
-                            total_anomalies += 1
-                            
-                            # MITRE teknik ekle
-                            mitre_technique = self.get_mitre_technique(
-                                result.get("log_content", ""), 
-                                result.get("explanation", "")
-                            )
-                            result["mitre_technique"] = mitre_technique
-                            
-                            # Enhanced severity hesaplama
-                            enhanced_severity = self.calculate_enhanced_severity(
-                                result.get("log_content", ""),
-                                result.get("explanation", ""),
-                                mitre_technique
-                            )
-                            result["severity"] = enhanced_severity  # Override original severity
-                            
-                            # Critical count'u enhanced severity'ye göre hesapla
-                            if enhanced_severity == "critical":
-                                total_critical += 1
-                            
-                            # Aksiyon önerileri
-                            actions = self.generate_action_recommendations(
-                                mitre_technique, 
-                                enhanced_severity,
-                                result.get("log_content", "")
-                            )
-                            result["recommended_actions"] = actions
-                        
-                        all_results.append(result)
+                window_results = await self.analyze_window(window, miner, template_verdicts, stats, progress_callback,
+                                                           findings_callback, log_parser, budget)
+                self.add_to_report(aggregate, window_results)
+                if results_callback:
+                    await asyncio.to_thread(results_callback, window_results)
+                else:
+                    all_results.extend(window_results)
+                # Şablon sınırı aşıldıysa en uzun süredir görülmeyenler kararlarıyla birlikte unutulur
+                for cluster_id in miner.trim():
+                    template_verdicts.pop(cluster_id, None)
+            
+            if total_lines == 0:
+                return {"status": "error", "message": "Log satırları boş"}
+            total_anomalies = aggregate.total_anomalies
+            total_critical = aggregate.severity_count["critical"]
             
             # Güvenli rapor oluştur (hata ayıklama için basitleştirildi)
             try:
-                report = self.generate_security_report(all_results, log_lines)
+                report = self.build_security_report(aggregate, total_lines)
+                report["llm_usage"] = dict(budget.summary(), llm_lines=stats["llm_lines"], cache_hits=stats["cache_hits"],
+                                           cascade_lines=stats["cascade_lines"], ambiguous_templates=stats["ambiguous_templates"],
+                                           cascade_enabled=self.cascade.enabled)
             except Exception as e:
                 logger.error(f"Security report hatası: {str(e)}")
                 report = {"error": "Security report oluşturulamadı"}
+            logger.info(f"LLM kullanımı: {budget.calls} istek, {budget.seconds:.1f} sn, {stats['llm_lines']} satır; "
+                        f"{stats['cascade_lines']} satır ucuz katmanlarla karara bağlandı")
             
-            # Güvenli confidence score hesapla
-            try:
-                confidence_score = self.calculate_confidence_score(all_results)
-            except Exception as e:
-                logger.error(f"Confidence score hatası: {str(e)}")
-                confidence_score = 0.5
-            
-            return {
+            analysis = {
                 "status": "success",
-                "total_lines": len(log_lines),
+                "total_lines": total_lines,
                 "anomaly_count": total_anomalies,
                 "critical_count": total_critical,
-                "anomaly_rate": total_anomalies / len(log_lines) if len(log_lines) > 0 else 0,
-                "confidence_score": confidence_score,
-                "results": all_results,
+                "anomaly_rate": total_anomalies / total_lines if total_lines > 0 else 0,
+                "confidence_score": aggregate.confidence_score(),
+                "template_count": miner.cluster_count,
+                "llm_line_count": stats["llm_lines"],
+                "llm_call_count": budget.calls,
+                "cascade_line_count": stats["cascade_lines"],
+                "cache_hits": stats["cache_hits"],
                 "security_report": report
             }
+            if all_results is not None:
+                analysis["results"] = all_results
+            return analysis
             
         except Exception as e:
             logger.error(f"LLM prediction hatası: {str(e)}")
             return {"status": "error", "message": str(e)}
     
-    def train_model(self, log_lines: List[str], labels: Optional[List[int]] = None):
-        """LLM için eğitim gerekmiyor, sadece uyumluluk için"""
-        logger.info("LLM tabanlı sistem için model eğitimi gerekmiyor")
+    async def predict_statistical(self, records: Iterable[LogRecord], reread: Callable[[], Iterable[LogRecord]],
+                                  progress_callback: Optional[Callable[[int, int], None]] = None,
+                                  findings_callback: Optional[Callable[[List[Dict]], None]] = None,
+                                  log_parser: Optional[LogParser] = None,
+                                  report_from_line: Optional[int] = None) -> Dict:
+        """LLM kullanmadan zaman/şablon sayımlarıyla ani artış ve hız değişimi analizi
+        
+        ``records`` birinci geçişte okunur, ``reread`` yalnızca işaretli satırların
+        metinleri için kaydı yeniden üretir; ``report_from_line`` öncesi yalnızca taban
+        çizgisi içindir (bkz. ``StatisticalDetector.analyze``).
+        Sonuçlar yalnızca anomali satırlarını içerir; hız bulguları raporun
+        ``rate_anomalies`` bölümüne yazılır. Analiz thread'de çalışır.
+        """
+        try:
+            if log_parser is None:
+                head = await asyncio.to_thread(lambda: [line for _, line in islice(reread(), DETECTION_SAMPLE_SIZE)])
+                log_parser = LogParser.detect(head)
+            loop = asyncio.get_running_loop()
+            
+            def report_progress(done: int, total: int):
+                if progress_callback:
+                    loop.call_soon_threadsafe(progress_callback, done, total)
+            
+            analysis = await asyncio.to_thread(self.run_statistical, records, reread, log_parser, report_progress,
+                                               report_from_line)
+            if analysis["status"] == "success" and findings_callback and analysis["results"]:
+                findings_callback(analysis["results"])
+            return analysis
+        except Exception as e:
+            logger.error(f"İstatistiksel analiz hatası: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
+    def run_statistical(self, records: Iterable[LogRecord], reread: Callable[[], Iterable[LogRecord]],
+                        log_parser: LogParser, progress_callback: Callable[[int, int], None],
+                        report_from_line: Optional[int] = None) -> Dict:
+        analysis = statistical_detector.analyze(records, reread, log_parser, progress_callback, report_from_line)
+        total_lines = analysis["total_lines"]
+        if total_lines == 0:
+            return {"status": "error", "message": "Log satırları boş"}
+        
+        results = []
+        for result in analysis["results"]:
+            # İstatistiksel şiddet, içerik tabanlı şiddetten düşükse korunur
+            severity = result["severity"]
+            result = self.enrich_result(result)
+            if SEVERITY_ORDER.index(severity) > SEVERITY_ORDER.index(result["severity"]):
+                result["severity"] = severity
+            results.append(result)
+        total_critical = sum(1 for result in results if result["severity"] == "critical")
+        # Sonuçlarda yalnızca anomaliler var; normal satırlar calculate_confidence_score'daki gibi 85 sayılır
+        confidence_score = round((self.calculate_confidence_score(results) * len(results)
+                                  + 85 * (total_lines - len(results))) / total_lines, 1)
+        
+        try:
+            report = self.generate_security_report(results, total_logs=total_lines)
+            report["rate_anomalies"] = analysis["findings"]
+            report["analysis_methodology"] = {
+                "ai_model": "İstatistiksel motor (LLM kullanılmadı)",
+                "analysis_criteria": [
+                    f"{analysis['bucket_seconds']} saniyelik aralıklarda şablon başına olay sayısı"
+                    if analysis["bucket_seconds"] else "Sabit satır sayılı bloklarda şablon başına olay sayısı",
+                    f"Önceki {statistical_detector.window} aralığa göre kayan z skoru",
+                    f"EWMA (alpha={statistical_detector.ewma_alpha}) z skoru",
+                    "ERROR/CRITICAL oranı (binom z skoru)",
+                ],
+                "detection_patterns": [
+                    "Ani artış (burst)",
+                    "Kalıcı hız değişimi",
+                    "Hata oranı artışı",
+                    "Toplam hacim artışı/düşüşü",
+                ]
+            }
+        except Exception as e:
+            logger.error(f"Security report hatası: {str(e)}")
+            report = {"error": "Security report oluşturulamadı"}
+        
         return {
             "status": "success",
-            "message": "LLM hazır, eğitim gerekmiyor",
-            "training_samples": len(log_lines) if log_lines else 0
+            "total_lines": total_lines,
+            "anomaly_count": len(results),
+            "critical_count": total_critical,
+            "anomaly_rate": len(results) / total_lines,
+            "confidence_score": confidence_score,
+            "template_count": analysis["template_count"],
+            "llm_line_count": 0,
+            "cache_hits": 0,
+            "results": results,
+            "security_report": report
         }
     
-    def save_model(self):
-        """LLM için model kaydetme gerekmiyor"""
-        return True
+    def train_model(self, log_lines: List[str], labels: Optional[List[int]] = None):
+        """Yerel anomali modelini satırlarla artımlı eğit (``labels``: 1 = anomali, eğitime alınmaz)
+        
+        LLM eğitim gerektirmez; yerel model kapalıysa yalnızca uyumluluk için başarı döner.
+        Model yeniden kurulduysa yeni sürüm ``models/`` dizinine kaydedilir.
+        """
+        if not self.local_model.enabled:
+            return {
+                "status": "success",
+                "message": "LLM hazır, eğitim gerekmiyor",
+                "training_samples": len(log_lines) if log_lines else 0
+            }
+        try:
+            training = self.local_model.learn(log_lines or [], labels)
+            if training["refit"]:
+                self.save_model()
+            self.is_trained = self.local_model.trained
+            return {
+                "status": "success",
+                "message": f"Yerel model eğitildi (sürüm {training['version']})" if training["refit"]
+                           else "Eğitim geçmişi güncellendi",
+                "training_samples": training["training_samples"],
+                "model_version": training["version"]
+            }
+        except Exception as e:
+            logger.error(f"Yerel model eğitim hatası: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
+    def save_model(self) -> bool:
+        """Yerel modeli sürüm numarasıyla models/ dizinine kaydet"""
+        try:
+            return self.local_model.save()
+        except Exception as e:
+            logger.error(f"Yerel model kaydedilemedi: {str(e)}")
+            return False
     
     def load_model(self) -> bool:
-        """LLM hazır mı kontrol et"""
-        return self.is_ready
+        """Kaydedilmiş son yerel model sürümünü yükle"""
+        self.is_trained = self.local_model.load()
+        return self.is_trained
+    
+    def score_local(self, log_lines: List[str]):
+        """Yerel modelle satır başına anomali skoru (0-1); model yeterince eğitilmemişse None"""
+        if not self.local_model_ready():
+            return None
+        return self.local_model.score(log_lines)
     
     def get_mitre_technique(self, log_content: str, explanation: str) -> Dict:
         """Log içeriğine göre MITRE ATT&CK tekniği belirle"""
-        # None kontrolü ekle
-        content_lower = (log_content or "").lower()
-        explanation_lower = (explanation or "").lower()
-        
-        # MITRE ATT&CK teknik mapping'i
-        mitre_patterns = {
-            "T1110": {  # Brute Force
-                "name": "Brute Force",
-                "tactic": "Credential Access",
-                "patterns": ["failed login", "authentication failed", "invalid password", "login attempt", "brute force"]
-            },
-            "T1190": {  # Exploit Public-Facing Application
-                "name": "Exploit Public-Facing Application", 
-                "tactic": "Initial Access",
-                "patterns": ["sql injection", "xss", "code injection", "exploit", "vulnerability"]
-            },
-            "T1083": {  # File and Directory Discovery
-                "name": "File and Directory Discovery",
-                "tactic": "Discovery", 
-                "patterns": ["directory traversal", "file access", "path disclosure", "directory listing"]
-            },
-            "T1005": {  # Data from Local System
-                "name": "Data from Local System",
-                "tactic": "Collection",
-                "patterns": ["data exfil", "sensitive data", "file download", "data extraction"]
-            },
-            "T1498": {  # Network Denial of Service
-                "name": "Network Denial of Service",
-                "tactic": "Impact",
-                "patterns": ["ddos", "dos attack", "flood", "overload", "exhausted"]
-            },
-            "T1055": {  # Process Injection
-                "name": "Process Injection",
-                "tactic": "Defense Evasion",
-                "patterns": ["malware", "trojan", "virus", "suspicious process", "injection"]
-            },
-            "T1078": {  # Valid Accounts
-                "name": "Valid Accounts", 
-                "tactic": "Persistence",
-                "patterns": ["privilege escalation", "unauthorized access", "admin access", "elevated privileges"]
-            },
-            "T1046": {  # Network Service Scanning
-                "name": "Network Service Scanning",
-                "tactic": "Discovery",
-                "patterns": ["port scan", "network scan", "service discovery", "reconnaissance"]
+        # Pattern matching (None değerler eşleştiricide atlanır)
+        group = keyword_matcher.first_group(keyword_matcher.match(log_content, explanation), MITRE_GROUPS)
+        if group:
+            technique_id = group.split(":", 1)[1]
+            technique_info = MITRE_TECHNIQUES[technique_id]
+            return {
+                "technique_id": technique_id,
+                "technique_name": technique_info["name"],
+                "tactic": technique_info["tactic"],
+                "confidence": 0.8
             }
-        }
-        
-        # Pattern matching
-        for technique_id, technique_info in mitre_patterns.items():
-            for pattern in technique_info["patterns"]:
-                if pattern in content_lower or pattern in explanation_lower:
-                    return {
-                        "technique_id": technique_id,
-                        "technique_name": technique_info["name"],
-                        "tactic": technique_info["tactic"],
-                        "confidence": 0.8
-                    }
         
         return {
             "technique_id": "T1000", 
@@ -450,9 +1009,9 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
     
     def calculate_enhanced_severity(self, log_content: str, explanation: str, mitre_technique: Dict) -> str:
         """Gelişmiş severity hesaplama - MITRE teknik + etki alanına göre"""
-        # None kontrolü ekle
-        content_lower = (log_content or "").lower()
-        explanation_lower = (explanation or "").lower()
+        content_hits = keyword_matcher.match(log_content)
+        explanation_hits = keyword_matcher.match(explanation)
+        hits = content_hits | explanation_hits
         technique_id = mitre_technique.get("technique_id", "")
         
         severity_score = 0
@@ -470,31 +1029,21 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
             severity_score += 10
         
         # Keyword-based severity boost
-        critical_keywords = ["critical", "breach", "compromise", "malware", "exfiltration", "injection"]
-        high_keywords = ["failed", "denied", "attack", "intrusion", "unauthorized", "exploit"]
-        medium_keywords = ["warning", "error", "timeout", "blocked"]
-        
-        for keyword in critical_keywords:
-            if keyword in content_lower or keyword in explanation_lower:
-                severity_score += 30
-                break
-        
-        for keyword in high_keywords:
-            if keyword in content_lower or keyword in explanation_lower:
-                severity_score += 20
-                break
+        if "severity:critical" in hits:
+            severity_score += 30
+        
+        if "severity:high" in hits:
+            severity_score += 20
                 
-        for keyword in medium_keywords:
-            if keyword in content_lower or keyword in explanation_lower:
-                severity_score += 10
-                break
+        if "severity:medium" in hits:
+            severity_score += 10
         
         # Frequency/rate based adjustment (multiple events)
-        if any(freq_word in explanation_lower for freq_word in ["multiple", "repeated", "frequent", "burst"]):
+        if "severity:frequency" in explanation_hits:
             severity_score += 15
         
         # System impact assessment
-        if any(sys_word in content_lower for sys_word in ["database", "server", "admin", "root", "system"]):
+        if "severity:system" in content_hits:
             severity_score += 10
         
         # Final severity determination
@@ -561,91 +1110,84 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
         
         return recommendations
     
+    def result_confidence(self, result: Dict) -> int:
+        """Tek sonucun güven puanı (eşleşen kural/pattern sayısına göre)"""
+        if not result.get("is_anomaly"):
+            # Normal logs have higher confidence
+            return 85
+        
+        # Açıklama detayına göre güven skoru hesapla
+        hits = keyword_matcher.match(result.get("explanation", ""))
+        confidence = 50  # Base confidence
+        
+        # Specific patterns increase confidence
+        if "confidence:error" in hits:
+            confidence += 20
+        if "confidence:attack" in hits:
+            confidence += 25
+        if "confidence:severe" in hits:
+            confidence += 15
+        
+        # Severity based confidence adjustment
+        severity = result.get("severity", "medium")
+        if severity == "critical":
+            confidence += 10
+        elif severity == "high":
+            confidence += 5
+        
+        return min(confidence, 100)
+    
     def calculate_confidence_score(self, analysis_results: List[Dict]) -> float:
         """Analiz güven skoru hesapla (eşleşen kural/pattern sayısına göre)"""
         if not analysis_results:
             return 0.0
-        
-        # Anomali tespitlerinin güven skorlarını hesapla
-        total_confidence = 0
-        valid_results = 0
-        
+        return round(sum(self.result_confidence(result) for result in analysis_results) / len(analysis_results), 1)
+    
+    def anomaly_category(self, result: Dict) -> str:
+        group = keyword_matcher.first_group(
+            keyword_matcher.match(result.get("log_content", ""), result.get("explanation", "")),
+            CATEGORY_GROUPS
+        )
+        return group.split(":", 1)[1] if group else "other"
+    
+    def add_to_report(self, aggregate: ReportAggregate, analysis_results: Iterable[Dict]):
+        """Sonuçları rapor toplamlarına ekle"""
         for result in analysis_results:
-            if result.get("is_anomaly"):
-                # Açıklama detayına göre güven skoru hesapla
-                explanation = result.get("explanation", "").lower()
-                confidence = 50  # Base confidence
-                
-                # Specific patterns increase confidence
-                if any(keyword in explanation for keyword in ["error", "failed", "denied", "blocked"]):
-                    confidence += 20
-                if any(keyword in explanation for keyword in ["attack", "malware", "intrusion", "breach"]):
-                    confidence += 25
-                if any(keyword in explanation for keyword in ["critical", "severe", "high"]):
-                    confidence += 15
-                
-                # Severity based confidence adjustment
-                severity = result.get("severity", "medium")
-                if severity == "critical":
-                    confidence += 10
-                elif severity == "high":
-                    confidence += 5
-                
-                total_confidence += min(confidence, 100)
-                valid_results += 1
-            else:
-                # Normal logs have higher confidence
-                total_confidence += 85
-                valid_results += 1
-        
-        return round(total_confidence / valid_results, 1) if valid_results > 0 else 0.0
+            aggregate.result_count += 1
+            aggregate.confidence_sum += self.result_confidence(result)
+            if not result.get("is_anomaly"):
+                continue
+            aggregate.total_anomalies += 1
+            
+            # Severity sayısını artır
+            severity = result.get("severity", "medium")
+            if severity in aggregate.severity_count:
+                aggregate.severity_count[severity] += 1
+            
+            # Kategorilere ayır
+            finding = result if aggregate.finding_fields is None else {
+                field: result.get(field) for field in aggregate.finding_fields
+            }
+            aggregate.categorized.setdefault(self.anomaly_category(result), []).append(finding)
     
-    def generate_security_report(self, analysis_results: List[Dict], log_lines: List[str]) -> Dict:
-        """Kapsamlı güvenlik analiz raporu oluştur"""
+    def generate_security_report(self, analysis_results: List[Dict], log_lines: Optional[List[str]] = None, total_logs: Optional[int] = None) -> Dict:
+        """Kapsamlı güvenlik analiz raporu oluştur (toplam log sayısı ``total_logs`` ile de verilebilir)"""
+        if total_logs is None:
+            total_logs = len(log_lines) if log_lines else 0
+        aggregate = ReportAggregate()
+        self.add_to_report(aggregate, analysis_results)
+        return self.build_security_report(aggregate, total_logs)
+    
+    def build_security_report(self, aggregate: ReportAggregate, total_logs: int) -> Dict:
+        """Akış halinde toplanan değerlerden güvenlik raporunu oluştur"""
         from datetime import datetime
         
-        # Anomali türlerini kategorize et
-        attack_categories = {
-            "authentication": ["login", "auth", "password", "token", "credential"],
-            "network": ["connection", "timeout", "network", "dns", "port"],
-            "system": ["memory", "disk", "cpu", "process", "service"],
-            "database": ["sql", "database", "query", "connection"],
-            "access_control": ["permission", "denied", "unauthorized", "forbidden"],
-            "data_breach": ["breach", "leak", "exposure", "sensitive"],
-            "malware": ["virus", "malware", "trojan", "suspicious"],
-            "dos_attacks": ["flood", "overload", "exhausted", "limit"]
-        }
-        
-        # Anomalileri kategorize et
-        categorized_anomalies = {category: [] for category in attack_categories}
-        severity_count = {"critical": 0, "high": 0, "medium": 0, "low": 0}
-        
-        for result in analysis_results:
-            if result.get("is_anomaly"):
-                message = result.get("log_content", "").lower()
-                explanation = result.get("explanation", "").lower()
-                severity = result.get("severity", "medium")
-                
-                # Severity sayısını artır
-                if severity in severity_count:
-                    severity_count[severity] += 1
-                
-                # Kategorilere ayır
-                categorized = False
-                for category, keywords in attack_categories.items():
-                    if any(keyword in message or keyword in explanation for keyword in keywords):
-                        categorized_anomalies[category].append(result)
-                        categorized = True
-                        break
-                
-                if not categorized:
-                    if "other" not in categorized_anomalies:
-                        categorized_anomalies["other"] = []
-                    categorized_anomalies["other"].append(result)
+        categorized_anomalies = aggregate.categorized
+        severity_count = aggregate.severity_count
         
         # Risk skoru hesapla
-        total_anomalies = len([r for r in analysis_results if r.get("is_anomaly")])
-        risk_score = self.calculate_risk_score(severity_count, total_anomalies, len(log_lines))
+        total_anomalies = aggregate.total_anomalies
+        risk_score = self.calculate_risk_score(severity_count, total_anomalies, total_logs)
         
         # Öneriler oluştur
         recommendations = self.generate_recommendations(categorized_anomalies, severity_count)
@@ -656,7 +1198,7 @@ Anomali kriterleri: ERROR, CRITICAL, FAIL, EXCEPTION kelimelerini ara."""
         report = {
             "timestamp": datetime.now().isoformat(),
             "summary": {
-                "total_logs": len(log_lines),
+                "total_logs": total_logs,
                 "total_anomalies": total_anomalies,
                 "risk_score": risk_score,
                 "risk_level": self.get_risk_level(risk_score),
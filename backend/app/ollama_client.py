@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """Ollama çağrıları için basit devre kesici (closed -> open -> half_open)
+
+    half_open durumunda aynı anda yalnızca tek bir deneme çağrısına izin verilir;
+    deneme sonuçlanana (``record_success``/``record_failure``/``end_trial``) kadar
+    diğer çağrılar reddedilir. Durum farklı thread'lerdeki event loop'lardan
+    değiştirilebildiği için kilitle korunur.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[bool]:
+        """Çağrıya izin ver: None reddedildi, True half_open deneme çağrısı, False normal çağrı"""
+        with self._lock:
+            if self.state == "closed":
+                return False
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return None
+                # Bekleme süresi doldu, tek bir deneme çağrısına izin ver
+                self.state = "half_open"
+            if self.trial_in_flight:
+                return None
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failure_count = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+            self.trial_in_flight = False
+            if self.state == "half_open" or self.failure_count >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Ollama devre kesici açıldı ({self.failure_count} ardışık hata)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def end_trial(self):
+        """Sonuçsuz biten (ör. iptal edilen) deneme çağrısının yerini bir sonrakine bırak"""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class OllamaClient:
+    """Bağlantı havuzu, yeniden deneme ve devre kesici içeren asenkron Ollama istemcisi"""
+
+    # Bu durum kodlarında istek tekrar denenir
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 4,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # Bağlantı havuzu bir event loop'a bağlıdır; her loop kendi istemcisini kullanır
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Çalışan event loop'a bağlı, keep-alive bağlantı havuzlu istemciyi döndür"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Kapanmış loop'ların istemcileri artık kapatılamaz, yalnızca bırakılır
+            for stale_loop in [stale for stale in self._clients if stale.is_closed()]:
+                del self._clients[stale_loop]
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter ile üstel bekleme süresi"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def generate(self, model: str, prompt: str, options: Optional[Dict] = None) -> Dict:
+        """/api/generate çağrısı yap, {"status": ..., "response"/"message": ...} döndür"""
+        is_trial = self.circuit_breaker.acquire()
+        if is_trial is None:
+            return {"status": "error", "message": "Ollama devre kesici açık, istek gönderilmedi"}
+        if not is_trial:
+            return await self._generate(model, prompt, options)
+
+        try:
+            return await self._generate(model, prompt, options)
+        finally:
+            # Deneme çağrısı başarı/hata kaydı olmadan bittiyse (istemci hatası, iptal) yerini bir sonrakine bırak
+            self.circuit_breaker.end_trial()
+
+    async def _generate(self, model: str, prompt: str, options: Optional[Dict]) -> Dict:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": options or {},
+        }
+
+        last_error = "Bilinmeyen hata"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._get_client().post("/api/generate", json=payload)
+                if response.status_code == 200:
+                    self.circuit_breaker.record_success()
+                    return {"status": "success", "response": response.json().get("response", "")}
+
+                last_error = f"API hatası: {response.status_code}"
+                if response.status_code not in self.RETRYABLE_STATUS_CODES:
+                    # İstemci hatası, tekrar denemenin anlamı yok
+                    return {"status": "error", "message": last_error}
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = f"Bağlantı hatası: {str(e) or type(e).__name__}"
+
+            if attempt < self.max_retries:
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Ollama isteği başarısız ({last_error}), {delay:.2f}s sonra tekrar denenecek")
+                await asyncio.sleep(delay)
+
+        self.circuit_breaker.record_failure()
+        return {"status": "error", "message": last_error}
+
+    async def aclose(self):
+        """Çalışan event loop'un bağlantı havuzunu kapat"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def run_sync(self, coro_factory: Callable[[], Awaitable[T]]) -> T:
+        """Coroutine'i senkron çalıştır; bu çalıştırma için açılan bağlantı havuzu sonunda kapatılır
+
+        Çağıran thread'de çalışan bir event loop varsa (orada ``asyncio.run``
+        kullanılamaz) coroutine ayrı bir thread'de kendi loop'unda çalıştırılır ve
+        çağıran bitene kadar bekler; event loop içinden async sürümler tercih edilmelidir.
+        """
+        async def runner() -> T:
+            try:
+                return await coro_factory()
+            finally:
+                await self.aclose()
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(runner())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(lambda: asyncio.run(runner())).result()
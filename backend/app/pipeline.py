@@ -0,0 +1,59 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Analiz hattında taşınan kayıt: (dosyadaki 1-tabanlı satır numarası, satır metni)
+LogRecord = Tuple[int, str]
+
+
+def read_log_lines(file_path: str) -> Iterator[LogRecord]:
+    """Dosyayı satır satır oku; boş satırları atlayarak (satır no, metin) üret
+
+    Dosya hiçbir zaman tamamen belleğe alınmaz.
+    """
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line_number, line in enumerate(f, 1):
+            stripped = line.strip()
+            if stripped:
+                yield line_number, stripped
+
+
+def read_log_range(file_path: str, start_offset: int = 0, end_offset: Optional[int] = None,
+                   first_line: int = 1) -> Iterator[LogRecord]:
+    """Dosyanın [start_offset, end_offset) byte aralığını satır satır oku
+
+    ``start_offset`` bir satır başı olmalıdır; satır numaraları ``first_line``'dan
+    başlar. Artımlı analizde yalnızca dosyaya sonradan eklenen kısım okunur.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        position = start_offset
+        line_number = first_line
+        while end_offset is None or position < end_offset:
+            raw = f.readline() if end_offset is None else f.readline(end_offset - position)
+            if not raw:
+                break
+            position += len(raw)
+            stripped = raw.decode("utf-8", errors="ignore").strip()
+            if stripped:
+                yield line_number, stripped
+            line_number += 1
+
+
+def records_from_lines(log_lines: Iterable[str]) -> Iterator[LogRecord]:
+    """Bellekteki satır listesini analiz hattı kayıtlarına çevir"""
+    for line_number, line in enumerate(log_lines, 1):
+        stripped = line.strip()
+        if stripped:
+            yield line_number, stripped
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Akışı en fazla ``size`` elemanlı listelere böl"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,66 @@
+import math
+from typing import List, Tuple
+
+
+class PromptPacker:
+    """Log satırlarını token bütçesine göre batch'lere yerleştirir
+
+    Her satırın token sayısı karakter uzunluğundan tahmin edilir; çok uzun
+    satırlar prompt içinde kısaltılır. Her satır mutlaka bir batch'e girer,
+    hiçbir satır atlanmaz.
+    """
+
+    TRUNCATION_MARKER = " …[kısaltıldı]"
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        max_line_tokens: int = 128,
+        max_lines_per_batch: int = 80,
+        chars_per_token: float = 4.0,
+    ):
+        self.token_budget = token_budget
+        self.max_line_tokens = max_line_tokens
+        self.max_lines_per_batch = max_lines_per_batch
+        self.chars_per_token = chars_per_token
+
+    def estimate_tokens(self, text: str) -> int:
+        """Metnin yaklaşık token sayısı (satır numarası öneki dahil)"""
+        return math.ceil(len(text) / self.chars_per_token) + 2
+
+    def truncate_line(self, line: str) -> str:
+        """Token limitini aşan satırı prompt için kısalt"""
+        max_chars = int(self.max_line_tokens * self.chars_per_token)
+        if len(line) <= max_chars:
+            return line
+        return line[:max_chars - len(self.TRUNCATION_MARKER)] + self.TRUNCATION_MARKER
+
+    def pack(self, log_lines: List[str]) -> List[Tuple[int, List[str]]]:
+        """Satırları (başlangıç indeksi, batch) listesine böl
+
+        Batch'ler orijinal satırları içerir; prompt'a yazılırken ``truncate_line``
+        uygulanır. Kısaltılmış hali tek başına bütçeyi aşan satır bile kendi
+        batch'ine yerleştirilir.
+        """
+        batches = []
+        current: List[str] = []
+        current_tokens = 0
+        start = 0
+
+        for i, line in enumerate(log_lines):
+            line_tokens = self.estimate_tokens(self.truncate_line(line))
+            if current and (
+                current_tokens + line_tokens > self.token_budget
+                or len(current) >= self.max_lines_per_batch
+            ):
+                batches.append((start, current))
+                current = []
+                current_tokens = 0
+                start = i
+            current.append(line)
+            current_tokens += line_tokens
+
+        if current:
+            batches.append((start, current))
+
+        return batches
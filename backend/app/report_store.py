@@ -0,0 +1,118 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+import zstandard
+
+from .database import AnalysisResult, LogEntry, LogFile
+from .results_store import entry_to_result
+
+# Saklama biçimi: dış katman {bölüm adı: zstd(msgpack(bölüm))} şeklinde bir msgpack
+# haritasıdır. Okurken yalnızca istenen bölümlerin sıkıştırması açılır.
+FORMAT_VERSION = 1
+FORMAT_KEY = "_v"
+REPORT_FINDINGS_SECTION = "detailed_findings"
+RESULTS_SECTION = "results"
+ZSTD_LEVEL = 3
+
+# Rapor listesinde varsayılan olarak döndürülen bölümler (ayrıntılı bulgular hariç)
+REPORT_LIST_SECTIONS = ("timestamp", "summary", "attack_categories", "potential_attacks",
+                        "recommendations", "analysis_methodology", "rate_anomalies", "llm_usage")
+
+# SQLite parametre limitini aşmamak için IN sorgusu parça boyutu
+LOOKUP_CHUNK_SIZE = 500
+
+
+def pack_sections(sections: Dict[str, Any]) -> bytes:
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    container = {
+        name: compressor.compress(msgpack.packb(value, use_bin_type=True, default=str))
+        for name, value in sections.items()
+    }
+    container[FORMAT_KEY] = FORMAT_VERSION
+    return msgpack.packb(container, use_bin_type=True)
+
+
+def unpack_sections(blob: bytes, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """İstenen bölümleri (``names`` verilmezse tümünü) çöz"""
+    container = msgpack.unpackb(blob, raw=False)
+    container.pop(FORMAT_KEY, None)
+    wanted = container.keys() if names is None else [name for name in names if name in container]
+    decompressor = zstandard.ZstdDecompressor()
+    return {
+        name: msgpack.unpackb(decompressor.decompress(container[name]), raw=False)
+        for name in wanted
+    }
+
+
+def encode_report(report: Dict) -> bytes:
+    """Güvenlik raporunu sıkıştır; ``detailed_findings`` anomalilerin kopyası yerine satır numaralarını tutar"""
+    sections = dict(report)
+    findings = sections.get(REPORT_FINDINGS_SECTION)
+    if isinstance(findings, dict):
+        sections[REPORT_FINDINGS_SECTION] = {
+            category: [finding.get("line_number") for finding in category_findings]
+            for category, category_findings in findings.items()
+        }
+    return pack_sections(sections)
+
+
+def parse_sections(sections: Optional[str], default: Optional[Iterable[str]] = None) -> Optional[List[str]]:
+    """Virgülle ayrılmış bölüm listesini çöz; boşsa varsayılanı döndür (None = tüm bölümler)"""
+    if not sections:
+        return list(default) if default is not None else None
+    if sections == "all":
+        return None
+    return [name.strip() for name in sections.split(",") if name.strip()]
+
+
+def has_report(log_file: LogFile) -> bool:
+    return log_file.security_report_blob is not None or log_file.security_report_json is not None
+
+
+def resolve_findings(db, log_file_id: int, refs: Dict[str, List[int]]) -> Dict[str, List[Dict]]:
+    """Satır numarası referanslarını log_entries'teki sonuçlarla değiştir"""
+    line_numbers = sorted({line for lines in refs.values() for line in lines if line is not None})
+    by_line: Dict[int, Dict] = {}
+    for i in range(0, len(line_numbers), LOOKUP_CHUNK_SIZE):
+        chunk = line_numbers[i:i + LOOKUP_CHUNK_SIZE]
+        entries = db.query(LogEntry).filter(
+            LogEntry.log_file_id == log_file_id,
+            LogEntry.line_number.in_(chunk)
+        ).all()
+        for entry in entries:
+            by_line[entry.line_number] = entry_to_result(entry)
+    return {
+        category: [by_line[line] for line in lines if line in by_line]
+        for category, lines in refs.items()
+    }
+
+
+def load_report(db, log_file: LogFile, sections: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """Dosyanın güvenlik raporunu (veya yalnızca istenen bölümlerini) oku
+
+    Eski kayıtlarda rapor ``security_report_json`` kolonunda düz JSON olarak durur,
+    bu durumda tamamı parse edilip istenen bölümler seçilir.
+    """
+    sections = list(sections) if sections is not None else None
+    if log_file.security_report_blob is not None:
+        report = unpack_sections(log_file.security_report_blob, sections)
+        if isinstance(report.get(REPORT_FINDINGS_SECTION), dict):
+            report[REPORT_FINDINGS_SECTION] = resolve_findings(db, log_file.id, report[REPORT_FINDINGS_SECTION])
+        return report
+
+    if log_file.security_report_json is None:
+        return None
+    report = json.loads(log_file.security_report_json)
+    if sections is None:
+        return report
+    return {name: report[name] for name in sections if name in report}
+
+
+def load_results(analysis: AnalysisResult) -> List[Dict]:
+    """Analizin satır sonuçlarını oku (sıkıştırılmış ya da eski JSON biçiminden)"""
+    if analysis.results_blob is not None:
+        return unpack_sections(analysis.results_blob, [RESULTS_SECTION]).get(RESULTS_SECTION, [])
+    if analysis.results_json:
+        return json.loads(analysis.results_json)
+    return []
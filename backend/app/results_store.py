@@ -0,0 +1,231 @@
+import json
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import msgpack
+from sqlalchemy import Select, func, select
+
+from .database import LogEntry, bulk_insert
+
+# (analiz id, severity filtresi) -> satır sayısı; yeni analiz yeni id ile sayılır
+COUNT_CACHE_SIZE = 256
+count_cache: "OrderedDict[Tuple[Optional[int], Optional[str]], int]" = OrderedDict()
+# (analiz id, severity filtresi, sayfa boyu) -> {sayfa: önceki sayfanın son satır numarası}
+PAGE_CURSOR_CACHE_SIZE = 256
+PAGE_CURSORS_PER_KEY = 10000
+page_cursor_cache: "OrderedDict[Tuple[Optional[int], Optional[str], int], Dict[int, int]]" = OrderedDict()
+
+# Satır sonucundaki kolonlara karşılık gelmeyen, details_json içinde saklanan alanlar
+DETAIL_FIELDS = ("template", "mitre_technique", "recommended_actions", "fields", "rate")
+
+
+def result_to_row(log_file_id: int, analysis_id: int, result: Dict) -> Dict:
+    """Analiz sonucunu log_entries satırına çevir"""
+    is_anomaly = bool(result.get("is_anomaly", False))
+    confidence = result.get("confidence")
+    details = {field: result[field] for field in DETAIL_FIELDS if result.get(field) not in (None, {})}
+    timestamp = result.get("timestamp")
+    return {
+        "log_file_id": log_file_id,
+        "analysis_id": analysis_id,
+        "line_number": result.get("line_number"),
+        "timestamp": datetime.fromisoformat(timestamp) if timestamp else None,
+        "log_level": result.get("log_level"),
+        "message": result.get("log_content", ""),
+        "is_anomaly": is_anomaly,
+        "anomaly_score": float(confidence or 0.0) if is_anomaly else 0.0,
+        "anomaly_type": result.get("anomaly_type"),
+        "severity": result.get("severity") or "info",
+        "confidence": confidence,
+        "explanation": result.get("explanation"),
+        "verdict_source": result.get("verdict_source"),
+        "template_id": result.get("template_id"),
+        "details_json": json.dumps(details, ensure_ascii=False) if details else None,
+    }
+
+
+def entry_to_result(entry: LogEntry) -> Dict:
+    """log_entries satırını API'nin döndürdüğü sonuç biçimine çevir"""
+    result = {
+        "line_number": entry.line_number,
+        "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
+        "log_level": entry.log_level,
+        "log_content": entry.message,
+        "is_anomaly": bool(entry.is_anomaly),
+        "severity": entry.severity,
+        "anomaly_type": entry.anomaly_type,
+        "confidence": entry.confidence,
+        "explanation": entry.explanation,
+        "verdict_source": entry.verdict_source,
+        "template_id": entry.template_id,
+    }
+    if entry.details_json:
+        result.update(json.loads(entry.details_json))
+    return result
+
+
+class ResultSpool:
+    """Analiz sonuçlarını bellek yerine geçici dosyada biriktirir (pencere başına bir msgpack kaydı)
+
+    Analiz sürerken pencereler ``extend`` ile eklenir; kayıt sırasında sonuçlar
+    dosyadan akış halinde, istenildiği kadar tekrar okunabilir. Dosya ``close``
+    ile (ya da süreç kapanınca) silinir.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile(prefix="results-")
+        self.packer = msgpack.Packer(use_bin_type=True, default=str)
+        self.count = 0
+
+    def extend(self, results: List[Dict]):
+        self.file.write(self.packer.pack(results))
+        self.count += len(results)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Dict]:
+        self.file.flush()
+        self.file.seek(0)
+        for window in msgpack.Unpacker(self.file, raw=False, max_buffer_size=0):
+            yield from window
+        self.file.seek(0, 2)
+
+    def close(self):
+        self.file.close()
+
+
+def insert_entries(db, log_file_id: int, analysis_id: int, results: Iterable[Dict]) -> int:
+    return bulk_insert(db, LogEntry, (result_to_row(log_file_id, analysis_id, result) for result in results))
+
+
+def replace_entries(db, log_file_id: int, analysis_id: int, results: Iterable[Dict]) -> int:
+    """Dosyanın satır sonuçlarını yeni analizinkilerle değiştir (toplu INSERT)
+
+    ``log_entries`` her dosya için yalnızca son analizin satırlarını tutar; eski
+    analizlerin özetleri ``analysis_results`` tablosunda kalır. Commit çağırana aittir.
+    """
+    db.query(LogEntry).filter(LogEntry.log_file_id == log_file_id).delete(synchronize_session=False)
+    return insert_entries(db, log_file_id, analysis_id, results)
+
+
+def drop_entries_from(db, log_file_id: int, first_line: int) -> List[Tuple[bool, str]]:
+    """``first_line`` ve sonrasındaki satır sonuçlarını sil; silinenlerin (anomali mi, severity) bilgisini döndür
+
+    Artımlı analizde önceki analizin yarım kalan son satırı yeniden analiz
+    edildiğinde eski sonucu bu şekilde çıkarılır.
+    """
+    query = db.query(LogEntry).filter(LogEntry.log_file_id == log_file_id, LogEntry.line_number >= first_line)
+    dropped = [(bool(is_anomaly), severity) for is_anomaly, severity in query.with_entities(LogEntry.is_anomaly, LogEntry.severity)]
+    if dropped:
+        query.delete(synchronize_session=False)
+    return dropped
+
+
+def anomaly_results(db, log_file_id: int, before_line: Optional[int] = None) -> List[Dict]:
+    """Dosyanın kayıtlı anomalilerini (isteğe bağlı olarak ``before_line`` öncesiyle sınırlı) döndür"""
+    query = db.query(LogEntry).filter(LogEntry.log_file_id == log_file_id, LogEntry.is_anomaly.is_(True))
+    if before_line is not None:
+        query = query.filter(LogEntry.line_number < before_line)
+    return [entry_to_result(entry) for entry in query.order_by(LogEntry.line_number.asc())]
+
+
+async def has_entries(db, log_file_id: int) -> bool:
+    """Dosyanın satır sonuçları log_entries'te mi (yoksa eski, JSON'da saklanan bir analiz mi)
+
+    Artımlı analizlerde satırlar farklı analizlere ait olabildiğinden kontrol dosya
+    üzerinden yapılır; log_entries'e yazılmaya başlanmadan önceki analizlerin satırı yoktur.
+    """
+    result = await db.execute(
+        select(LogEntry.id).where(LogEntry.log_file_id == log_file_id, LogEntry.analysis_id.is_not(None)).limit(1)
+    )
+    return result.first() is not None
+
+
+def filtered_entries(log_file_id: int, severity_filter: Optional[str] = None) -> Select:
+    """Dosyanın satırları için filtre uygulanmış sorgu"""
+    query = select(LogEntry).where(LogEntry.log_file_id == log_file_id)
+    if severity_filter and severity_filter != "all":
+        if severity_filter == "anomalies":
+            query = query.where(LogEntry.is_anomaly.is_(True))
+        else:
+            query = query.where(LogEntry.severity == severity_filter)
+    return query
+
+
+async def count_entries(db, log_file_id: int, severity_filter: Optional[str] = None,
+                        analysis_id: Optional[int] = None) -> int:
+    """Filtreye uyan satır sayısı
+
+    ``analysis_id`` verilirse sonuç (analiz, filtre) başına önbelleğe alınır; dosyanın
+    satırları yalnızca yeni bir analizle değiştiğinden her sayfa isteğinde yeniden
+    sayılmaz.
+    """
+    key = (analysis_id, severity_filter)
+    if analysis_id is not None and key in count_cache:
+        count_cache.move_to_end(key)
+        return count_cache[key]
+    query = filtered_entries(log_file_id, severity_filter).with_only_columns(func.count()).order_by(None)
+    count = (await db.execute(query)).scalar_one()
+    if analysis_id is not None:
+        count_cache[key] = count
+        while len(count_cache) > COUNT_CACHE_SIZE:
+            count_cache.popitem(last=False)
+    return count
+
+
+def page_start(analysis_id: Optional[int], severity_filter: Optional[str], page_size: int,
+               page: int) -> Tuple[Optional[int], int]:
+    """Sayfanın başlangıcı: (bilinen en yakın önceki sayfa sınırının cursor'ı, o sınırdan atlanacak satır)"""
+    cursors = page_cursor_cache.get((analysis_id, severity_filter, page_size)) if analysis_id is not None else None
+    known = max((start for start in cursors if start <= page), default=None) if cursors else None
+    if known is None:
+        return None, (page - 1) * page_size
+    page_cursor_cache.move_to_end((analysis_id, severity_filter, page_size))
+    return cursors[known], (page - known) * page_size
+
+
+def remember_page_start(analysis_id: Optional[int], severity_filter: Optional[str], page_size: int,
+                        page: int, cursor: int):
+    if analysis_id is None:
+        return
+    key = (analysis_id, severity_filter, page_size)
+    cursors = page_cursor_cache.setdefault(key, {})
+    page_cursor_cache.move_to_end(key)
+    if len(cursors) < PAGE_CURSORS_PER_KEY:
+        cursors[page] = cursor
+    while len(page_cursor_cache) > PAGE_CURSOR_CACHE_SIZE:
+        page_cursor_cache.popitem(last=False)
+
+
+async def page_entries(db, log_file_id: int, severity_filter: Optional[str] = None, cursor: Optional[int] = None,
+                       page_size: int = 50, page: int = 1,
+                       analysis_id: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+    """Satır numarasına göre keyset sayfalama; (sonuçlar, sonraki cursor) döndür
+
+    ``cursor`` önceki sayfanın son satır numarasıdır ve verildiğinde sorgu indeks
+    üzerinde doğrudan o noktadan başlar, bu yüzden her sayfanın maliyeti aynıdır.
+    Cursor verilmezse başlangıç ``page``'den bulunur: ``analysis_id`` verildiğinde
+    sunulan her sayfanın sonu bir sonraki sayfanın cursor'ı olarak saklanır, sıradaki
+    sayfalar keyset ile okunur; bilinmeyen sayfalarda en yakın önceki sınırdan OFFSET
+    kullanılır.
+    """
+    query = filtered_entries(log_file_id, severity_filter).order_by(LogEntry.line_number.asc())
+    from_page = cursor is None
+    skip = 0
+    if from_page and page > 1:
+        cursor, skip = page_start(analysis_id, severity_filter, page_size, page)
+    if cursor is not None:
+        query = query.where(LogEntry.line_number > cursor)
+    if skip:
+        query = query.offset(skip)
+
+    entries = (await db.execute(query.limit(page_size + 1))).scalars().all()
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+    next_cursor = entries[-1].line_number if has_more and entries else None
+    if next_cursor is not None and from_page:
+        remember_page_start(analysis_id, severity_filter, page_size, page + 1, next_cursor)
+    return [entry_to_result(entry) for entry in entries], next_cursor
@@ -0,0 +1,269 @@
+import html
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from .database import engine, IS_SQLITE, BULK_INSERT_CHUNK_SIZE, SessionLocal, LogFile
+from .ingest import CHUNK_SIZE
+from .pipeline import LogRecord
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "log_search"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# highlight() bu (özel kullanım alanı) işaretlerle çağrılır; satır metni HTML olarak kaçışlandıktan
+# sonra işaretler <mark> etiketlerine çevrilir, böylece log içeriği HTML olarak yorumlanmaz
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+
+# rowid = dosya id'si << 32 | satır numarası; dosya filtresi rowid aralığına dönüşür
+LINE_BITS = 32
+MAX_ROWID = 2 ** 63 - 1
+
+# "çift tırnaklı ifade" (isteğe bağlı * ile) ya da boşlukla ayrılmış terim
+QUERY_TERM_PATTERN = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def search_rowid(file_id: int, line_number: int) -> int:
+    return (file_id << LINE_BITS) | line_number
+
+
+def file_rowid_range(file_id: int) -> Tuple[int, int]:
+    """Dosyanın satırlarını kapsayan [alt, üst) rowid aralığı"""
+    return file_id << LINE_BITS, (file_id + 1) << LINE_BITS
+
+
+def build_match_query(query: str) -> str:
+    """Kullanıcı sorgusunu güvenli bir FTS5 MATCH ifadesine çevir
+
+    ``"Authentication failed"`` ifade araması, ``auth*`` önek araması yapar; diğer
+    terimler olduğu gibi aranır ve tümü AND ile birleşir. Her terim tırnak içine
+    alındığı için FTS5 operatörleri ve özel karakterler sözdizimi hatasına yol açmaz.
+    """
+    terms = []
+    for phrase, phrase_prefix, word in QUERY_TERM_PATTERN.findall(query):
+        if word:
+            phrase, phrase_prefix = word.rstrip("*"), "*" if word.endswith("*") else ""
+        phrase = phrase.strip()
+        if phrase:
+            terms.append('"' + phrase.replace('"', '""') + '"' + phrase_prefix)
+    return " ".join(terms)
+
+
+def render_highlight(highlighted: str) -> str:
+    """highlight() çıktısını güvenli HTML'e çevir: metin kaçışlanır, eşleşmeler <mark> ile sarılır"""
+    return html.escape(highlighted).replace(MARK_START, HIGHLIGHT_START).replace(MARK_END, HIGHLIGHT_END)
+
+
+class SearchIndexWriter:
+    """Bir dosyanın satırlarını geldikçe indekse yazar (yükleme ya da analiz okumasıyla aynı geçişte)
+
+    Ham byte'lar ``feed`` ile verildiğinde satırlar ``read_log_range`` ile aynı
+    biçimde numaralanır: her ``\\n`` bir satırdır, boş satırlar atlanır. Satırlar
+    ``batch_size``'lık parçalarla, her parça ayrı bir transaction'da yazılır. İlk
+    yazımda ``first_line`` ve sonrasının eski kayıtları silinir.
+    """
+
+    def __init__(self, index: "LogSearchIndex", file_id: int, first_line: int = 1):
+        self.index = index
+        self.file_id = file_id
+        self.first_line = first_line
+        self.line_number = first_line
+        self.remainder = b""
+        self.pending: List[Tuple[int, str]] = []
+        self.indexed = 0
+        self.cleared = False
+
+    def feed(self, chunk: bytes):
+        """Ham byte parçasını satırlara böl (yarım kalan son satır sonraki parçayı bekler)"""
+        lines = (self.remainder + chunk).split(b"\n")
+        self.remainder = lines.pop()
+        for raw in lines:
+            self.add_line(raw)
+
+    def add_line(self, raw: bytes):
+        stripped = raw.decode("utf-8", errors="ignore").strip()
+        if stripped:
+            self.pending.append((search_rowid(self.file_id, self.line_number), stripped))
+            if len(self.pending) >= self.index.batch_size:
+                self.flush()
+        self.line_number += 1
+
+    def tee(self, records: Iterable[LogRecord]) -> Iterator[LogRecord]:
+        """Kayıt akışından geçerken satırları indeksle; akış bitince indeksi tamamla
+
+        İndeksleme hatası akışı (analizi) durdurmaz, yalnızca indekslemeyi bırakır.
+        """
+        failed = False
+        for line_number, line in records:
+            if not failed:
+                try:
+                    self.pending.append((search_rowid(self.file_id, line_number), line))
+                    if len(self.pending) >= self.index.batch_size:
+                        self.flush()
+                except Exception as e:
+                    logger.error(f"Dosya {self.file_id} arama indeksine eklenemedi: {e}")
+                    failed = True
+            yield line_number, line
+        if not failed:
+            try:
+                self.finish()
+                self.index.mark_indexed(self.file_id)
+            except Exception as e:
+                logger.error(f"Dosya {self.file_id} arama indeksine eklenemedi: {e}")
+
+    def flush(self):
+        with engine.begin() as conn:
+            if not self.cleared:
+                _, high = file_rowid_range(self.file_id)
+                conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE} WHERE rowid >= ? AND rowid < ?",
+                                     (search_rowid(self.file_id, self.first_line), high))
+                self.cleared = True
+            if self.pending:
+                conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}(rowid, content) VALUES (?, ?)", self.pending)
+        self.indexed += len(self.pending)
+        self.pending = []
+
+    def finish(self) -> int:
+        """Kalan satırları yaz, indekslenen satır sayısını döndür"""
+        if self.remainder:
+            self.add_line(self.remainder)
+            self.remainder = b""
+        self.flush()
+        logger.info(f"Arama indeksi: dosya {self.file_id} için {self.indexed} satır indekslendi")
+        return self.indexed
+
+    def abort(self):
+        """Yarım kalan yüklemenin indeks kayıtlarını sil"""
+        self.pending = []
+        self.remainder = b""
+        if self.cleared:
+            _, high = file_rowid_range(self.file_id)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE} WHERE rowid >= ? AND rowid < ?",
+                                     (search_rowid(self.file_id, self.first_line), high))
+
+
+class LogSearchIndex:
+    """Yüklenen log satırları için SQLite FTS5 tam metin arama indeksi
+
+    Her satır ``(dosya id << 32) | satır no`` rowid'si ile saklanır; böylece sonuçlar
+    dosya ve satır sırasıyla gelir, dosya filtresi ve sayfalama rowid aralığı
+    üzerinden indeksle yapılır. FTS5 yoksa ya da veritabanı SQLite değilse indeks
+    devre dışı kalır ve yükleme akışı etkilenmez.
+    """
+
+    def __init__(self, enabled: bool = True, batch_size: int = BULK_INSERT_CHUNK_SIZE):
+        self.enabled = enabled and IS_SQLITE
+        self.batch_size = batch_size
+        self.available = False
+
+    def create_table(self) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                    "USING fts5(content, tokenize='unicode61 remove_diacritics 2')"
+                )
+            self.available = True
+        except OperationalError as e:
+            logger.warning(f"FTS5 arama indeksi oluşturulamadı, arama devre dışı: {e}")
+            self.available = False
+        return self.available
+
+    def writer(self, file_id: int, first_line: int = 1) -> SearchIndexWriter:
+        return SearchIndexWriter(self, file_id, first_line)
+
+    def mark_indexed(self, file_id: int):
+        db = SessionLocal()
+        try:
+            db.query(LogFile).filter(LogFile.id == file_id).update({LogFile.search_indexed: True})
+            db.commit()
+        finally:
+            db.close()
+
+    def index_file(self, file_id: int, file_path: str, start_offset: int = 0, first_line: int = 1) -> int:
+        """Dosyanın satırlarını akış halinde indeksle, indekslenen satır sayısını döndür
+
+        Yükleme ve analiz satırları okudukları geçişte indeksler (bkz. ``SearchIndexWriter``);
+        bu yol yalnızca indeksten önce eklenmiş dosyalar içindir. Bellek kullanımı dosya
+        boyutundan bağımsızdır; büyüyen dosyalarda yalnızca ``start_offset``'ten sonraki
+        kısım eklenir.
+        """
+        if not self.available:
+            return 0
+
+        writer = self.writer(file_id, first_line)
+        with open(file_path, "rb") as f:
+            f.seek(start_offset)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                writer.feed(chunk)
+        indexed = writer.finish()
+        self.mark_indexed(file_id)
+        return indexed
+
+    def index_file_safely(self, file_id: int, file_path: str, start_offset: int = 0, first_line: int = 1):
+        """Arka plan görevi: indeksleme hatası yüklemeyi ya da analizi etkilemesin"""
+        try:
+            self.index_file(file_id, file_path, start_offset, first_line)
+        except Exception as e:
+            logger.error(f"Dosya {file_id} arama indeksine eklenemedi: {e}")
+
+    async def search(self, db, query: str, file_id: Optional[int] = None, cursor: Optional[int] = None,
+                     page_size: int = 50) -> Dict:
+        """Eşleşen satırları dosya/satır sırasıyla, vurgulanmış olarak döndür
+
+        ``cursor`` önceki sayfanın son sonucunun rowid'sidir (keyset sayfalama).
+        """
+        match = build_match_query(query)
+        if not match:
+            raise ValueError("Arama sorgusu boş")
+
+        low, high = file_rowid_range(file_id) if file_id is not None else (0, MAX_ROWID)
+        params = {"match": match, "low": low, "high": high}
+
+        total = (await db.execute(text(
+            f"SELECT count(*) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :match AND rowid >= :low AND rowid < :high"
+        ), params)).scalar_one()
+
+        rows = (await db.execute(text(
+            f"SELECT rowid, highlight({SEARCH_TABLE}, 0, :hl_start, :hl_end) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :match AND rowid > :after AND rowid < :high "
+            "ORDER BY rowid LIMIT :limit"
+        ), dict(params, after=cursor if cursor is not None and cursor >= low else low - 1,
+                hl_start=MARK_START, hl_end=MARK_END, limit=page_size + 1))).all()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        file_ids = sorted({rowid >> LINE_BITS for rowid, _ in rows})
+        filenames = dict((await db.execute(
+            select(LogFile.id, LogFile.filename).where(LogFile.id.in_(file_ids))
+        )).all()) if file_ids else {}
+
+        results: List[Dict] = []
+        for rowid, highlighted in rows:
+            result_file_id = rowid >> LINE_BITS
+            results.append({
+                "file_id": result_file_id,
+                "filename": filenames.get(result_file_id),
+                "line_number": rowid & ((1 << LINE_BITS) - 1),
+                "highlighted": render_highlight(highlighted),
+            })
+
+        return {
+            "total_matches": total,
+            "results": results,
+            "next_cursor": rows[-1][0] if has_more and rows else None,
+        }
+
+
+search_index = LogSearchIndex(enabled=os.getenv("LOG_SEARCH_ENABLED", "true").lower() in ("1", "true", "yes"))
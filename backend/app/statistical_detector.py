@@ -0,0 +1,415 @@
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .log_parser import LogParser
+from .pipeline import LogRecord, batched
+from .template_miner import TemplateMiner
+
+logger = logging.getLogger(__name__)
+
+STATISTICAL_ANALYSIS = "statistical"
+
+# Şablon anahtarı satırın bu kadar karakterinden (rakamlar maskelenmiş) oluşur
+TEMPLATE_KEY_WIDTH = 128
+# Anahtar -> şablon eşlemesinin sınırı; aşılınca eşleme sıfırlanır (şablonlar korunur)
+MAX_TEMPLATE_KEYS = 200000
+# Birinci geçişte birlikte işlenen kayıt sayısı
+CHUNK_SIZE = 100000
+# İkinci geçişte işaretli satırların ayrıştırılma parça boyutu
+DETAIL_CHUNK_SIZE = 5000
+# Zaman aralığı x şablon matrisinin en fazla hücre sayısı (bellek sınırı)
+MAX_CELLS = 4000000
+# Taban çizgisi oluşmadan (dosyanın ilk aralıkları) işaretleme yapılmaz
+MIN_HISTORY_BUCKETS = 5
+# Bu kadar ardışık aralık süren artış ani patlama değil hız değişimi sayılır
+RATE_CHANGE_MIN_BUCKETS = 3
+# Raporda tutulacak en fazla hız bulgusu (en yüksek z skoruna göre)
+MAX_FINDINGS = 200
+# Zaman damgası bulunamayan dosyalarda aralıklar bu kadar satırdan oluşur
+FALLBACK_BUCKET_LINES = 1000
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+
+DIGIT_ZERO = ord("0")
+DIGIT_NINE = ord("9")
+
+
+def template_keys(texts: List[str]) -> np.ndarray:
+    """Satırların şablon anahtarları: ilk TEMPLATE_KEY_WIDTH karakter, rakamlar 0'a çevrilmiş
+
+    Maskeleme satır başına regex yerine UCS-4 karakter kodları üzerinde yapılır;
+    sabit genişlikli anahtarlar pandas ile hash'lenerek gruplanır.
+    """
+    keys = np.array([text[:TEMPLATE_KEY_WIDTH] for text in texts], dtype=f"<U{TEMPLATE_KEY_WIDTH}")
+    codes = keys.view(np.uint32).reshape(len(texts), TEMPLATE_KEY_WIDTH)
+    codes[(codes > DIGIT_ZERO) & (codes <= DIGIT_NINE)] = DIGIT_ZERO
+    return keys
+
+
+def rolling_baseline(counts: np.ndarray, window: int):
+    """Her aralık için önceki ``window`` aralığın ortalaması, standart sapması ve aralık sayısı"""
+    steps = np.arange(counts.shape[0])
+    starts = np.maximum(steps - window, 0)
+    sums = np.concatenate([np.zeros((1, counts.shape[1])), np.cumsum(counts, axis=0)])
+    squares = np.concatenate([np.zeros((1, counts.shape[1])), np.cumsum(counts ** 2, axis=0)])
+    history = (steps - starts)[:, None]
+    size = np.maximum(history, 1)
+    mean = (sums[steps] - sums[starts]) / size
+    variance = np.maximum((squares[steps] - squares[starts]) / size - mean ** 2, 0.0)
+    return mean, np.sqrt(variance), history
+
+
+def ewma_baseline(counts: np.ndarray, alpha: float):
+    """Bir önceki aralığa kadarki üstel ağırlıklı ortalama ve standart sapma"""
+    frame = pd.DataFrame(counts)
+    weighted = frame.ewm(alpha=alpha, adjust=False)
+    mean = weighted.mean().shift(1).fillna(0.0).to_numpy()
+    std = np.sqrt(weighted.var(bias=True).shift(1).fillna(0.0).to_numpy())
+    return mean, std
+
+
+def zscore(counts: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    # Sayım verisinde sapma en az Poisson sapması kadar kabul edilir; sabit seriler sonsuz z üretmez
+    return (counts - mean) / np.maximum(std, np.sqrt(np.maximum(mean, 1.0)))
+
+
+def poisson_zscore(counts: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    """Varyansı dengelenmiş (karekök) Poisson skoru; küçük sayımlardaki kuyruk etkisini bastırır"""
+    return 2 * (np.sqrt(counts) - np.sqrt(mean))
+
+
+def run_lengths(flags: np.ndarray) -> np.ndarray:
+    """Her işaretli hücre için kolonundaki kesintisiz işaretli aralık dizisinin uzunluğu"""
+    padded = np.vstack([np.zeros((1, flags.shape[1]), dtype=bool), flags])
+    starts = flags & ~padded[:-1]
+    # Kolon bazında sıralı düzleştirme: her dizi tek bir etiket alır
+    labels = np.cumsum(starts.T.ravel()) * flags.T.ravel()
+    lengths = np.bincount(labels)
+    lengths[0] = 0
+    return lengths[labels].reshape(flags.shape[1], flags.shape[0]).T
+
+
+class StatisticalDetector:
+    """LLM kullanmadan zaman aralığı x şablon sayımlarında ani artış ve hız değişimi tespiti
+
+    Birinci geçişte kayıtlar parça parça okunur: her satırın zaman damgası ve
+    şablonu (rakamları maskelenmiş satır başı -> ``TemplateMiner`` kümesi; küme
+    yalnızca yeni anahtarlar için hesaplanır) NumPy dizilerinde tutulur. Sayımlar
+    ``bucket_seconds``'lık aralıklara bölünüp (aralık x şablon) matrisine
+    toplanır; her seri için önceki ``window`` aralığın kayan z skoru ve EWMA z
+    skoru hesaplanır. Eşiği aşan hücreler ani artış (``burst``), en az
+    ``RATE_CHANGE_MIN_BUCKETS`` aralık sürenler hız değişimi (``rate_change``)
+    sayılır; ayrıca toplam hacim ve hata oranı (ERROR/CRITICAL payı) serileri
+    izlenir. İkinci geçişte yalnızca işaretli hücrelerdeki satırlar yeniden
+    okunup sonuçları oluşturulur.
+    """
+
+    def __init__(self, bucket_seconds: int = 60, window: int = 30, z_threshold: float = 4.0, min_count: int = 10,
+                 ewma_alpha: float = 0.1, max_buckets: int = 10000, history_lines: Optional[int] = None):
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.window = max(1, window)
+        self.z_threshold = z_threshold
+        self.min_count = max(1, min_count)
+        self.ewma_alpha = ewma_alpha
+        self.max_buckets = max(MIN_HISTORY_BUCKETS + 1, max_buckets)
+        # Artımlı analizde taban çizgisi için yeni satırlardan önce okunan satır sayısı
+        self.history_lines = self.window * FALLBACK_BUCKET_LINES if history_lines is None else max(0, history_lines)
+
+    def collect(self, records: Iterable[LogRecord], log_parser: LogParser) -> Dict:
+        """Birinci geçiş: satır numarası, zaman (saniye), şablon ve hata bayrağı dizileri"""
+        miner = TemplateMiner()
+        key_templates: Dict[str, tuple] = {}  # anahtar -> (şablon id, hata seviyesi mi)
+        parts = {"line_numbers": [], "seconds": [], "timed": [], "templates": [], "errors": []}
+
+        for chunk in batched(records, CHUNK_SIZE):
+            texts = [text for _, text in chunk]
+            codes, uniques = pd.factorize(template_keys(texts))
+            uniques = [str(key) for key in uniques]
+            _, first_rows = np.unique(codes, return_index=True)
+
+            new_keys = [index for index, key in enumerate(uniques) if key not in key_templates]
+            if len(key_templates) + len(new_keys) > MAX_TEMPLATE_KEYS:
+                key_templates.clear()
+                new_keys = list(range(len(uniques)))
+            if new_keys:
+                # Şablon ve seviye yalnızca her yeni anahtarın ilk satırından çıkarılır
+                structured = log_parser.parse([chunk[first_rows[index]] for index in new_keys])
+                levels = structured["log_level"].tolist()
+                for index, text, level in zip(new_keys, log_parser.template_texts(structured), levels):
+                    key_templates[uniques[index]] = (miner.add_log_message(text).cluster_id, level in ERROR_LEVELS)
+
+            mapped = [key_templates[key] for key in uniques]
+            timestamps = log_parser.timestamp_values(pd.Series(texts, dtype=object))
+            parts["line_numbers"].append(np.fromiter((number for number, _ in chunk), dtype=np.int64, count=len(chunk)))
+            parts["seconds"].append(timestamps.to_numpy(dtype="datetime64[s]").astype(np.int64))
+            parts["timed"].append(timestamps.notna().to_numpy())
+            parts["templates"].append(np.array([template for template, _ in mapped], dtype=np.int64)[codes])
+            parts["errors"].append(np.array([error for _, error in mapped], dtype=bool)[codes])
+
+        events = {
+            name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+            for name, arrays in parts.items()
+        }
+        events["miner"] = miner
+        return events
+
+    def assign_buckets(self, events: Dict) -> Dict:
+        """Olayları zaman aralıklarına böl; zaman damgası olmayan satırlar önceki satırın zamanını alır"""
+        count = len(events["line_numbers"])
+        timed = events["timed"].astype(bool)
+        if count == 0 or timed.mean() < 0.5:
+            # Zaman bilgisi yoksa aralıklar sabit sayıda satırdan oluşur (şablon payındaki değişimler izlenir)
+            buckets = np.arange(count) // FALLBACK_BUCKET_LINES
+            return {"buckets": buckets, "bucket_count": int(buckets.max()) + 1 if count else 0,
+                    "bucket_seconds": None, "origin": None}
+
+        positions = np.where(timed, np.arange(count), 0)
+        np.maximum.accumulate(positions, out=positions)
+        seconds = events["seconds"][positions]
+        seconds[:np.argmax(timed)] = seconds[np.argmax(timed)]
+
+        size = self.bucket_seconds
+        origin, last = int(seconds.min()), int(seconds.max())
+        if (last - origin) // size + 1 > self.max_buckets:
+            # Uç değerli tek tük damgalar (ör. 1970) aralık sayısını patlatmasın
+            origin, last = (int(value) for value in np.quantile(seconds, [0.001, 0.999]))
+            size = max(size, math.ceil((last - origin + 1) / self.max_buckets / self.bucket_seconds) * self.bucket_seconds)
+        # Aralıklar saat sınırlarına hizalanır (60 sn'lik aralık tam dakikada başlar)
+        origin -= origin % size
+        bucket_count = (last - origin) // size + 1
+        buckets = (seconds - origin) // size
+        buckets[(buckets < 0) | (buckets >= bucket_count)] = -1
+        return {"buckets": buckets, "bucket_count": int(bucket_count), "bucket_seconds": size, "origin": origin}
+
+    def detect(self, events: Dict, timeline: Dict, first_event: int = 0) -> Dict:
+        """Sayım matrisi üzerinde z skoru/EWMA dedektörlerini çalıştır; işaretli satırları ve bulguları döndür
+
+        ``first_event``'ten önceki olaylar yalnızca taban çizgisine katılır: bulgular
+        yalnızca sonraki olayları içeren aralıklar için, işaretli satırlar yalnızca
+        bu olaylardan üretilir.
+        """
+        buckets, bucket_count = timeline["buckets"], timeline["bucket_count"]
+        inside = buckets >= 0
+        reported = np.zeros(bucket_count, dtype=bool)
+        new_buckets = buckets[first_event:]
+        reported[new_buckets[new_buckets >= 0]] = True
+        reported_lines = np.arange(len(buckets)) >= first_event
+        templates = events["templates"]
+        miner = events["miner"]
+
+        # Ani artış üretebilecek (toplamda min_count'a ulaşan) en sık şablonlar matris kolonlarıdır
+        totals = np.bincount(templates[inside], minlength=len(miner.clusters))
+        max_series = max(1, MAX_CELLS // max(bucket_count, 1))
+        series = [template for template in np.argsort(-totals, kind="stable")[:max_series]
+                  if totals[template] >= self.min_count]
+        columns = np.full(len(miner.clusters), -1, dtype=np.int64)
+        columns[series] = np.arange(len(series))
+        line_columns = np.where(inside, columns[templates], -1)
+        in_matrix = line_columns >= 0
+        cells = buckets * len(series) + line_columns
+        counts = np.bincount(cells[in_matrix], minlength=bucket_count * len(series)).reshape(
+            bucket_count, len(series)).astype(np.float64)
+
+        findings: List[Dict] = []
+        # Dosyanın son aralığı genellikle yarımdır; düşüş tespitinde kullanılmaz
+        complete = (np.arange(bucket_count) < bucket_count - 1)[:, None]
+        flagged_cells: Dict[int, Dict] = {}
+        if series:
+            mean, std, history = rolling_baseline(counts, self.window)
+            rolling_z = zscore(counts, mean, std)
+            ewma_mean, ewma_std = ewma_baseline(counts, self.ewma_alpha)
+            ewma_z = zscore(counts, ewma_mean, ewma_std)
+            ready = (history >= MIN_HISTORY_BUCKETS) & reported[:, None]
+
+            score = np.maximum(rolling_z, ewma_z)
+            spikes = (ready & (counts >= self.min_count) & (score >= self.z_threshold)
+                      & (poisson_zscore(counts, mean) >= self.z_threshold))
+            lengths = run_lengths(spikes)
+            for bucket, column in zip(*np.nonzero(spikes)):
+                template = int(series[column])
+                kind = "rate_change" if lengths[bucket, column] >= RATE_CHANGE_MIN_BUCKETS else "burst"
+                finding = self._finding(kind, "template", timeline, bucket, counts[bucket, column],
+                                        mean[bucket, column], score[bucket, column],
+                                        "rolling_zscore" if rolling_z[bucket, column] >= self.z_threshold else "ewma",
+                                        template, miner.clusters[template].template)
+                flagged_cells[int(bucket * len(series) + column)] = finding
+                findings.append(finding)
+
+            drops = ready & complete & (mean >= self.min_count) & (rolling_z <= -self.z_threshold)
+            for bucket, column in zip(*np.nonzero(drops)):
+                template = int(series[column])
+                findings.append(self._finding("rate_drop", "template", timeline, bucket, counts[bucket, column],
+                                              mean[bucket, column], rolling_z[bucket, column], "rolling_zscore",
+                                              template, miner.clusters[template].template))
+
+        # Toplam hacim: yalnızca bulgu olarak raporlanır, satırlar şablon serileri üzerinden işaretlenir
+        volume = np.bincount(buckets[inside], minlength=bucket_count).astype(np.float64)[:, None]
+        mean, std, history = rolling_baseline(volume, self.window)
+        rolling_z = zscore(volume, mean, std)
+        volume_z = np.maximum(rolling_z, zscore(volume, *ewma_baseline(volume, self.ewma_alpha)))
+        ready = (history >= MIN_HISTORY_BUCKETS) & reported[:, None]
+        volume_spikes = (ready & (volume >= self.min_count) & (volume_z >= self.z_threshold)
+                         & (poisson_zscore(volume, mean) >= self.z_threshold))
+        for bucket in np.nonzero(volume_spikes[:, 0])[0]:
+            findings.append(self._finding("volume_burst", "all", timeline, bucket, volume[bucket, 0],
+                                          mean[bucket, 0], volume_z[bucket, 0], "rolling_zscore"))
+        for bucket in np.nonzero(ready[:, 0] & complete[:, 0] & (mean[:, 0] >= self.min_count)
+                                 & (rolling_z[:, 0] <= -self.z_threshold))[0]:
+            findings.append(self._finding("volume_drop", "all", timeline, bucket, volume[bucket, 0],
+                                          mean[bucket, 0], rolling_z[bucket, 0], "rolling_zscore"))
+
+        # Hata oranı: aralıktaki ERROR/CRITICAL sayısı, önceki pencerenin hata payına göre binom z skoru
+        errors = np.bincount(buckets[inside & events["errors"]], minlength=bucket_count).astype(np.float64)
+        totals_by_bucket = volume[:, 0]
+        steps = np.arange(bucket_count)
+        starts = np.maximum(steps - self.window, 0)
+        error_sums = np.concatenate([[0.0], np.cumsum(errors)])
+        volume_sums = np.concatenate([[0.0], np.cumsum(totals_by_bucket)])
+        rate = (error_sums[steps] - error_sums[starts]) / np.maximum(volume_sums[steps] - volume_sums[starts], 1.0)
+        expected = totals_by_bucket * rate
+        error_z = (errors - expected) / np.sqrt(expected * (1 - rate) + 1.0)
+        error_spikes = (steps - starts >= MIN_HISTORY_BUCKETS) & reported & (errors >= self.min_count) & (error_z >= self.z_threshold)
+        error_buckets: Dict[int, Dict] = {}
+        for bucket in np.nonzero(error_spikes)[0]:
+            finding = self._finding("error_rate_spike", "errors", timeline, bucket, errors[bucket], expected[bucket],
+                                    error_z[bucket], "binomial_zscore")
+            finding["error_ratio"] = round(float(errors[bucket] / max(totals_by_bucket[bucket], 1.0)), 4)
+            finding["expected_ratio"] = round(float(rate[bucket]), 4)
+            error_buckets[int(bucket)] = finding
+            findings.append(finding)
+
+        # İşaretli hücrelerdeki satırlar -> (bulgu, şablon); şablon artışına girmeyen hata satırları
+        # hata oranı bulgusuna bağlanır
+        line_findings: Dict[int, tuple] = {}
+        line_numbers = events["line_numbers"]
+        if flagged_cells:
+            keys = np.fromiter(flagged_cells, dtype=np.int64)
+            for index in np.nonzero(reported_lines & in_matrix & np.isin(cells, keys))[0]:
+                line_findings[int(line_numbers[index])] = (flagged_cells[int(cells[index])], int(templates[index]))
+        if error_buckets:
+            for index in np.nonzero(reported_lines & inside & events["errors"] & np.isin(buckets, list(error_buckets)))[0]:
+                line_findings.setdefault(int(line_numbers[index]),
+                                         (error_buckets[int(buckets[index])], int(templates[index])))
+
+        findings.sort(key=lambda finding: -abs(finding["z_score"]))
+        return {"line_findings": line_findings, "findings": findings, "series_count": len(series)}
+
+    def _finding(self, kind: str, series: str, timeline: Dict, bucket: int, count: float, expected: float,
+                 z_score: float, detector: str, template_id: Optional[int] = None,
+                 template: Optional[str] = None) -> Dict:
+        finding = {
+            "kind": kind,
+            "series": series,
+            "bucket": int(bucket),
+            "start": None,
+            "end": None,
+            "count": int(count),
+            "expected": round(float(expected), 2),
+            "z_score": round(float(z_score), 2),
+            "detector": detector,
+        }
+        if timeline["bucket_seconds"]:
+            start = datetime(1970, 1, 1) + timedelta(seconds=timeline["origin"] + int(bucket) * timeline["bucket_seconds"])
+            finding["start"] = start.isoformat()
+            finding["end"] = (start + timedelta(seconds=timeline["bucket_seconds"])).isoformat()
+        if template_id is not None:
+            finding["template_id"] = template_id
+            finding["template"] = template
+        return finding
+
+    def explain(self, finding: Dict, bucket_seconds: Optional[int]) -> str:
+        """Satır sonucuna yazılacak Türkçe açıklama"""
+        period = (f"{finding['start']} başlangıçlı {bucket_seconds} saniyelik aralıkta" if finding["start"]
+                  else f"{FALLBACK_BUCKET_LINES} satırlık {finding['bucket'] + 1}. blokta")
+        if finding["kind"] == "error_rate_spike":
+            return (f"Hata oranı artışı: {period} {finding['count']} ERROR/CRITICAL kayıt "
+                    f"(beklenen ≈{finding['expected']:.1f}, oran %{finding['error_ratio'] * 100:.1f}, "
+                    f"önceki %{finding['expected_ratio'] * 100:.1f}, z={finding['z_score']:.1f})")
+        label = "Ani artış (burst)" if finding["kind"] == "burst" else "Kalıcı hız değişimi"
+        return (f"{label}: {period} bu şablondan {finding['count']} olay "
+                f"(beklenen ≈{finding['expected']:.1f}, z={finding['z_score']:.1f})")
+
+    def severity(self, finding: Dict) -> str:
+        z_score = finding["z_score"]
+        if z_score >= 5 * self.z_threshold:
+            return "critical"
+        if z_score >= 2 * self.z_threshold:
+            return "high"
+        return "medium"
+
+    def analyze(self, records: Iterable[LogRecord], reread: Callable[[], Iterable[LogRecord]], log_parser: LogParser,
+                progress_callback: Optional[Callable[[int, int], None]] = None,
+                report_from_line: Optional[int] = None) -> Dict:
+        """Kayıtları iki geçişte analiz et
+
+        ``records`` birinci geçişte tüketilir; ``reread`` aynı ham kayıtları yeniden üreten
+        fonksiyondur ve yalnızca işaretli satırların metinlerini almak için kullanılır. Sonuçlar yalnızca anomali
+        satırlarını içerir; ``total_lines`` okunan tüm kayıtların sayısıdır. Artımlı analizde ``records``
+        yeni satırlardan hemen önceki satırlarla başlar: ``report_from_line``'dan önceki satırlar yalnızca
+        taban çizgisini besler, raporlanmaz ve ``total_lines``'a sayılmaz.
+        """
+        events = self.collect(log_parser.records(records), log_parser)
+        first_event = 0
+        if report_from_line is not None:
+            first_event = int(np.searchsorted(events["line_numbers"], report_from_line))
+        timeline = self.assign_buckets(events)
+        detection = self.detect(events, timeline, first_event)
+        line_findings = detection["line_findings"]
+        logger.info(
+            f"İstatistiksel analiz: {len(events['line_numbers']) - first_event} satır"
+            f"{f' (+{first_event} geçmiş satır)' if first_event else ''}, {timeline['bucket_count']} aralık "
+            f"({timeline['bucket_seconds'] or FALLBACK_BUCKET_LINES} {'sn' if timeline['bucket_seconds'] else 'satır'}), "
+            f"{detection['series_count']} şablon serisi, {len(detection['findings'])} bulgu, "
+            f"{len(line_findings)} işaretli satır"
+        )
+        if progress_callback:
+            progress_callback(0, max(len(line_findings), 1))
+
+        miner = events["miner"]
+        flagged = (record for record in log_parser.records(reread()) if record[0] in line_findings)
+        results = []
+        for chunk in batched(flagged, DETAIL_CHUNK_SIZE):
+            details = log_parser.row_details(log_parser.parse(chunk))
+            for (line_number, line), detail in zip(chunk, details):
+                finding, template_id = line_findings[line_number]
+                results.append(dict(
+                    line_number=line_number,
+                    log_content=line,
+                    is_anomaly=True,
+                    severity=self.severity(finding),
+                    anomaly_type=finding["kind"],
+                    confidence=round(min(0.99, 0.5 + abs(finding["z_score"]) / (10 * self.z_threshold)), 2),
+                    explanation=self.explain(finding, timeline["bucket_seconds"]),
+                    verdict_source="statistical",
+                    template_id=template_id,
+                    template=miner.clusters[template_id].template,
+                    rate={field: finding[field] for field in ("start", "end", "count", "expected", "z_score", "detector")},
+                    **detail
+                ))
+            if progress_callback:
+                progress_callback(len(results), max(len(line_findings), 1))
+
+        return {
+            "total_lines": len(events["line_numbers"]) - first_event,
+            "template_count": len(miner.clusters),
+            "bucket_seconds": timeline["bucket_seconds"],
+            "bucket_count": timeline["bucket_count"],
+            "results": results,
+            "findings": detection["findings"][:MAX_FINDINGS],
+        }
+
+
+statistical_detector = StatisticalDetector(
+    bucket_seconds=int(os.getenv("STATISTICAL_BUCKET_SECONDS", "60")),
+    window=int(os.getenv("STATISTICAL_WINDOW_BUCKETS", "30")),
+    z_threshold=float(os.getenv("STATISTICAL_Z_THRESHOLD", "4.0")),
+    min_count=int(os.getenv("STATISTICAL_MIN_COUNT", "10")),
+    ewma_alpha=float(os.getenv("STATISTICAL_EWMA_ALPHA", "0.1")),
+    max_buckets=int(os.getenv("STATISTICAL_MAX_BUCKETS", "10000")),
+    history_lines=int(os.environ["STATISTICAL_HISTORY_LINES"]) if os.getenv("STATISTICAL_HISTORY_LINES") else None,
+)
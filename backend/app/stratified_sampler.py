@@ -0,0 +1,280 @@
+import logging
+import math
+from itertools import islice
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import LogRecord
+from .statistical_detector import template_keys
+
+logger = logging.getLogger(__name__)
+
+# Satır sınıfları: anahtar kelimelere göre öncelikli > warning > normal
+PRIORITY, WARNING, NORMAL = 0, 1, 2
+CLASS_NAMES = ("priority", "warning", "normal")
+# Bütçenin kalanı katmanlara sınıf ağırlığı x sqrt(satır sayısı) oranında dağıtılır
+CLASS_WEIGHTS = (4.0, 2.0, 1.0)
+# Satırlar bu büyüklükteki parçalarla vektörel olarak katmanlara ayrılır
+CHUNK_SIZE = 10000
+# En fazla bu kadar satırı olan şablonların tüm satırları örneğe alınır
+RARE_TEMPLATE_LINES = 3
+# Takip edilen en fazla katman (sınıf + şablon); sonrakiler sınıfın taşma katmanına düşer
+MAX_STRATA = 2048
+# Katman başına zaman işaretlerinin başlangıç dilim genişliği (saniye); dilimler dolunca ikiye katlanır
+TIME_SLOT_SECONDS = 60
+
+
+class Stratum:
+    """Bir (sınıf, şablon) katmanı: satır sayısı, ilk görülen satır, sabit boyutlu rezervuar ve zaman işaretleri"""
+
+    __slots__ = ("line_class", "count", "first", "reservoir", "time_marks", "slot_seconds")
+
+    def __init__(self, line_class: int, first: LogRecord):
+        self.line_class = line_class
+        self.count = 0
+        self.first = first
+        self.reservoir: List[LogRecord] = []
+        self.time_marks: Dict[int, LogRecord] = {}  # zaman dilimi -> dilimin ilk kaydı
+        self.slot_seconds = TIME_SLOT_SECONDS
+
+    def offer(self, records: List[LogRecord], capacity: int, rng: np.random.Generator):
+        """Rezervuar örneklemesi (Algorithm R), bir grup kayıt için toplu"""
+        start = self.count
+        self.count += len(records)
+        free = max(0, capacity - len(self.reservoir))
+        self.reservoir.extend(records[:free])
+        rest = len(records) - free
+        if rest <= 0:
+            return
+        # j. kayıt (1'den sayılır) capacity/j olasılıkla rastgele bir yuvaya yazılır
+        positions = start + free + np.arange(1, rest + 1)
+        slots = (rng.random(rest) * positions).astype(np.int64)
+        for offset in np.flatnonzero(slots < capacity):
+            self.reservoir[slots[offset]] = records[free + offset]
+
+    def mark_times(self, records: List[LogRecord], seconds: np.ndarray, capacity: int):
+        """Her zaman diliminin ilk kaydını tut; dilim sayısı kapasiteyi aşınca dilim genişliği ikiye katlanır
+
+        Rezervuar satır sırasına göre tekdüze olduğundan yoğun (burst) dönemlerle dolar;
+        zaman işaretleri sakin dönemlerin de aday havuzunda kalmasını sağlar.
+        """
+        slots, first_rows = np.unique(seconds // self.slot_seconds, return_index=True)
+        for slot, row in zip(slots.tolist(), first_rows.tolist()):
+            self.time_marks.setdefault(slot, records[row])
+        while len(self.time_marks) > capacity:
+            self.slot_seconds *= 2
+            merged: Dict[int, LogRecord] = {}
+            for slot in sorted(self.time_marks):
+                merged.setdefault(slot // 2, self.time_marks[slot])
+            self.time_marks = merged
+
+    def candidates(self) -> List[LogRecord]:
+        """Seçilebilecek kayıtlar: ilk görülen satır + rezervuar + zaman işaretleri, satır sırasıyla"""
+        records = {record[0]: record for record in self.reservoir}
+        records.update((record[0], record) for record in self.time_marks.values())
+        records[self.first[0]] = self.first
+        return [records[line_number] for line_number in sorted(records)]
+
+
+def spread(records: List[LogRecord], count: int) -> List[LogRecord]:
+    """Satır sırasındaki kayıtlardan eşit aralıklı ``count`` tanesini seç (aralık ortaları)"""
+    if count >= len(records):
+        return records
+    if count <= 0:
+        return []
+    step = len(records) / count
+    return [records[int((k + 0.5) * step)] for k in range(count)]
+
+
+def spread_by_time(records: List[LogRecord], seconds: np.ndarray, count: int) -> List[LogRecord]:
+    """Satır sırasındaki kayıtlardan ``count`` tanesini zaman ekseninde eşit aralıklarla seç
+
+    Kayıtların zaman aralığı ``count`` eşit dilime bölünür ve her dolu dilimden
+    ortasına en yakın kayıt alınır; yoğun (burst) dönemler seçimi tekeline almaz.
+    Dolu dilimler yetmezse kalanlar satır sırasına yayılarak tamamlanır.
+    """
+    if count >= len(records):
+        return records
+    if count <= 0:
+        return []
+    start, end = int(seconds.min()), int(seconds.max())
+    if start == end:
+        return spread(records, count)
+    width = (end - start) / count
+    slices = np.minimum(((seconds - start) / width).astype(np.int64), count - 1)
+    distance = np.abs(seconds - (start + (slices + 0.5) * width))
+    # Dilim içinde merkeze en yakın kayıt: (dilim, uzaklık) sıralamasında her dilimin ilki
+    order = np.lexsort((distance, slices))
+    chosen = order[np.flatnonzero(np.diff(slices[order], prepend=-1))]
+    selected = set(chosen.tolist())
+    if len(selected) < count:
+        rest = [index for index in range(len(records)) if index not in selected]
+        selected.update(spread(rest, count - len(selected)))
+    return [records[index] for index in sorted(selected)]
+
+
+class StratifiedSampler:
+    """Tek geçişli, sınırlı bellekli, sınıf ve şablon bazlı katmanlı örnekleyici
+
+    Her satır anahtar kelimelere göre bir sınıfa (öncelikli / warning / normal) ve
+    şablon anahtarına (rakamları maskelenmiş satır başı) göre bir katmana düşer.
+    Katman başına satır sayısı, ilk görülen satır ve ``reservoir_size`` kayıtlık bir
+    rezervuar tutulur; bellek ``max_strata`` x 2 ``reservoir_size`` kayıtla sınırlıdır
+    ve dosyanın her bölümü (satır sırasına göre) eşit olasılıkla temsil edilir. Seçimde
+    önce her şablona (sınıf önceliği ve seyreklik sırasıyla) ilk görüldüğü satır
+    verilir, seyrek şablonların tüm satırları alınır; kalan bütçe sınıf ağırlığı x
+    sqrt(sayım) oranında dağıtılır. ``timestamps`` (metin serisi -> zaman damgası
+    serisi) verilirse katmanlar rezervuarın yanında zaman dilimi başına bir kayıt da
+    tutar ve katman içindeki seçim zaman eksenine yayılır (``spread_by_time``); yoğun
+    dönemler örneği tekeline almaz. Damgası çözülemeyen satırlarda satır sırası
+    zamanın yerine kullanılır.
+    """
+
+    def __init__(self, target_size: int, classify: Callable[[str], FrozenSet[str]],
+                 max_strata: int = MAX_STRATA, rare_lines: int = RARE_TEMPLATE_LINES, seed: int = 0,
+                 timestamps: Optional[Callable[[pd.Series], pd.Series]] = None):
+        self.target_size = target_size
+        self.classify = classify
+        self.timestamps = timestamps
+        self.max_strata = max_strata
+        self.rare_lines = rare_lines
+        self.reservoir_size = max(rare_lines, 8, min(64, target_size // 8))
+        self.rng = np.random.default_rng(seed)  # Aynı dosya için tekrarlanabilir örnekleme
+        self.strata: Dict[Tuple[int, str], Stratum] = {}
+        self.total = 0
+
+    def line_class(self, text: str) -> int:
+        hits = self.classify(text)
+        if "sample:priority" in hits:
+            return PRIORITY
+        if "sample:warning" in hits:
+            return WARNING
+        return NORMAL
+
+    def add(self, chunk: List[LogRecord]):
+        """Bir kayıt parçasını katmanlarına dağıt"""
+        texts = [text for _, text in chunk]
+        timed = None
+        if self.timestamps is not None:
+            values = self.timestamps(pd.Series(texts, dtype=object))
+            timed = values.notna().to_numpy()
+            seconds = values.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        classes = np.fromiter((self.line_class(text) for text in texts), dtype=np.int64, count=len(texts))
+        codes, keys = pd.factorize(template_keys(texts))
+        # Katman = (şablon anahtarı, sınıf); parçadaki satırlar katmanlarına göre gruplanır (ilk görülen önce)
+        groups = codes * len(CLASS_NAMES) + classes
+        members = np.argsort(groups, kind="stable")
+        starts = np.flatnonzero(np.diff(groups[members], prepend=-1))
+        # Katman sınırı dolduysa yeni şablonlar sınıfın ortak taşma katmanında toplu örneklenir
+        targets: Dict[Tuple, List[np.ndarray]] = {}
+        strata_count = len(self.strata)
+        for start, end in zip(starts, np.append(starts[1:], len(chunk))):
+            group = groups[members[start]]
+            line_class = int(group % len(CLASS_NAMES))
+            key = (line_class, str(keys[group // len(CLASS_NAMES)]))
+            if key not in self.strata and key not in targets:
+                if strata_count >= self.max_strata:
+                    key = (line_class, None)
+                if key not in self.strata and key not in targets:
+                    strata_count += 1
+            targets.setdefault(key, []).append(members[start:end])
+        for key, parts in targets.items():
+            rows = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+            stratum = self.strata.get(key)
+            if stratum is None:
+                stratum = self.strata[key] = Stratum(key[0], chunk[rows[0]])
+            stratum.offer([chunk[row] for row in rows], self.reservoir_size, self.rng)
+            if timed is not None:
+                timed_rows = rows[timed[rows]]
+                if len(timed_rows):
+                    stratum.mark_times([chunk[row] for row in timed_rows], seconds[timed_rows], self.reservoir_size)
+        self.total += len(chunk)
+
+    def consume(self, records: Iterable[LogRecord]) -> "StratifiedSampler":
+        iterator = iter(records)
+        while True:
+            chunk = list(islice(iterator, CHUNK_SIZE))
+            if not chunk:
+                return self
+            self.add(chunk)
+
+    def allocate(self) -> Dict[Tuple, int]:
+        """Katman başına seçilecek satır sayısı (toplam ``target_size``'ı aşmaz)"""
+        budget = self.target_size
+        allocation: Dict[Tuple, int] = {}
+        capacity = {key: len(stratum.candidates()) for key, stratum in self.strata.items()}
+        # 1. Her şablona bir satır; bütçe yetmezse öncelikli sınıflar ve seyrek şablonlar önce
+        for key, stratum in sorted(self.strata.items(), key=lambda item: (item[1].line_class, item[1].count)):
+            if budget <= 0:
+                break
+            # Seyrek şablonların tüm satırları alınır
+            take = min(capacity[key], stratum.count if stratum.count <= self.rare_lines else 1, budget)
+            allocation[key] = take
+            budget -= take
+        # 2. Kalan bütçe sınıf ağırlığı x sqrt(sayım) oranında, kapasite dolana kadar dağıtılır
+        while budget > 0:
+            open_keys = [key for key in allocation if allocation[key] < capacity[key]]
+            if not open_keys:
+                break
+            weights = {key: CLASS_WEIGHTS[self.strata[key].line_class] * math.sqrt(self.strata[key].count)
+                       for key in open_keys}
+            total_weight = sum(weights.values())
+            granted = 0
+            for key in sorted(open_keys, key=lambda key: -weights[key]):
+                share = max(1, int(budget * weights[key] / total_weight))
+                take = min(share, capacity[key] - allocation[key], budget - granted)
+                if take <= 0:
+                    continue
+                allocation[key] += take
+                granted += take
+            if granted == 0:
+                break
+            budget -= granted
+        return allocation
+
+    def pick(self, candidates: List[LogRecord], count: int) -> List[LogRecord]:
+        """Katmanın adaylarından ``count`` tanesini zamana (damga yoksa satır sırasına) yayarak seç"""
+        if self.timestamps is None or count >= len(candidates) or count <= 0:
+            return spread(candidates, count)
+        values = self.timestamps(pd.Series([text for _, text in candidates], dtype=object))
+        timed = values.notna().to_numpy()
+        if timed.mean() < 0.5:
+            return spread(candidates, count)
+        # Damgasız adaylar satır sırasında önceki adayın zamanını alır
+        seconds = values.ffill().bfill().to_numpy(dtype="datetime64[s]").astype(np.int64)
+        return spread_by_time(candidates, seconds, count)
+
+    def sample(self) -> List[LogRecord]:
+        """Seçilen kayıtlar, satır sırasıyla"""
+        selected: List[LogRecord] = []
+        for key, count in self.allocate().items():
+            selected.extend(self.pick(self.strata[key].candidates(), count))
+        selected.sort(key=lambda record: record[0])
+        return selected
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "lines": self.total,
+            "strata": len(self.strata),
+            **{f"{name}_lines": sum(stratum.count for stratum in self.strata.values() if stratum.line_class == index)
+               for index, name in enumerate(CLASS_NAMES)},
+        }
+
+
+def stratified_sample(records: Iterable[LogRecord], threshold: int, target_size: int,
+                      classify: Callable[[str], FrozenSet[str]], seed: int = 0,
+                      timestamps: Optional[Callable[[pd.Series], pd.Series]] = None) -> List[LogRecord]:
+    """Akış ``threshold`` kayıttan kısaysa tamamını, değilse katmanlı örneğini döndür"""
+    iterator = iter(records)
+    head = list(islice(iterator, threshold + 1))
+    if len(head) <= threshold:
+        return head
+    sampler = StratifiedSampler(target_size, classify, seed=seed, timestamps=timestamps)
+    sampler.add(head)
+    del head
+    sampler.consume(iterator)
+    sampled = sampler.sample()
+    logger.info(f"Katmanlı örnekleme: {sampler.summary()}, {len(sampled)} satır seçildi")
+    return sampled
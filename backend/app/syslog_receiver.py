@@ -0,0 +1,408 @@
+import asyncio
+import logging
+import os
+import re
+import socket
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_NAMES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+MONTHS = {name: index for index, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+# <PRI>1 TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+RFC5424_PATTERN = re.compile(
+    r"<(\d{1,3})>1 (\S+) (\S+) (\S+) (\S+) (\S+) (-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (.*))?$", re.S
+)
+# <PRI>Mmm dd hh:mm:ss HOSTNAME MSG
+RFC3164_PATTERN = re.compile(r"<(\d{1,3})>([A-Z][a-z]{2}) ([ \d]\d) (\d\d:\d\d:\d\d) (.*)$", re.S)
+PRI_PATTERN = re.compile(r"<(\d{1,3})>(.*)$", re.S)
+
+# TCP çerçevesi için üst sınır; daha uzun çerçeveler kesilir
+MAX_FRAME_SIZE = 64 * 1024
+# Octet-counting uzunluk alanının en fazla basamak sayısı (MAX_FRAME_SIZE'a göre)
+MAX_LENGTH_DIGITS = len(str(MAX_FRAME_SIZE))
+# Soket okunabilir olduğunda tek seferde okunacak en fazla UDP datagram'ı
+UDP_READ_BATCH = 512
+
+
+def safe_host(host: str) -> str:
+    """Host adını dosya adında kullanılabilir hale getir"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", host)[:128] or "unknown"
+
+
+def format_3164_timestamp(month: str, day: str, clock: str, now: datetime) -> str:
+    """Yılsız RFC 3164 zaman damgasını ISO biçimine çevir (gelecekte kalırsa önceki yıl)"""
+    month_number = MONTHS.get(month)
+    if month_number is None:
+        return now.strftime("%Y-%m-%dT%H:%M:%S")
+    year = now.year - 1 if month_number > now.month + 1 else now.year
+    return f"{year:04d}-{month_number:02d}-{int(day):02d}T{clock}"
+
+
+def parse_syslog(message: str, peer_host: str, now: Optional[datetime] = None) -> Tuple[str, str]:
+    """Syslog mesajını (host, log satırı) olarak çöz
+
+    RFC 5424 ve RFC 3164 biçimleri desteklenir; çözülemeyen mesajlar olduğu gibi,
+    gönderen adresin host'u ile saklanır. Log satırı klasik dosya biçimindedir:
+    ``<ISO zaman> <host> <uygulama>[<pid>]: <severity>: <mesaj>``.
+    """
+    now = now or datetime.now()
+    match = RFC5424_PATTERN.match(message)
+    if match:
+        pri, timestamp, host, app, procid, _, _, text = match.groups()
+        host = peer_host if host == "-" else host
+        tag = "" if app == "-" else (app if procid == "-" else f"{app}[{procid}]")
+        text = (text or "").lstrip("\ufeff")
+        if timestamp == "-":
+            timestamp = now.strftime("%Y-%m-%dT%H:%M:%S")
+    else:
+        match = RFC3164_PATTERN.match(message)
+        if match:
+            pri, month, day, clock, rest = match.groups()
+            timestamp = format_3164_timestamp(month, day, clock, now)
+            first, _, remainder = rest.partition(" ")
+            if first.endswith(":") or "[" in first or not remainder:
+                # Host alanı olmayan (yerel) mesaj: ilk kelime etikettir
+                host, tag, text = peer_host, first.rstrip(":"), remainder
+            else:
+                host = first
+                tag, _, text = remainder.partition(": ") if ": " in remainder else ("", "", remainder)
+        else:
+            match = PRI_PATTERN.match(message)
+            pri, text = match.groups() if match else ("13", message)
+            host, tag, timestamp = peer_host, "", now.strftime("%Y-%m-%dT%H:%M:%S")
+
+    severity = SEVERITY_NAMES[int(pri) & 7] if pri.isdigit() else "notice"
+    text = text.replace("\r", " ").replace("\n", " ").strip()
+    prefix = f"{timestamp} {host} {tag}: " if tag else f"{timestamp} {host} "
+    return host, f"{prefix}{severity}: {text}"
+
+
+class SyslogReceiver:
+    """UDP/TCP syslog alıcısı; mesajları mikro-batch'ler halinde host başına log dosyasına yazar
+
+    Mesajlar bellekte en fazla ``max_buffer`` kadar tamponlanır ve her
+    ``flush_interval`` saniyede ya da ``batch_size`` mesaj birikince tek yazımla
+    ``spool_dir/<host>.log`` dosyalarına eklenir. Bu dosyalar dizin izleme servisi
+    tarafından izlenir; böylece mesajlar yüklenen dosyalarla aynı artımlı analiz
+    hattından geçip veritabanına kaydedilir.
+
+    Tampon doluyken UDP mesajları düşürülür (``dropped`` sayacı); TCP bağlantılarında
+    ise okuma duraklatılır ve gönderen TCP akış kontrolüyle yavaşlatılır.
+
+    Dosya ``max_file_bytes`` boyutunu aşınca ``<host>.log.1`` adına döndürülür
+    (eskiler ``.2``, ``.3``... olarak kayar, ``backups`` sayısını aşan silinir).
+    İzleme servisi dosyaları inode ile takip ettiği için döndürülen dosyanın
+    analiz edilmemiş satırları yeni adıyla işlenir.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", udp_port: Optional[int] = 5514, tcp_port: Optional[int] = 5514,
+                 spool_dir: str = "syslog", batch_size: int = 5000, flush_interval: float = 0.2,
+                 max_buffer: int = 100000, max_file_bytes: int = 100 * 1024 * 1024, backups: int = 3,
+                 enabled: bool = False):
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.spool_dir = os.path.abspath(spool_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_file_bytes = max_file_bytes
+        self.backups = max(1, backups)
+        self.enabled = enabled
+        self.buffer: Dict[str, List[str]] = defaultdict(list)
+        self.buffered = 0
+        self.paused: Set[asyncio.Transport] = set()
+        self.connections: Set[asyncio.Transport] = set()
+        self.flush_needed: Optional[asyncio.Event] = None
+        self.udp_socket: Optional[socket.socket] = None
+        self.running = False
+        self.tcp_server = None
+        self.flusher: Optional[asyncio.Task] = None
+        self.stats = {"received": 0, "written": 0, "dropped": 0, "parse_errors": 0, "batches": 0,
+                      "tcp_connections": 0, "tcp_pauses": 0, "oversized_frames": 0, "rotations": 0}
+        self.started = None
+
+    async def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.flush_needed = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if self.udp_port:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # Ani yüklerde çekirdek tamponunda bekleyebilmeleri için alım tamponu büyütülür
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.udp_port))
+            sock.setblocking(False)
+            self.udp_socket = sock
+            loop.add_reader(sock.fileno(), self._read_datagrams)
+        if self.tcp_port:
+            self.tcp_server = await loop.create_server(lambda: SyslogTCPProtocol(self), self.host, self.tcp_port)
+        self.running = True
+        self.flusher = asyncio.create_task(self._flush_loop())
+        self.started = time.monotonic()
+        logger.info(f"Syslog alıcısı başlatıldı: udp={self.udp_port} tcp={self.tcp_port} -> {self.spool_dir}")
+
+    async def stop(self):
+        if self.udp_socket is not None:
+            asyncio.get_running_loop().remove_reader(self.udp_socket.fileno())
+            self.udp_socket.close()
+            self.udp_socket = None
+        if self.tcp_server is not None:
+            self.tcp_server.close()
+            # Açık bağlantılar kapanmadan wait_closed dönmez
+            for transport in list(self.connections):
+                transport.close()
+            await self.tcp_server.wait_closed()
+        if self.flusher is not None:
+            # İptal yerine bayrak: döngü tamponda kalan mesajları yazıp çıkar
+            self.running = False
+            self.flush_needed.set()
+            await self.flusher
+            self.flusher = None
+
+    def _read_datagrams(self):
+        """Soket okunabilir olduğunda bekleyen datagram'ları tek seferde boşalt
+
+        Her olay döngüsü turunda tek datagram okuyan ``DatagramProtocol`` yerine
+        ``UDP_READ_BATCH`` datagram'a kadar okunur; döngü yükü mesaj başına değil
+        okuma başına ödenir.
+        """
+        recvfrom = self.udp_socket.recvfrom
+        submit = self.submit
+        for _ in range(UDP_READ_BATCH):
+            try:
+                data, addr = recvfrom(MAX_FRAME_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error(f"Syslog UDP okuma hatası: {str(e)}")
+                return
+            submit(data.decode("utf-8", errors="replace"), addr[0])
+
+    def submit(self, message: str, peer_host: str, transport: Optional[asyncio.Transport] = None) -> bool:
+        """Mesajı tampona ekle; tampon doluysa False döndür (UDP'de mesaj düşer)"""
+        self.stats["received"] += 1
+        if self.buffered >= self.max_buffer:
+            if transport is None:
+                self.stats["dropped"] += 1
+                return False
+            # TCP: göndereni yavaşlat, mesaj yine de kabul edilir (tampon en fazla okuma boyu kadar aşılır)
+            if transport not in self.paused:
+                transport.pause_reading()
+                self.paused.add(transport)
+                self.stats["tcp_pauses"] += 1
+        try:
+            host, line = parse_syslog(message, peer_host)
+        except Exception:
+            self.stats["parse_errors"] += 1
+            host, line = peer_host, message.replace("\n", " ").strip()
+        self.buffer[host].append(line)
+        self.buffered += 1
+        if self.buffered >= self.batch_size:
+            self.flush_needed.set()
+        return True
+
+    async def _flush_loop(self):
+        while self.running:
+            try:
+                await asyncio.wait_for(self.flush_needed.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_needed.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Syslog mesajları yazılamadı: {str(e)}")
+        await self.flush()
+
+    async def flush(self):
+        if not self.buffered:
+            self._resume_readers()
+            return
+        batch, self.buffer, count = self.buffer, defaultdict(list), self.buffered
+        self.buffered = 0
+        await asyncio.to_thread(self._write_batch, batch)
+        self.stats["written"] += count
+        self.stats["batches"] += 1
+        self._resume_readers()
+
+    def _resume_readers(self):
+        for transport in self.paused:
+            if not transport.is_closing():
+                transport.resume_reading()
+        self.paused.clear()
+
+    def _write_batch(self, batch: Dict[str, List[str]]):
+        """Her host'un mesajlarını tek yazımla dosyasına ekle"""
+        for host, lines in batch.items():
+            path = os.path.join(self.spool_dir, f"{safe_host(host)}.log")
+            self._rotate_if_needed(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def _rotate_if_needed(self, path: str):
+        """Boyut sınırını aşan dosyayı ``.1`` adına döndür; en eski yedek üzerine yazılarak silinir"""
+        if not self.max_file_bytes:
+            return
+        try:
+            if os.path.getsize(path) < self.max_file_bytes:
+                return
+        except OSError:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+        self.stats["rotations"] += 1
+        logger.info(f"Syslog dosyası döndürüldü: {path}")
+
+    def status(self) -> Dict:
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        return {
+            "enabled": self.enabled,
+            "udp_port": self.udp_port,
+            "tcp_port": self.tcp_port,
+            "spool_dir": self.spool_dir,
+            "buffered": self.buffered,
+            "max_buffer": self.max_buffer,
+            "max_file_bytes": self.max_file_bytes,
+            **self.stats,
+            "kernel_udp_drops": self._kernel_udp_drops(),
+            "messages_per_second": round(self.stats["received"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+    def _kernel_udp_drops(self) -> Optional[int]:
+        """Çekirdek alım tamponu dolduğu için soket seviyesinde düşen datagram'lar (yalnızca Linux)"""
+        if self.udp_socket is None:
+            return None
+        try:
+            inode = str(os.fstat(self.udp_socket.fileno()).st_ino)
+            for path in ("/proc/net/udp", "/proc/net/udp6"):
+                if not os.path.exists(path):
+                    continue
+                with open(path) as f:
+                    next(f)
+                    for line in f:
+                        fields = line.split()
+                        if fields[9] == inode:
+                            return int(fields[-1])
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+
+class SyslogTCPProtocol(asyncio.Protocol):
+    """RFC 6587 çerçeveleme: octet-counting (``UZUNLUK SP MESAJ``) ya da satır sonu ile ayrılmış
+
+    Çerçeveleme bağlantının ilk çerçevesinden bir kez belirlenir; satır sonu ile
+    çerçevelenen bağlantıda rakamla başlayan mesajlar uzunluk alanı sayılmaz.
+    """
+
+    def __init__(self, receiver: SyslogReceiver):
+        self.receiver = receiver
+        self.transport = None
+        self.peer_host = "unknown"
+        self.data = bytearray()
+        # "octet" ya da "newline"; ilk çerçeve gelene kadar None
+        self.framing: Optional[str] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info("peername")
+        self.peer_host = peer[0] if peer else "unknown"
+        self.receiver.connections.add(transport)
+        self.receiver.stats["tcp_connections"] += 1
+
+    def data_received(self, data: bytes):
+        self.data.extend(data)
+        for frame in self._frames():
+            self.receiver.submit(frame.decode("utf-8", errors="replace"), self.peer_host, self.transport)
+
+    def _detect_framing(self) -> Optional[str]:
+        """İlk çerçeveye bak: ``UZUNLUK SP`` ile başlıyorsa octet-counting, değilse satır sonu"""
+        start = len(self.data) - len(self.data.lstrip())
+        head = self.data[start:start + MAX_LENGTH_DIGITS + 1]
+        if not head:
+            return None
+        digits = len(head) - len(head.lstrip(b"0123456789"))
+        if digits == len(head) and digits <= MAX_LENGTH_DIGITS:
+            # Uzunluk alanı henüz tamamlanmadı
+            return None
+        if 0 < digits and head[digits:digits + 1] == b" " and head[:1] != b"0":
+            return "octet"
+        return "newline"
+
+    def _frames(self):
+        if self.framing is None:
+            self.framing = self._detect_framing()
+            if self.framing is None:
+                return
+        data = self.data
+        position = 0
+        while position < len(data):
+            if self.framing == "octet" and data[position:position + 1].isdigit():
+                # Octet-counting: "123 <34>1 ..."
+                space = data.find(b" ", position)
+                if space == -1:
+                    break
+                length = int(data[position:space]) if data[position:space].isdigit() else 0
+                if length <= 0 or length > MAX_FRAME_SIZE:
+                    # Bozuk uzunluk alanı: satır sonuna kadar olanı mesaj say
+                    newline = data.find(b"\n", position)
+                    if newline == -1:
+                        break
+                    yield bytes(data[position:newline])
+                    position = newline + 1
+                    continue
+                if len(data) < space + 1 + length:
+                    break
+                yield bytes(data[space + 1:space + 1 + length])
+                position = space + 1 + length
+            else:
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    if len(data) - position > MAX_FRAME_SIZE:
+                        self.receiver.stats["oversized_frames"] += 1
+                        yield bytes(data[position:position + MAX_FRAME_SIZE])
+                        position = len(data)
+                    break
+                frame = bytes(data[position:newline]).rstrip(b"\r\x00")
+                if frame:
+                    yield frame
+                position = newline + 1
+        del data[:position]
+
+    def connection_lost(self, exc):
+        if self.data.strip():
+            # Bağlantı kapanırken satır sonu olmadan kalan son mesaj
+            self.receiver.submit(bytes(self.data).decode("utf-8", errors="replace").strip(), self.peer_host)
+        self.data.clear()
+        self.receiver.paused.discard(self.transport)
+        self.receiver.connections.discard(self.transport)
+
+
+def optional_port(value: str) -> Optional[int]:
+    return int(value) if value and int(value) > 0 else None
+
+
+syslog_receiver = SyslogReceiver(
+    host=os.getenv("SYSLOG_HOST", "0.0.0.0"),
+    udp_port=optional_port(os.getenv("SYSLOG_UDP_PORT", "5514")),
+    tcp_port=optional_port(os.getenv("SYSLOG_TCP_PORT", "5514")),
+    spool_dir=os.getenv("SYSLOG_SPOOL_DIR", os.path.join(os.getcwd(), "uploads", "syslog")),
+    batch_size=int(os.getenv("SYSLOG_BATCH_SIZE", "5000")),
+    flush_interval=int(os.getenv("SYSLOG_FLUSH_INTERVAL_MS", "200")) / 1000,
+    max_buffer=int(os.getenv("SYSLOG_MAX_BUFFER", "100000")),
+    max_file_bytes=int(os.getenv("SYSLOG_MAX_FILE_MB", "100")) * 1024 * 1024,
+    backups=int(os.getenv("SYSLOG_SPOOL_BACKUPS", "3")),
+    enabled=os.getenv("SYSLOG_ENABLED", "false").lower() in ("1", "true", "yes"),
+)
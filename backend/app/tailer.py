@@ -0,0 +1,341 @@
+import asyncio
+import fnmatch
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+try:
+    from watchfiles import awatch
+except ImportError:  # inotify izleyicisi yoksa dizinler yalnızca periyodik olarak taranır
+    awatch = None
+
+from .database import SessionLocal, AnalysisJob, LogFile, TailCheckpoint
+from .ingest import count_newlines, last_line_end
+from .jobs import job_manager, ACTIVE_JOB_STATES
+
+logger = logging.getLogger(__name__)
+
+# Dosya kimliği: (cihaz, inode); döndürülen dosya yeni yolunda da aynı kimlikle izlenir
+FileKey = Tuple[int, int]
+
+
+class TailedFile:
+    """İzlenen bir dosyanın bellek içi durumu"""
+
+    def __init__(self, checkpoint_id: int, key: FileKey, path: str, log_file_id: int, size: int,
+                 counted_offset: int, rotated: bool = False):
+        self.checkpoint_id = checkpoint_id
+        self.key = key
+        self.path = path
+        self.log_file_id = log_file_id
+        self.size = size
+        self.rotated = rotated
+        # Bekleyen satırlar sayıldığı yere kadar; satırların kendisi bellekte tutulmaz, diskte bekler
+        self.counted_offset = counted_offset
+        self.pending_lines = 0
+        self.pending_since: Optional[float] = None
+
+    def status(self) -> Dict:
+        return {
+            "path": self.path,
+            "file_id": self.log_file_id,
+            "size": self.size,
+            "pending_lines": self.pending_lines,
+            "pending_seconds": round(time.monotonic() - self.pending_since, 1) if self.pending_since else 0.0,
+            "rotated": self.rotated,
+        }
+
+
+class TailIngestDaemon:
+    """Yapılandırılan dizinleri izleyip büyüyen logları analiz hattına besleyen servis
+
+    Dosya değişiklikleri inotify (watchfiles) ile anında, inotify yoksa ya da
+    olay kaçarsa ``poll_interval`` aralıklı taramayla fark edilir. Yeni satırlar
+    ``batch_lines`` kadar birikince ya da ilki ``max_latency`` saniyedir beklerken
+    dosya için artımlı bir analiz işi kuyruğa alınır.
+
+    Satırlar bellekte tamponlanmaz: LLM geride kaldığında (aktif iş sayısı
+    ``max_active_jobs``'a ulaştığında) yeni iş açılmaz, satırlar diskte birikir ve
+    sıradaki artımlı analiz hepsini tek seferde işler. Dosyalar inode ile
+    izlendiği için döndürülen dosya yeni adıyla takip edilip kalan satırları
+    analiz edilir, aynı yolda açılan yeni dosya ayrı bir kayıt olarak eklenir.
+    Kaldığı yer ``tail_checkpoints`` ve dosyanın ``analyzed_offset`` değerinde
+    saklandığı için yeniden başlatmada satırlar tekrar analiz edilmez.
+    """
+
+    def __init__(self, directories: List[str], pattern: str = "*.log", analysis_type: str = "detailed",
+                 batch_lines: int = 1000, max_latency: float = 30.0, poll_interval: float = 5.0,
+                 max_active_jobs: int = 2, force_polling: bool = False):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.pattern = pattern
+        # Dizine özel desenler (ör. syslog alıcısının dosyaları); yoksa genel desen geçerli
+        self.patterns: Dict[str, str] = {}
+        self.analysis_type = analysis_type
+        self.batch_lines = batch_lines
+        self.max_latency = max_latency
+        self.poll_interval = poll_interval
+        self.max_active_jobs = max(1, max_active_jobs)
+        self.force_polling = force_polling
+        self.files: Dict[FileKey, TailedFile] = {}
+        self.wake: Optional[asyncio.Event] = None
+        self.tasks: List[asyncio.Task] = []
+        self.stats = {"jobs_enqueued": 0, "backpressure_waits": 0, "rotations": 0, "truncations": 0}
+
+    def add_directory(self, directory: str, pattern: Optional[str] = None):
+        """Servis başlamadan önce izlenecek dizin ekle"""
+        directory = os.path.abspath(directory)
+        if directory not in self.directories:
+            self.directories.append(directory)
+        if pattern:
+            self.patterns[directory] = pattern
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directories)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if awatch is not None and not self.force_polling else "polling"
+
+    async def start(self):
+        if not self.enabled:
+            return
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                logger.warning(f"İzlenecek dizin bulunamadı: {directory}")
+        self.wake = asyncio.Event()
+        await asyncio.to_thread(self._load_checkpoints)
+        self.tasks = [asyncio.create_task(self._run())]
+        if self.mode == "inotify":
+            self.tasks.append(asyncio.create_task(self._watch()))
+        logger.info(f"Log izleme başlatıldı ({self.mode}): {', '.join(self.directories)}")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def _load_checkpoints(self):
+        db = SessionLocal()
+        try:
+            rows = db.query(TailCheckpoint, LogFile.analyzed_offset).outerjoin(
+                LogFile, LogFile.id == TailCheckpoint.log_file_id
+            ).all()
+            for checkpoint, analyzed_offset in rows:
+                key = (checkpoint.device, checkpoint.inode)
+                self.files[key] = TailedFile(checkpoint.id, key, checkpoint.path, checkpoint.log_file_id,
+                                             checkpoint.size or 0, analyzed_offset or 0, bool(checkpoint.rotated))
+        finally:
+            db.close()
+
+    async def _watch(self):
+        """Dizinlerde değişiklik olunca tarama döngüsünü uyandır"""
+        existing = [directory for directory in self.directories if os.path.isdir(directory)]
+        if not existing:
+            return
+        try:
+            async for _ in awatch(*existing, recursive=False, debounce=500):
+                self.wake.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Periyodik tarama çalışmaya devam eder
+            logger.warning(f"inotify izleyicisi durdu, periyodik taramaya geçildi: {str(e)}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                await asyncio.to_thread(self._scan)
+                await asyncio.to_thread(self._dispatch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Log izleme taraması başarısız: {str(e)}")
+
+    def _list_files(self) -> Dict[FileKey, Tuple[str, int]]:
+        found: Dict[FileKey, Tuple[str, int]] = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        found[(stat.st_dev, stat.st_ino)] = (entry.path, stat.st_size)
+                except OSError:
+                    continue
+        return found
+
+    def _matches(self, path: str) -> bool:
+        directory, name = os.path.split(path)
+        return fnmatch.fnmatch(name, self.patterns.get(directory, self.pattern))
+
+    def _scan(self):
+        """Dosyaları tara: yeni, döndürülmüş, kesilmiş ve silinmiş dosyaları işle, bekleyen satırları say"""
+        found = self._list_files()
+        db = SessionLocal()
+        try:
+            for key in list(self.files):
+                tailed = self.files[key]
+                if key not in found:
+                    # Dosya silindi ya da izlenen dizinlerin dışına taşındı
+                    logger.info(f"İzlenen dosya kayboldu, takip bırakıldı: {tailed.path}")
+                    db.query(TailCheckpoint).filter(TailCheckpoint.id == tailed.checkpoint_id).delete()
+                    del self.files[key]
+                    continue
+
+                path, size = found[key]
+                if path != tailed.path:
+                    logger.info(f"Log döndürüldü: {tailed.path} -> {path}")
+                    self.stats["rotations"] += 1
+                    tailed.path = path
+                    tailed.rotated = tailed.rotated or not self._matches(path)
+                    db.query(LogFile).filter(LogFile.id == tailed.log_file_id).update({LogFile.file_path: path})
+                if size < tailed.size:
+                    # copytruncate: analiz, ön ek özeti tutmadığı için dosyayı baştan alır
+                    logger.info(f"Log kesildi (truncate): {path}")
+                    self.stats["truncations"] += 1
+                    tailed.counted_offset = 0
+                    tailed.pending_lines = 0
+                    tailed.pending_since = None
+                if size != tailed.size:
+                    tailed.size = size
+                    db.query(TailCheckpoint).filter(TailCheckpoint.id == tailed.checkpoint_id).update({
+                        TailCheckpoint.path: path,
+                        TailCheckpoint.size: size,
+                        TailCheckpoint.rotated: tailed.rotated,
+                        TailCheckpoint.updated_at: datetime.utcnow(),
+                    })
+
+            for key, (path, size) in found.items():
+                if key not in self.files and self._matches(path):
+                    self._register(db, key, path, size)
+
+            db.commit()
+        finally:
+            db.close()
+
+        for tailed in self.files.values():
+            self._count_pending(tailed)
+
+    def _register(self, db, key: FileKey, path: str, size: int):
+        log_file = LogFile(
+            filename=os.path.basename(path),
+            file_size=size,
+            total_lines=0,
+            anomaly_count=None,
+            file_path=path,
+            status="tailing"
+        )
+        db.add(log_file)
+        db.flush()
+        # Aynı inode'a ait eski (silinmiş dosyadan kalan) kayıt varsa yenisiyle değiştir
+        db.query(TailCheckpoint).filter(TailCheckpoint.device == key[0], TailCheckpoint.inode == key[1]).delete()
+        checkpoint = TailCheckpoint(device=key[0], inode=key[1], path=path, log_file_id=log_file.id, size=size)
+        db.add(checkpoint)
+        db.flush()
+        self.files[key] = TailedFile(checkpoint.id, key, path, log_file.id, size, 0)
+        logger.info(f"Yeni log dosyası izlemeye alındı: {path} (dosya {log_file.id})")
+
+    def _count_pending(self, tailed: TailedFile):
+        """Son sayılan yerden itibaren eklenen tam satırları say (yalnızca yeni byte'lar okunur)"""
+        if tailed.size <= tailed.counted_offset:
+            return
+        try:
+            end = last_line_end(tailed.path, tailed.size)
+            if end <= tailed.counted_offset:
+                return
+            tailed.pending_lines += count_newlines(tailed.path, tailed.counted_offset, end)
+        except OSError:
+            return
+        tailed.counted_offset = end
+        if tailed.pending_since is None:
+            tailed.pending_since = time.monotonic()
+
+    def _dispatch(self):
+        """Süresi ya da boyutu dolan dosyalar için artımlı analiz işi aç (geri basınç sınırı ile)"""
+        now = time.monotonic()
+        due = [
+            tailed for tailed in self.files.values()
+            if tailed.pending_lines and (tailed.pending_lines >= self.batch_lines
+                                         or now - tailed.pending_since >= self.max_latency)
+        ]
+        drained = [tailed for tailed in self.files.values() if tailed.rotated and not tailed.pending_lines]
+        if not due and not drained:
+            return
+
+        db = SessionLocal()
+        try:
+            active_files = {
+                file_id for (file_id,) in db.query(AnalysisJob.log_file_id).filter(AnalysisJob.status.in_(ACTIVE_JOB_STATES))
+            }
+            active_jobs = db.query(func.count(AnalysisJob.id)).filter(AnalysisJob.status.in_(ACTIVE_JOB_STATES)).scalar()
+
+            # En uzun süredir bekleyen dosya önce
+            for tailed in sorted(due, key=lambda item: item.pending_since):
+                if tailed.log_file_id in active_files:
+                    # Dosyanın önceki işi sürüyor; yeni satırlar bir sonraki işe kalır
+                    continue
+                if active_jobs >= self.max_active_jobs:
+                    self.stats["backpressure_waits"] += 1
+                    break
+                log_file = db.query(LogFile).filter(LogFile.id == tailed.log_file_id).first()
+                if log_file is None:
+                    continue
+                _, created = job_manager.enqueue(db, log_file, self.analysis_type, incremental=True)
+                if created:
+                    active_jobs += 1
+                    self.stats["jobs_enqueued"] += 1
+                tailed.pending_lines = 0
+                tailed.pending_since = None
+
+            # Döndürülmüş dosyanın kalan satırları analiz edildiyse takibi bırak
+            for tailed in drained:
+                if tailed.log_file_id in active_files or tailed.key not in self.files:
+                    continue
+                analyzed_offset = db.query(LogFile.analyzed_offset).filter(LogFile.id == tailed.log_file_id).scalar()
+                if (analyzed_offset or 0) >= tailed.counted_offset:
+                    db.query(TailCheckpoint).filter(TailCheckpoint.id == tailed.checkpoint_id).delete()
+                    del self.files[tailed.key]
+                    logger.info(f"Döndürülen log tamamen analiz edildi, takip bitti: {tailed.path}")
+            db.commit()
+        finally:
+            db.close()
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode if self.enabled else None,
+            "directories": self.directories,
+            "pattern": self.pattern,
+            "analysis_type": self.analysis_type,
+            "batch_lines": self.batch_lines,
+            "max_latency": self.max_latency,
+            "max_active_jobs": self.max_active_jobs,
+            **self.stats,
+            "files": [tailed.status() for tailed in self.files.values()],
+        }
+
+
+tail_daemon = TailIngestDaemon(
+    directories=[directory.strip() for directory in os.getenv("TAIL_DIRECTORIES", "").split(",") if directory.strip()],
+    pattern=os.getenv("TAIL_PATTERN", "*.log"),
+    analysis_type=os.getenv("TAIL_ANALYSIS_TYPE", "detailed"),
+    batch_lines=int(os.getenv("TAIL_BATCH_LINES", "1000")),
+    max_latency=float(os.getenv("TAIL_MAX_LATENCY_SECONDS", "30")),
+    poll_interval=float(os.getenv("TAIL_POLL_INTERVAL_SECONDS", "5")),
+    max_active_jobs=int(os.getenv("TAIL_MAX_ACTIVE_JOBS", "2")),
+    force_polling=os.getenv("TAIL_FORCE_POLLING", "false").lower() in ("1", "true", "yes"),
+)
@@ -0,0 +1,139 @@
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Değişken alanları maskelemek için sıralı regex listesi (önce en spesifik olanlar)
+MASKING_PATTERNS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<TS>"),
+    (re.compile(r"\b\d{1,2}[./]\d{1,2}[./]\d{2,4}(?: \d{1,2}:\d{2}(?::\d{2})?)?\b"), "<TS>"),
+    (re.compile(r"\b[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}\b"), "<TS>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<HEX>"),
+    (re.compile(r"(?<![\w.-])-?\d+(?:\.\d+)?(?![\w.])"), "<NUM>"),
+]
+
+WILDCARD = "<*>"
+
+
+def mask_variables(line: str) -> str:
+    """Zaman damgası, IP, sayı gibi değişken alanları maskele"""
+    for pattern, replacement in MASKING_PATTERNS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+class LogCluster:
+    """Aynı şablona sahip log satırlarının kümesi"""
+
+    def __init__(self, cluster_id: int, template_tokens: List[str], leaf: List["LogCluster"]):
+        self.cluster_id = cluster_id
+        self.template_tokens = template_tokens
+        self.leaf = leaf  # Kümenin bulunduğu ağaç yaprağı (çıkarılırken gerekir)
+        self.size = 0
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.template_tokens)
+
+
+class TemplateMiner:
+    """Drain tarzı çevrimiçi log şablonu çıkarıcı
+
+    Satırlar önce değişken alanları maskelenerek token'lara ayrılır, ardından
+    token sayısı ve ilk birkaç token ile oluşturulan sabit derinlikli ağaçta
+    en benzer kümeye yerleştirilir. Benzerlik eşiğinin altında kalan satırlar
+    yeni bir şablon başlatır; kümeye eklenen satırlarla farklılaşan token'lar
+    ``<*>`` ile değiştirilir.
+
+    ``clusters`` küme id'sinden kümeye eşlemedir. ``max_clusters`` verilirse bellek
+    sınırlıdır: ``trim`` çağrıldığında en uzun süredir satır almayan kümeler
+    çıkarılır (LRU); çıkarılan bir şablon yeniden görülürse yeni id ile başlar.
+    """
+
+    def __init__(self, depth: int = 4, sim_threshold: float = 0.5, max_children: int = 100,
+                 max_clusters: Optional[int] = None):
+        # depth: kök ve uzunluk düğümü dahil ağaç derinliği
+        self.prefix_depth = max(1, depth - 2)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root: Dict[int, Dict] = {}
+        self.clusters: "OrderedDict[int, LogCluster]" = OrderedDict()
+        self.cluster_count = 0  # Şimdiye kadar oluşturulan küme sayısı (çıkarılanlar dahil)
+
+    def tokenize(self, line: str) -> List[str]:
+        return mask_variables(line).split()
+
+    def _tree_key(self, token: str) -> str:
+        # Rakam içeren token'lar ağaçta dallanmaya yol açmasın
+        return WILDCARD if any(ch.isdigit() for ch in token) else token
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_depth]:
+            key = self._tree_key(token)
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = WILDCARD
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault("__clusters__", [])
+
+    def _similarity(self, template_tokens: List[str], tokens: List[str]):
+        """(benzerlik, joker sayısı) döndür; jokerler benzerliğe katkı sağlamaz"""
+        if not tokens:
+            return 1.0, 0
+        same = 0
+        wildcards = 0
+        for a, b in zip(template_tokens, tokens):
+            if a == WILDCARD:
+                wildcards += 1
+            elif a == b:
+                same += 1
+        return same / len(tokens), wildcards
+
+    def _find_cluster(self, clusters: List[LogCluster], tokens: List[str]) -> Optional[LogCluster]:
+        best, best_key = None, (-1.0, 0)
+        for cluster in clusters:
+            sim, wildcards = self._similarity(cluster.template_tokens, tokens)
+            # Eşit benzerlikte daha fazla joker içeren (daha genel) şablon tercih edilir
+            if (sim, wildcards) > best_key:
+                best, best_key = cluster, (sim, wildcards)
+        return best if best is not None and best_key[0] >= self.sim_threshold else None
+
+    def add_log_message(self, line: str) -> LogCluster:
+        """Satırı uygun kümeye ekle (gerekirse yeni küme oluştur) ve kümeyi döndür"""
+        tokens = self.tokenize(line)
+        clusters = self._leaf(tokens)
+        cluster = self._find_cluster(clusters, tokens)
+
+        if cluster is None:
+            cluster = LogCluster(self.cluster_count, tokens, clusters)
+            self.cluster_count += 1
+            self.clusters[cluster.cluster_id] = cluster
+            clusters.append(cluster)
+        else:
+            cluster.template_tokens = [
+                a if a == b else WILDCARD
+                for a, b in zip(cluster.template_tokens, tokens)
+            ]
+            if self.max_clusters:
+                self.clusters.move_to_end(cluster.cluster_id)
+
+        cluster.size += 1
+        return cluster
+
+    def trim(self) -> List[int]:
+        """Küme sayısını ``max_clusters``'a indir; çıkarılan küme id'lerini döndür
+
+        Kümeler yalnızca bu çağrıda çıkarılır, böylece bir pencere işlenirken
+        pencerenin satırlarına verilen küme id'leri geçerli kalır.
+        """
+        evicted = []
+        while self.max_clusters and len(self.clusters) > self.max_clusters:
+            _, cluster = self.clusters.popitem(last=False)
+            cluster.leaf.remove(cluster)
+            evicted.append(cluster.cluster_id)
+        return evicted
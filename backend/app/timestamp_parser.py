@@ -0,0 +1,242 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# pandas'ın ISO 8601 ayrıştırıcısı (kesirli saniye, "T" ve saat dilimi dahil) için özel biçim adı
+ISO_FORMAT = "ISO8601"
+# Biçim tahmin edilemeyen değerler için yavaş, değer başına çözümleme (dateutil)
+MIXED_FORMAT = "mixed"
+
+# Tespit sırasında denenen biçimler; eşit oranda eşleşmede listedeki sıra belirleyicidir
+FORMAT_CANDIDATES = (
+    ISO_FORMAT,
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d/%m/%Y %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%b %d %H:%M:%S",
+    "%d/%b/%Y:%H:%M:%S %z",
+    "%d/%b/%Y:%H:%M:%S",
+    "%Y%m%d %H:%M:%S",
+)
+
+# Sabit genişlikli hızlı yolda desteklenen alanlar ve genişlikleri
+LAYOUT_FIELDS = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2, "b": 3}
+MONTH_ABBREVIATIONS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+FORMAT_CACHE_SIZE = 64
+# Bir imzanın biçimi tahmin edilirken denenecek en fazla örnek değer
+FORMAT_GUESS_EXAMPLES = 5
+
+DIGIT = ord("0")
+SPACE = ord(" ")
+
+
+def compile_layout(fmt: str) -> Optional[Tuple[int, Dict[str, int], List[Tuple[int, int]]]]:
+    """strptime biçimini sabit genişlikli düzene çevir: (genişlik, alan -> konum, [(konum, sabit karakter)])
+
+    Yalnızca sabit genişlikli alanlardan (``%Y %m %d %H %M %S %b``) oluşan biçimler
+    derlenebilir; diğerleri için None döner ve pandas'ın strptime yolu kullanılır.
+    """
+    position = 0
+    fields: Dict[str, int] = {}
+    literals: List[Tuple[int, int]] = []
+    index = 0
+    while index < len(fmt):
+        if fmt[index] == "%":
+            code = fmt[index + 1:index + 2]
+            if code not in LAYOUT_FIELDS or code in fields:
+                return None
+            fields[code] = position
+            position += LAYOUT_FIELDS[code]
+            index += 2
+        else:
+            literals.append((position, ord(fmt[index])))
+            position += 1
+            index += 1
+    return position, fields, literals
+
+
+def value_shape(values: pd.Series) -> pd.Series:
+    """Değerlerin biçim imzası: rakamlar 0, harfler a olur ("14.11.2020 08:41" -> "00.00.0000 00:00")"""
+    return values.str.replace(r"\d", "0", regex=True).str.replace(r"[A-Za-z]", "a", regex=True)
+
+
+def iso_values(values: pd.Series) -> pd.Series:
+    """Python logging'in virgüllü kesirli saniyesini ("08:41:02,120") ISO'daki noktaya çevir"""
+    return values.str.replace(",", ".", regex=False)
+
+
+def guess_format(value: str) -> Optional[str]:
+    """Tek bir değer için aday biçimlerden uyanı, yoksa değer başına çözümlemeyi seç"""
+    for fmt in FORMAT_CANDIDATES:
+        if fmt == ISO_FORMAT:
+            if not pd.isna(pd.to_datetime(value.replace(",", "."), format=ISO_FORMAT, errors="coerce")):
+                return fmt
+            continue
+        try:
+            datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    if not pd.isna(pd.to_datetime(pd.Series([value]), format=MIXED_FORMAT, errors="coerce").iloc[0]):
+        return MIXED_FORMAT
+    return None
+
+
+class FormatCache:
+    """Biçim imzası -> biçim eşlemesi için küçük LRU önbellek
+
+    Dosyanın biçimine uymayan satırlar imzalarına göre gruplanır; her imza için
+    biçim yalnızca bir kez tahmin edilir.
+    """
+
+    def __init__(self, max_size: int = FORMAT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shape: str, examples: List[str]) -> Optional[str]:
+        if shape in self.entries:
+            self.entries.move_to_end(shape)
+            self.hits += 1
+            return self.entries[shape]
+        self.misses += 1
+        # Geçersiz tek bir değer (ör. 31.02) imzayı yanlış biçime bağlamasın diye birkaç örnek denenir
+        fmt = next((guessed for guessed in map(guess_format, examples) if guessed is not None), None)
+        if fmt is not None:
+            self.entries[shape] = fmt
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return fmt
+
+
+format_cache = FormatCache()
+
+
+class TimestampParser:
+    """Dosya başına bir kez tespit edilen biçimle zaman damgası ayrıştırıcı
+
+    Hızlı yol: ISO biçimleri pandas'ın C ayrıştırıcısıyla, sabit genişlikli biçimler
+    (``14.11.2020 08:41``, ``Aug 20 01:13:04``) karakter kodları üzerinden NumPy
+    aritmetiğiyle çözülür; değer başına ``strptime`` çağrısı yapılmaz. Biçime uymayan
+    satırlar imzalarına göre gruplanıp ``format_cache``'teki tahminle ayrıştırılır.
+    Yılı olmayan biçimlerde (syslog) yıl ``reference``'tan alınır; ileri tarihe
+    düşen kayıtlar önceki yıla sayılır. Sonuç saat dilimsiz UTC'dir.
+    """
+
+    def __init__(self, fmt: Optional[str] = None, reference: Optional[datetime] = None):
+        self.format = fmt
+        self.reference = reference or datetime.now()
+        self.layout = compile_layout(fmt) if fmt and fmt not in (ISO_FORMAT, MIXED_FORMAT) else None
+
+    @classmethod
+    def detect(cls, values: pd.Series, reference: Optional[datetime] = None) -> "TimestampParser":
+        """Örnek değerlerde en çok eşleşen aday biçimi seç"""
+        sample = values.dropna()
+        sample = sample[sample.str.len() > 0]
+        best, best_ratio = None, 0.0
+        for fmt in FORMAT_CANDIDATES if not sample.empty else ():
+            candidate = iso_values(sample) if fmt == ISO_FORMAT else sample
+            ratio = pd.to_datetime(candidate, format=fmt, errors="coerce", utc=True).notna().mean()
+            if ratio > best_ratio:
+                best, best_ratio = fmt, ratio
+        return cls(best, reference)
+
+    def parse(self, values: pd.Series) -> pd.Series:
+        """Metin kolonunu datetime kolonuna çevir; çözülemeyenler NaT olur"""
+        result = self._parse_with(values, self.format) if self.format else pd.Series(pd.NaT, index=values.index)
+        missed = result.isna() & values.notna() & (values.astype(str).str.len() > 0)
+        if missed.any():
+            misses = values[missed].astype(str)
+            for shape, group in misses.groupby(value_shape(misses), sort=False):
+                fmt = format_cache.get(shape, group.iloc[:FORMAT_GUESS_EXAMPLES].tolist())
+                if fmt is None:
+                    continue
+                # Dosya biçiminin hızlı yolda kalanları (ör. sıfırsız "1.11.2020") strptime ile çözülür;
+                # başka biçimler önce hızlı yoldan, sıfırsız değerleri yine strptime'dan geçer
+                parsed = self._parse_with(group, fmt, fast=fmt != self.format)
+                unpadded = parsed.isna()
+                if fmt != self.format and unpadded.any():
+                    parsed[unpadded] = self._parse_with(group[unpadded], fmt, fast=False)
+                result.loc[group.index] = parsed
+        return result
+
+    def _parse_with(self, values: pd.Series, fmt: str, fast: bool = True) -> pd.Series:
+        layout = None
+        if fast:
+            layout = self.layout if fmt == self.format else (
+                compile_layout(fmt) if fmt not in (ISO_FORMAT, MIXED_FORMAT) else None
+            )
+        if layout is not None:
+            return self._parse_layout(values, layout)
+        if fmt == ISO_FORMAT:
+            values = iso_values(values)
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce", utc=True)
+        return parsed.dt.tz_localize(None).astype("datetime64[ns]")
+
+    def _parse_layout(self, values: pd.Series, layout) -> pd.Series:
+        width, fields, literals = layout
+        count = len(values)
+        # Her değer width + 1 karakterlik UCS-4 hücreye yazılır; uzun değerler fazladan karakterden, kısalar
+        # boş (0) hücreden ve sabit karakter/rakam kontrollerinden yakalanır
+        text = np.array(values.tolist(), dtype=f"<U{width + 1}")
+        codes = text.view(np.uint32).reshape(count, width + 1)
+        valid = codes[:, width] == 0
+        for position, char in literals:
+            valid &= codes[:, position] == char
+
+        def number(code: str, default: int = 0, space_padded: bool = False) -> np.ndarray:
+            nonlocal valid
+            if code not in fields:
+                return np.full(count, default, dtype=np.int64)
+            offset = fields[code]
+            digits = codes[:, offset:offset + LAYOUT_FIELDS[code]].astype(np.int64)
+            if space_padded:
+                digits = np.where(digits == SPACE, DIGIT, digits)
+            digits = digits - DIGIT
+            valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+            return digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1))
+
+        if "b" in fields:
+            offset = fields["b"]
+            letters = codes[:, offset:offset + 3].astype(np.int64) | 0x20  # ASCII küçük harf
+            keys = (letters[:, 0] << 16) | (letters[:, 1] << 8) | letters[:, 2]
+            month = np.zeros(count, dtype=np.int64)
+            for index, name in enumerate(MONTH_ABBREVIATIONS, 1):
+                month[keys == ((ord(name[0]) << 16) | (ord(name[1]) << 8) | ord(name[2]))] = index
+        else:
+            month = number("m")
+        year = number("Y", default=self.reference.year)
+        day = number("d", space_padded=True)
+        hour, minute, second = number("H", space_padded=True), number("M"), number("S")
+        valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31) & (hour < 24) & (minute < 60) & (second < 61)
+
+        timestamps = self._combine(year, month, day, hour, minute, second, valid)
+        if "Y" not in fields:
+            # Yılsız biçim: referanstan bir günden fazla ileride kalanlar geçen yıla aittir
+            future = timestamps > np.datetime64(self.reference + timedelta(days=1))
+            if future.any():
+                timestamps[future] = self._combine(year[future] - 1, month[future], day[future], hour[future],
+                                                   minute[future], second[future], valid[future])
+        return pd.Series(timestamps.astype("datetime64[ns]"), index=values.index)
+
+    @staticmethod
+    def _combine(year, month, day, hour, minute, second, valid) -> np.ndarray:
+        months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+        days = months.astype("datetime64[D]") + np.where(valid, day - 1, 0).astype("timedelta64[D]")
+        # 31 Şubat gibi taşan günler ayı değiştirir; bunlar geçersizdir
+        valid = valid & (days.astype("datetime64[M]") == months)
+        timestamps = days.astype("datetime64[s]") + (hour * 3600 + minute * 60 + second).astype("timedelta64[s]")
+        timestamps[~valid] = np.datetime64("NaT")
+        return timestamps
@@ -0,0 +1,117 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from .ingest import CHUNK_SIZE, IngestWriter
+
+
+class UploadFormatError(Exception):
+    """Yükleme isteği beklenen multipart biçiminde değil ya da dosya kabul edilmiyor"""
+
+
+class MultipartUpload:
+    """multipart/form-data gövdesini parça parça ayrıştır, ``field`` alanındaki dosyanın byte'larını biriktir
+
+    Gövde bellekte ya da geçici dosyada toplanmaz: ayrıştırıcıya verilen her parçadaki
+    dosya verisi ``pending``'e eklenir ve çağıran tarafından ``flush`` ile doğrudan
+    ``IngestWriter``'a yazılır. Dosya adı başlıklardan okunduğunda ``filename`` dolar;
+    writer'ı çağıran açar ve ``writer``'a atar.
+    """
+
+    def __init__(self, content_type: str, field: str):
+        media_type, params = parse_options_header(content_type.encode("latin-1"))
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise UploadFormatError("İstek multipart/form-data biçiminde olmalıdır")
+        self.field = field
+        self.filename: Optional[str] = None
+        self.writer: Optional[IngestWriter] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.in_file_part = False
+        self.headers: Dict[bytes, bytes] = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        })
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.in_file_part = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        filename = options.get(b"filename")
+        # Aynı addaki sonraki dosya alanları yok sayılır
+        if name != self.field or filename is None or self.filename is not None:
+            return
+        self.filename = filename.decode("utf-8", errors="replace")
+        self.in_file_part = True
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.in_file_part:
+            self.pending.append(data[start:end])
+            self.pending_bytes += end - start
+
+    def on_part_end(self):
+        self.in_file_part = False
+
+    def flush(self):
+        """Biriken dosya verisini writer'a yaz (disk yazımı; thread'de çağrılır)"""
+        if self.writer is None:
+            return
+        if self.pending:
+            self.writer.feed(b"".join(self.pending))
+        self.pending = []
+        self.pending_bytes = 0
+
+
+async def receive_upload(request: Request, field: str, open_writer: Callable[[str], Awaitable[IngestWriter]],
+                         flush_bytes: int = CHUNK_SIZE) -> Tuple[str, Dict]:
+    """İstek gövdesini geldikçe ayrıştırıp diske yaz; (dosya adı, ingest sonucu) döndür
+
+    Writer, dosya adı part başlıklarından okunduğu anda ``await open_writer(dosya adı)``
+    ile açılır. Boyut sınırı yazım sırasında uygulanır: sınır aşıldığında gövdenin
+    geri kalanı okunmadan ``UploadTooLargeError`` fırlatılır. Hata durumunda yarım
+    dosyalar silinir.
+    """
+    upload = MultipartUpload(request.headers.get("content-type", ""), field)
+    try:
+        async for chunk in request.stream():
+            upload.parser.write(chunk)
+            if upload.filename is not None and upload.writer is None:
+                upload.writer = await open_writer(upload.filename)
+            if upload.pending_bytes >= flush_bytes:
+                await run_in_threadpool(upload.flush)
+        upload.parser.finalize()
+        if upload.filename is not None and upload.writer is None:
+            upload.writer = await open_writer(upload.filename)
+        if upload.writer is None:
+            raise UploadFormatError(f"İstekte '{field}' dosya alanı bulunamadı")
+        await run_in_threadpool(upload.flush)
+        return upload.filename, await run_in_threadpool(upload.writer.finish)
+    except BaseException:
+        if upload.writer is not None:
+            upload.writer.abort()
+        raise
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+
+from .database import SessionLocal, LLMVerdictCache
+from .template_miner import mask_variables
+
+logger = logging.getLogger(__name__)
+
+# Önbellekte saklanan karar alanları (satıra özgü alanlar saklanmaz)
+VERDICT_FIELDS = ("is_anomaly", "severity", "anomaly_type", "confidence", "explanation")
+# Kayıt sayısı sınırı aşılmadıkça tahliye (TTL silme ve sayım) en fazla bu kadar eklemede bir yapılır
+EVICTION_INTERVAL = 5000
+# Sınır aşılınca kayıt sayısı sınırın bu oranı kadar altına indirilir; her pencerede yeniden tahliye gerekmez
+EVICTION_HEADROOM = 0.1
+
+
+class VerdictCache:
+    """SQLite üzerinde kalıcı, içerik adresli LLM karar önbelleği
+
+    Anahtar; değişken alanları maskelenmiş satır, model adı ve prompt sürümünün
+    SHA-256 özetidir. Kayıtlar TTL süresi dolunca ya da ``max_entries`` aşıldığında
+    en uzun süredir kullanılmayandan başlanarak (LRU) silinir. Kayıt sayısı her
+    eklemede sayılmaz; yaklaşık olarak izlenir ve tahliye yalnızca sınır aşıldığında
+    ya da ``EVICTION_INTERVAL`` eklemede bir yapılır.
+    """
+
+    def __init__(self, model_name: str, prompt_version: str, max_entries: int = 200000,
+                 ttl: timedelta = timedelta(days=30), session_factory=SessionLocal):
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.hits = 0
+        self.misses = 0
+        # Son tahliyedeki kesin sayıya eklenen kayıtlar (güncellenen anahtarlar da sayıldığı için üst sınır)
+        self.estimated_entries: Optional[int] = None
+        self.inserts_since_eviction = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, line: str) -> str:
+        normalized = " ".join(mask_variables(line).split())
+        raw = f"{self.model_name}\x00{self.prompt_version}\x00{normalized}"
+        return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Anahtarlar için geçerli (süresi dolmamış) kararları döndür"""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+
+        found: Dict[str, Dict] = {}
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            # SQLite parametre limitini aşmamak için parçalar halinde sorgula
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = db.query(LLMVerdictCache.cache_key, LLMVerdictCache.verdict_json).filter(
+                    LLMVerdictCache.cache_key.in_(chunk),
+                    LLMVerdictCache.created_at >= now - self.ttl
+                ).all()
+                for cache_key, verdict_json in rows:
+                    found[cache_key] = json.loads(verdict_json)
+
+                hit_keys = [k for k in chunk if k in found]
+                if hit_keys:
+                    db.query(LLMVerdictCache).filter(LLMVerdictCache.cache_key.in_(hit_keys)).update(
+                        {
+                            LLMVerdictCache.last_access: now,
+                            LLMVerdictCache.hit_count: LLMVerdictCache.hit_count + 1,
+                        },
+                        synchronize_session=False,
+                    )
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, verdicts: Dict[str, Dict]):
+        """Yeni kararları kaydet ve gerekirse tahliye yap"""
+        if not verdicts:
+            return
+
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            for cache_key, verdict in verdicts.items():
+                db.merge(LLMVerdictCache(
+                    cache_key=cache_key,
+                    model_name=self.model_name,
+                    prompt_version=self.prompt_version,
+                    verdict_json=json.dumps(
+                        {field: verdict[field] for field in VERDICT_FIELDS if field in verdict},
+                        ensure_ascii=False
+                    ),
+                    created_at=now,
+                    last_access=now,
+                    hit_count=0,
+                ))
+            db.commit()
+            with self._lock:
+                self.inserts_since_eviction += len(verdicts)
+                if self.estimated_entries is not None:
+                    self.estimated_entries += len(verdicts)
+                due = (self.estimated_entries is None or self.estimated_entries > self.max_entries
+                       or self.inserts_since_eviction >= EVICTION_INTERVAL)
+            if due:
+                self._evict(db, now)
+        finally:
+            db.close()
+
+    def _evict(self, db, now: datetime):
+        """Süresi dolan kayıtları ve LRU sırasına göre fazla kayıtları sil"""
+        expired = db.query(LLMVerdictCache).filter(
+            LLMVerdictCache.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
+
+        entries = db.query(func.count(LLMVerdictCache.cache_key)).scalar()
+        overflow = entries - self.max_entries
+        if overflow > 0:
+            overflow += int(self.max_entries * EVICTION_HEADROOM)
+        evicted = 0
+        if overflow > 0:
+            oldest = db.query(LLMVerdictCache.cache_key).order_by(
+                LLMVerdictCache.last_access.asc()
+            ).limit(overflow).subquery()
+            evicted = db.query(LLMVerdictCache).filter(
+                LLMVerdictCache.cache_key.in_(oldest.select())
+            ).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            self.estimated_entries = entries - evicted
+            self.inserts_since_eviction = 0
+
+        if expired or evicted:
+            logger.info(f"LLM önbelleği: {expired} süresi dolmuş, {evicted} LRU kayıt silindi")
+
+    def stats(self) -> Dict:
+        """Süreç başlangıcından beri isabet istatistikleri ve kayıt sayısı"""
+        db = self.session_factory()
+        try:
+            entries = db.query(func.count(LLMVerdictCache.cache_key)).scalar()
+        finally:
+            db.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_days": self.ttl.days,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "model": self.model_name,
+            "prompt_version": self.prompt_version,
+        }
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Senkron ve asenkron veritabanı yolunun eşzamanlı yük altında karşılaştırması
+
+/api/files ve /api/analysis/{id}/results endpoint'lerine aynı event loop içinden
+eşzamanlı istek gönderilir. "sync" satırı eski yolu (async endpoint içinde
+senkron SessionLocal sorguları), "async" satırı main.py'deki aiosqlite yolunu ölçer.
+Event loop gecikmesi, loop bloklandığında diğer isteklerin ne kadar beklediğini gösterir.
+
+Not: eşzamanlılık bağlantı havuzunu (DB_POOL_SIZE + DB_MAX_OVERFLOW) aştığında
+senkron yol kilitlenir; havuzdan bağlantı bekleyen çağrı event loop'u bloklar ve
+bağlantıyı geri verecek istekler ilerleyemez. Bu yüzden varsayılan değer havuzun altındadır.
+
+Kullanım: python benchmark_db.py --files 200 --entries 200000 --concurrency 20 --requests 1000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix="loggy_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session, defer
+
+from app.database import SessionLocal, AnalysisResult, async_engine, LogEntry, LogFile, bulk_insert, create_tables, get_db
+from app.main import app as async_app
+from app.results_store import entry_to_result
+
+
+def build_sync_app() -> FastAPI:
+    """Karşılaştırma için eski yol: async endpoint içinde senkron oturum"""
+    sync_app = FastAPI()
+
+    @sync_app.get("/api/files")
+    async def get_uploaded_files(db: Session = Depends(get_db)):
+        files = db.query(LogFile).options(
+            defer(LogFile.security_report_json), defer(LogFile.security_report_blob)
+        ).order_by(LogFile.upload_date.desc()).all()
+        return {
+            "status": "success",
+            "files": [
+                {
+                    "id": file.id,
+                    "filename": file.filename,
+                    "file_size": file.file_size,
+                    "total_lines": file.total_lines,
+                    "anomaly_count": file.anomaly_count,
+                    "created_at": file.upload_date.isoformat(),
+                    "is_analyzed": file.anomaly_count is not None
+                }
+                for file in files
+            ]
+        }
+
+    @sync_app.get("/api/analysis/{file_id}/results")
+    async def get_analysis_results(file_id: int, page_size: int = 50, severity_filter: str = None,
+                                   cursor: int = None, db: Session = Depends(get_db)):
+        analysis = db.query(AnalysisResult).options(
+            defer(AnalysisResult.results_json), defer(AnalysisResult.results_blob)
+        ).filter(AnalysisResult.log_file_id == file_id).order_by(AnalysisResult.analysis_date.desc()).first()
+        if not analysis:
+            raise HTTPException(status_code=404, detail="Bu dosya için analiz sonucu bulunamadı")
+
+        query = db.query(LogEntry).filter(LogEntry.log_file_id == file_id)
+        if severity_filter == "anomalies":
+            query = query.filter(LogEntry.is_anomaly.is_(True))
+        if severity_filter == "anomalies":
+            total_results = analysis.anomaly_count
+        else:
+            total_results = analysis.total_lines
+        if cursor is not None:
+            query = query.filter(LogEntry.line_number > cursor)
+        entries = query.order_by(LogEntry.line_number.asc()).limit(page_size).all()
+        return {
+            "status": "success",
+            "total_results": total_results,
+            "results": [entry_to_result(entry) for entry in entries]
+        }
+
+    return sync_app
+
+
+def seed_database(file_count: int, entry_count: int) -> int:
+    """Test verisi oluştur, satır sonuçları olan dosyanın id'sini döndür"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        bulk_insert(db, LogFile, (
+            {"filename": f"bench_{i}.log", "file_size": 1024 * i, "total_lines": 1000 + i,
+             "anomaly_count": i % 7, "file_path": f"/tmp/bench_{i}.log", "status": "completed"}
+            for i in range(file_count)
+        ))
+        analysis = AnalysisResult(log_file_id=1, total_lines=entry_count, anomaly_count=entry_count // 100)
+        db.add(analysis)
+        db.flush()
+        bulk_insert(db, LogEntry, (
+            {"log_file_id": 1, "analysis_id": analysis.id, "line_number": i,
+             "message": f"2024-01-01 10:00:{i % 60:02d} INFO user{i % 50} login from 10.0.0.{i % 200}",
+             "is_anomaly": i % 100 == 0, "severity": "high" if i % 100 == 0 else "info",
+             "confidence": 0.9, "explanation": "Normal log", "verdict_source": "template"}
+            for i in range(1, entry_count + 1)
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return 1
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run_load(app, make_url, concurrency: int, total_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    counter = iter(range(total_requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in counter:
+                started = time.perf_counter()
+                response = await client.get(make_url())
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        # Isınma: bağlantı havuzunu doldur, ölçüme dahil etme
+        for _ in range(2):
+            await asyncio.gather(*(client.get(make_url()) for _ in range(concurrency)))
+
+        lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await lag_task
+
+    latencies.sort()
+    return {
+        "rps": total_requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_lag": max(lags) * 1000 if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Senkron / asenkron veritabanı yolu karşılaştırması")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"📦 Test verisi oluşturuluyor: {args.files} dosya, {args.entries} satır sonucu ({DB_DIR})")
+    file_id = seed_database(args.files, args.entries)
+
+    scenarios = {
+        "/api/files": lambda: "/api/files",
+        "/api/analysis/{id}/results": lambda: (
+            f"/api/analysis/{file_id}/results?page_size=50&cursor={random.randint(0, args.entries - 50)}"
+        ),
+        "/api/analysis/{id}/results?anomalies": lambda: (
+            f"/api/analysis/{file_id}/results?severity_filter=anomalies&page_size=50"
+            f"&cursor={random.randint(0, args.entries - 5000)}"
+        ),
+    }
+    apps = {"sync": build_sync_app(), "async": async_app}
+
+    print(f"🔄 {args.concurrency} eşzamanlı istemci, senaryo başına {args.requests} istek\n")
+    print(f"{'endpoint':<40} {'yol':<6} {'istek/sn':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max loop gecikmesi ms':>22}")
+    for name, make_url in scenarios.items():
+        for path_name, app in apps.items():
+            random.seed(0)
+            stats = await run_load(app, make_url, args.concurrency, args.requests)
+            print(f"{name:<40} {path_name:<6} {stats['rps']:>9.1f} {stats['p50']:>8.1f} {stats['p95']:>8.1f} "
+                  f"{stats['p99']:>8.1f} {stats['max_lag']:>22.1f}")
+
+    # aiosqlite bağlantı thread'leri kapanmazsa yorumlayıcı çıkışta bekler
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,14 +10,18 @@ import { useSearchParams } from 'react-router-dom';
 const Analysis = () => {
   const [analysisStatus, setAnalysisStatus] = useState('idle'); // idle, running, completed
   const [progress, setProgress] = useState(0);
+  const [jobInfo, setJobInfo] = useState(null);
+  const [liveFindings, setLiveFindings] = useState([]);
   const [searchParams] = useSearchParams();
   const [fileId, setFileId] = useState(null);
   const [fileData, setFileData] = useState(null);
   const [analysisData, setAnalysisData] = useState(null);
   const [analysisResults, setAnalysisResults] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null); // Sonraki sonuç sayfasının başlangıcı (keyset)
   const [searchFilter, setSearchFilter] = useState('');
   const [severityFilter, setSeverityFilter] = useState('all');
-  const [analysisType, setAnalysisType] = useState('fast'); // fast, detailed
+  const [analysisType, setAnalysisType] = useState('fast'); // fast, detailed, statistical
+  const [lineContext, setLineContext] = useState(null); // { lineNumber, lines }
   const { addToast } = useToast();
 
 
@@ -66,29 +70,64 @@ const Analysis = () => {
     }
   }, [fileId, loadFileData]);
 
-  const loadAnalysisResults = async () => {
+  const loadAnalysisResults = async (cursor = null) => {
     if (!fileId) return;
     
     try {
-      // Dosya ID'si ile analiz sonuçlarını yükle
-      const response = await fetch(`http://localhost:8000/api/analysis/${fileId}/results`);
+      // Dosya ID'si ile analiz sonuçlarını yükle; sonraki sayfalar cursor ile istenir
+      const params = new URLSearchParams({ page_size: '20', severity_filter: severityFilter });
+      if (cursor !== null) params.set('cursor', cursor);
+      const response = await fetch(`http://localhost:8000/api/analysis/${fileId}/results?${params}`);
       if (response.ok) {
         const data = await response.json();
         setAnalysisData(data.summary);
-        setAnalysisResults(data.results);
+        setAnalysisResults(prev => (cursor !== null && prev ? [...prev, ...data.results] : data.results));
+        setNextCursor(data.next_cursor);
       } else {
         console.log('No analysis results found for this file yet');
         setAnalysisData(null);
         setAnalysisResults([]);
+        setNextCursor(null);
       }
     } catch (error) {
       console.error('Analysis results load error:', error);
       setAnalysisData(null);
       setAnalysisResults([]);
+      setNextCursor(null);
     }
   };
 
-  const startAnalysis = async () => {
+  // Severity filtresi sunucuda uygulanır; değişince sonuçlar baştan yüklenir
+  useEffect(() => {
+    if (fileId) {
+      loadAnalysisResults();
+    }
+  }, [severityFilter]);
+
+  // Satırın çevresindeki log satırlarını getir (Detay butonu)
+  const toggleLineContext = async (lineNumber) => {
+    if (lineContext && lineContext.lineNumber === lineNumber) {
+      setLineContext(null);
+      return;
+    }
+    try {
+      const start = Math.max(1, lineNumber - 5);
+      const response = await fetch(`http://localhost:8000/api/file/${fileId}/lines?start=${start}&end=${lineNumber + 6}`);
+      if (!response.ok) throw new Error('Satırlar alınamadı');
+      const data = await response.json();
+      setLineContext({ lineNumber, lines: data.lines });
+    } catch (error) {
+      console.error('Line context load error:', error);
+      addToast({
+        type: 'error',
+        title: 'Satır Hatası',
+        message: 'Satır bağlamı yüklenemedi',
+        duration: 5000
+      });
+    }
+  };
+
+  const startAnalysis = async (incremental = false) => {
     if (!fileId) {
       addToast({
         type: 'error',
@@ -101,43 +140,78 @@ const Analysis = () => {
 
     setAnalysisStatus('running');
     setProgress(0);
+    setJobInfo(null);
+    setLiveFindings([]);
 
     try {
-      // Progress simulation
-      const progressInterval = setInterval(() => {
-        setProgress(prev => Math.min(prev + Math.random() * 15, 90));
-      }, 500);
-
-      // API çağrısı (analiz türü ile)
-      const response = await fetch(`http://localhost:8000/api/analyze/${fileId}?analysis_type=${analysisType}`, {
+      // Analiz işini kuyruğa al (analiz türü ile); artımlı modda yalnızca yeni satırlar analiz edilir
+      const response = await fetch(`http://localhost:8000/api/analyze/${fileId}?analysis_type=${analysisType}&incremental=${incremental}`, {
         method: 'POST'
       });
 
-      clearInterval(progressInterval);
-      setProgress(100);
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'Analiz başarısız');
+      }
 
-      if (response.ok) {
-        const result = await response.json();
-        setAnalysisData(result.summary);
-        
-        addToast({
-          type: 'success',
-          title: 'Analiz Tamamlandı!',
-          message: `${result.summary.anomaly_count} anomali tespit edildi`,
-          duration: 5000
-        });
+      const { job_id: jobId } = await response.json();
 
-        // Sonuçları yükle
-        setTimeout(() => {
-          loadAnalysisResults();
-          setAnalysisStatus('completed');
-        }, 1000);
+      // İşin olaylarını canlı izle: anomaliler bulundukları anda gelir
+      const job = await new Promise((resolve, reject) => {
+        const source = new EventSource(`http://localhost:8000/api/jobs/${jobId}/stream`);
+        const updateProgress = (event) => {
+          const data = JSON.parse(event.data);
+          if (data.progress != null) setProgress(Math.round(data.progress));
+          setJobInfo(prev => ({ ...prev, ...data, anomalies: undefined }));
+          return data;
+        };
 
-      } else {
-        const error = await response.json();
-        throw new Error(error.detail || 'Analiz başarısız');
+        source.addEventListener('snapshot', (event) => {
+          const data = updateProgress(event);
+          setLiveFindings(data.anomalies || []);
+        });
+        source.addEventListener('running', updateProgress);
+        source.addEventListener('progress', updateProgress);
+        source.addEventListener('anomalies', (event) => {
+          const data = updateProgress(event);
+          setLiveFindings(prev => [...prev, ...data.anomalies]);
+        });
+        source.addEventListener('completed', (event) => {
+          source.close();
+          resolve(JSON.parse(event.data));
+        });
+        source.addEventListener('failed', (event) => {
+          source.close();
+          resolve(JSON.parse(event.data));
+        });
+        source.onerror = () => {
+          // Sunucu bağlantıyı kapattıysa tarayıcı yeniden bağlanır; kalıcı hatada vazgeç
+          if (source.readyState === EventSource.CLOSED) {
+            reject(new Error('Analiz durumu alınamadı'));
+          }
+        };
+      });
+
+      if (job.state !== 'completed') {
+        throw new Error(job.error || 'Analiz başarısız');
       }
 
+      setProgress(100);
+      setAnalysisData(job.summary);
+
+      addToast({
+        type: 'success',
+        title: 'Analiz Tamamlandı!',
+        message: `${job.summary.anomaly_count} anomali tespit edildi`,
+        duration: 5000
+      });
+
+      // Sonuçları yükle
+      setTimeout(() => {
+        loadAnalysisResults();
+        setAnalysisStatus('completed');
+      }, 1000);
+
     } catch (error) {
       console.error('Analysis error:', error);
       setAnalysisStatus('idle');
@@ -216,7 +290,7 @@ const Analysis = () => {
               {/* Analiz Türü Seçimi */}
               <div className="space-y-3">
                 <label className="text-sm font-medium text-gray-700">Analiz Türü:</label>
-                <div className="grid grid-cols-2 gap-3">
+                <div className="grid grid-cols-3 gap-3">
                   <div 
                     className={`p-3 rounded-lg border-2 cursor-pointer transition-all ${
                       analysisType === 'fast' 
@@ -247,12 +321,27 @@ const Analysis = () => {
                       </div>
                     </div>
                   </div>
+                  <div 
+                    className={`p-3 rounded-lg border-2 cursor-pointer transition-all ${
+                      analysisType === 'statistical' 
+                        ? 'border-purple-500 bg-purple-50 text-purple-700' 
+                        : 'border-gray-200 hover:border-gray-300'
+                    }`}
+                    onClick={() => setAnalysisType('statistical')}
+                  >
+                    <div className="text-center">
+                      <div className="font-medium">📈 İstatistiksel</div>
+                      <div className="text-xs text-gray-500 mt-1">
+                        LLM'siz ani artış | saniyeler
+                      </div>
+                    </div>
+                  </div>
                 </div>
               </div>
               
-              <Button onClick={startAnalysis} size="lg" className="w-full" disabled={!fileId || analysisStatus === 'running'}>
+              <Button onClick={() => startAnalysis()} size="lg" className="w-full" disabled={!fileId || analysisStatus === 'running'}>
                 <Activity className="mr-2 h-4 w-4" />
-                {analysisType === 'fast' ? '⚡ Hızlı Analizi Başlat' : '🔍 Detaylı Analizi Başlat'}
+                {analysisType === 'fast' ? '⚡ Hızlı Analizi Başlat' : analysisType === 'statistical' ? '📈 İstatistiksel Analizi Başlat' : '🔍 Detaylı Analizi Başlat'}
               </Button>
             </CardContent>
           </Card>
@@ -281,6 +370,26 @@ const Analysis = () => {
                 <p className="text-sm text-gray-600 text-center">
                   %{progress} tamamlandı
                 </p>
+                {jobInfo && (
+                  <p className="text-xs text-gray-500 text-center">
+                    {jobInfo.state === 'queued'
+                      ? 'Analiz sırada bekliyor...'
+                      : `${jobInfo.processed_lines.toLocaleString()} / ${jobInfo.total_lines.toLocaleString()} satır • ${Math.round(jobInfo.lines_per_second).toLocaleString()} satır/sn${jobInfo.eta_seconds != null ? ` • kalan ~${Math.ceil(jobInfo.eta_seconds)} sn` : ''}`}
+                  </p>
+                )}
+                {liveFindings.length > 0 && (
+                  <div className="border rounded-md p-3 space-y-2">
+                    <p className="text-sm font-medium text-gray-700">
+                      Şimdiye kadar {jobInfo?.anomaly_count ?? liveFindings.length} anomali bulundu
+                      {jobInfo?.critical_count ? ` (${jobInfo.critical_count} kritik)` : ''}
+                    </p>
+                    {liveFindings.slice(-5).reverse().map((finding) => (
+                      <div key={finding.line_number} className={`text-xs p-2 rounded border ${getSeverityColor(finding.severity)}`}>
+                        <span className="font-mono">#{finding.line_number}</span> {finding.log_content}
+                      </div>
+                    ))}
+                  </div>
+                )}
                 <div className="text-sm text-gray-500 space-y-1">
                   <p>• Log dosyası okunuyor...</p>
                   <p>• Öznitelik çıkarımı yapılıyor...</p>
@@ -360,11 +469,11 @@ const Analysis = () => {
                   <CardTitle>
                     Analiz Özeti 
                     <Badge className="ml-2" variant={analysisType === 'fast' ? 'default' : 'secondary'}>
-                      {analysisType === 'fast' ? '⚡ Hızlı' : '🔍 Detaylı'}
+                      {analysisType === 'fast' ? '⚡ Hızlı' : analysisType === 'statistical' ? '📈 İstatistiksel' : '🔍 Detaylı'}
                     </Badge>
                   </CardTitle>
                   <CardDescription>
-                    {analysisType === 'fast' ? 'Hızlı analiz ile önemli anomaliler tespit edildi' : 'Detaylı analiz ile kapsamlı tarama yapıldı'}
+                    {analysisType === 'fast' ? 'Hızlı analiz ile önemli anomaliler tespit edildi' : analysisType === 'statistical' ? 'İstatistiksel analiz ile ani artış ve hız değişimleri tarandı' : 'Detaylı analiz ile kapsamlı tarama yapıldı'}
                   </CardDescription>
                 </CardHeader>
                 <CardContent>
@@ -386,6 +495,10 @@ const Analysis = () => {
                       <p className="text-2xl font-bold text-blue-600">%{analysisData.anomaly_rate?.toFixed(2)}</p>
                     </div>
                   </div>
+                  <Button variant="outline" size="sm" className="mt-6" onClick={() => startAnalysis(true)}>
+                    <Activity className="mr-2 h-4 w-4" />
+                    Yeni Eklenen Satırları Analiz Et
+                  </Button>
                 </CardContent>
               </Card>
             )}
@@ -435,7 +548,6 @@ const Analysis = () => {
                         searchFilter === '' || 
                         log.log_content.toLowerCase().includes(searchFilter.toLowerCase())
                       )
-                      .slice(0, 20) // İlk 20 sonuç
                       .map((log) => (
                         <div key={log.line_number} className="border rounded-lg p-4 hover:bg-gray-50 transition-colors">
                           <div className="flex items-start justify-between">
@@ -462,9 +574,21 @@ const Analysis = () => {
                                 <span>Güven: %{(log.confidence * 100).toFixed(0)}</span>
                                 <span>Anomali Olasılığı: %{(log.anomaly_probability * 100).toFixed(1)}</span>
                               </div>
+                              {lineContext && lineContext.lineNumber === log.line_number && (
+                                <div className="mt-2 font-mono text-xs bg-gray-900 text-gray-100 p-2 rounded overflow-x-auto">
+                                  {lineContext.lines.map((line) => (
+                                    <div
+                                      key={line.line_number}
+                                      className={line.line_number === log.line_number ? 'bg-yellow-700' : ''}
+                                    >
+                                      <span className="text-gray-500 mr-2">{line.line_number}</span>{line.content}
+                                    </div>
+                                  ))}
+                                </div>
+                              )}
                             </div>
                             <div className="flex items-center space-x-2">
-                              <Button variant="outline" size="sm">
+                              <Button variant="outline" size="sm" onClick={() => toggleLineContext(log.line_number)}>
                                 Detay
                               </Button>
                               {log.is_anomaly && (
@@ -484,6 +608,13 @@ const Analysis = () => {
                       </p>
                     </div>
                   )}
+                  {nextCursor !== null && (
+                    <div className="text-center">
+                      <Button variant="outline" size="sm" onClick={() => loadAnalysisResults(nextCursor)}>
+                        Daha Fazla Yükle
+                      </Button>
+                    </div>
+                  )}
                 </div>
               </CardContent>
             </Card>
@@ -50,12 +50,12 @@ const LogUpload = () => {
       return;
     }
 
-    // Dosya boyutu kontrolü (50MB)
-    if (file.size > 50 * 1024 * 1024) {
+    // Dosya boyutu kontrolü (4GB)
+    if (file.size > 4 * 1024 * 1024 * 1024) {
       addToast({
         type: 'error',
         title: 'Dosya Çok Büyük',
-        message: 'Dosya boyutu 50MB\'dan küçük olmalıdır.',
+        message: 'Dosya boyutu 4GB\'dan küçük olmalıdır.',
         duration: 5000
       });
       return;
@@ -155,7 +155,7 @@ const LogUpload = () => {
               <CardHeader>
                 <CardTitle>Dosya Yükleme</CardTitle>
                 <CardDescription>
-                  Desteklenen formatlar: CSV, LOG, TXT (Maksimum 50MB)
+                  Desteklenen formatlar: CSV, LOG, TXT (Maksimum 4GB)
                 </CardDescription>
               </CardHeader>
               <CardContent>
@@ -303,7 +303,7 @@ const LogUpload = () => {
               <CardContent className="space-y-3">
                 <div className="flex items-center space-x-2">
                   <CheckCircle className="h-4 w-4 text-green-600" />
-                  <span className="text-sm">Maksimum dosya boyutu: 50MB</span>
+                  <span className="text-sm">Maksimum dosya boyutu: 4GB</span>
                 </div>
                 <div className="flex items-center space-x-2">
                   <CheckCircle className="h-4 w-4 text-green-600" />
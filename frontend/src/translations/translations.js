@@ -27,7 +27,7 @@ export const translations = {
     logUpload: "Log Yükle",
     logUploadDesc: "Analiz için log dosyanızı yükleyin",
     fileUpload: "Dosya Yükleme",
-    supportedFormats: "Desteklenen formatlar: CSV, LOG, TXT (Maksimum 50MB)",
+    supportedFormats: "Desteklenen formatlar: CSV, LOG, TXT (Maksimum 4GB)",
     dragFileHere: "Dosyanızı buraya sürükleyin",
     orClickToSelect: "veya dosya seçmek için tıklayın",
     selectFile: "Dosya Seç",
@@ -46,7 +46,7 @@ export const translations = {
     logDesc: "Log dosyaları",
     txtDesc: "Metin dosyaları",
     requirements: "Gereksinimler",
-    maxFileSize: "Maksimum dosya boyutu: 50MB",
+    maxFileSize: "Maksimum dosya boyutu: 4GB",
     utf8Encoding: "UTF-8 encoding",
     oneLogPerLine: "Satır başına bir log kaydı",
     sampleFile: "Örnek Dosya",
@@ -162,7 +162,7 @@ export const translations = {
     logUpload: "Log Upload",
     logUploadDesc: "Upload your log file for analysis",
     fileUpload: "File Upload",
-    supportedFormats: "Supported formats: CSV, LOG, TXT (Maximum 50MB)",
+    supportedFormats: "Supported formats: CSV, LOG, TXT (Maximum 4GB)",
     dragFileHere: "Drag your file here",
     orClickToSelect: "or click to select file",
     selectFile: "Select File",
@@ -181,7 +181,7 @@ export const translations = {
     logDesc: "Log files",
     txtDesc: "Text files",
     requirements: "Requirements",
-    maxFileSize: "Maximum file size: 50MB",
+    maxFileSize: "Maximum file size: 4GB",
     utf8Encoding: "UTF-8 encoding",
     oneLogPerLine: "One log record per line",
     sampleFile: "Sample File",